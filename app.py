@@ -1,20 +1,128 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
-from database import Database
-import re
-import concurrent.futures
-import random
+from flask import Blueprint, Flask, Response, current_app, g, render_template, request, jsonify, send_from_directory, stream_with_context
+from database import crear_database
+from jobs import JobManager
+from plantillas import MotorPlantillas
+from serializacion import ProveedorJSON
+from compresion import Compresor
+from peticiones import (
+    MAXIMO_IDS_POR_PETICION, ExportacionPorTrozos, etag_peticion, filas_a_consultar, fijar_etag,
+    leer_filtros_correos, leer_filtros_usuarios, leer_ids_a_eliminar, leer_listado, leer_opciones_borrado,
+    leer_opciones_generacion, leer_tipos_correo, leer_usuario_nuevo, modo_exportacion, respuesta_completa,
+    respuesta_generacion, respuesta_listado, respuesta_trabajo, respuesta_usuario_agregado,
+    respuesta_usuarios_generados
+)
+from bitacora import configurar_logging, obtener_logger
+from metricas import REGISTRO, recolector_pool, registrar_generacion, registrar_peticion
+from borrado import eliminar_por_lotes, eliminar_rango_acotado
+from generacion import (
+    ResumenGeneracion, generar_rango, generar_en_paralelo, modo_generacion, usuarios_aleatorios, usuarios_con_ids
+)
+import time
 import threading
-import traceback
 from flask_cors import CORS
 import socket
 import os
 from datetime import datetime
 
-app = Flask(__name__)
-CORS(app)
+logger = obtener_logger('app')
 
-db = Database()
-db_lock = threading.Lock()
+def _entero(nombre, defecto):
+    return int(os.environ.get(nombre, defecto))
+
+def _decimal(nombre, defecto):
+    return float(os.environ.get(nombre, defecto))
+
+def configuracion_entorno():
+    """Configuración de la aplicación leída de las variables de entorno CRM_*"""
+    return {
+        'CRM_LOG_NIVEL': os.environ.get('CRM_LOG_NIVEL', 'INFO'),
+        'CRM_LOG_FORMATO': os.environ.get('CRM_LOG_FORMATO', 'texto'),
+        'CRM_COMPRESION_MINIMO': _entero('CRM_COMPRESION_MINIMO', 1024),
+        'CRM_GZIP_NIVEL': _entero('CRM_GZIP_NIVEL', 6),
+        'CRM_BROTLI_CALIDAD': _entero('CRM_BROTLI_CALIDAD', 4),
+        'CRM_BACKEND': os.environ.get('CRM_BACKEND', 'mysql'),
+        'CRM_SQLITE_RUTA': os.environ.get('CRM_SQLITE_RUTA'),
+        'CRM_POOL_SIZE': _entero('CRM_POOL_SIZE', 10),
+        'CRM_POOL_OVERFLOW': _entero('CRM_POOL_OVERFLOW', 5),
+        'CRM_POOL_TIMEOUT': _decimal('CRM_POOL_TIMEOUT', 30),
+        'CRM_LOTE_FILAS': _entero('CRM_LOTE_FILAS', 5000),
+        'CRM_LOTE_BYTES': _entero('CRM_LOTE_BYTES', 1024 * 1024),
+        'CRM_CHUNKS_POR_COMMIT': _entero('CRM_CHUNKS_POR_COMMIT', 1),
+        'CRM_LOAD_DATA': os.environ.get('CRM_LOAD_DATA') == '1',
+        'CRM_STATS_TTL': _decimal('CRM_STATS_TTL', 5),
+        'CRM_ESTADO_TTL': _decimal('CRM_ESTADO_TTL', 1),
+        'CRM_CACHE_TAMANO': _entero('CRM_CACHE_TAMANO', 256),
+        'CRM_CACHE_TTL': _decimal('CRM_CACHE_TTL', 30),
+        'CRM_UMBRAL_LENTA': _decimal('CRM_UMBRAL_LENTA', 0.5),
+        'CRM_CONSULTAS_LENTAS': _entero('CRM_CONSULTAS_LENTAS', 100),
+        'CRM_JOB_WORKERS': _entero('CRM_JOB_WORKERS', 2),
+        'CRM_BORRADO_PAUSA': _decimal('CRM_BORRADO_PAUSA', 0),
+        'CRM_GEN_PROCESOS': _entero('CRM_GEN_PROCESOS', os.cpu_count() or 1)
+    }
+
+motor_correos = MotorPlantillas()
+
+class ServiciosCRM:
+    """Base de datos, cola de trabajos y compresor de una aplicación.
+
+    create_app crea unos por aplicación y los guarda en ``app.extensions['crm']``;
+    las rutas los leen con servicios(), así dos aplicaciones del mismo proceso
+    no comparten caché ni trabajos.
+    """
+
+    def __init__(self, config):
+        self.compresor = Compresor(
+            minimo=config['CRM_COMPRESION_MINIMO'],
+            nivel_gzip=config['CRM_GZIP_NIVEL'],
+            calidad_brotli=config['CRM_BROTLI_CALIDAD']
+        )
+        self.db = crear_database(
+            config['CRM_BACKEND'],
+            sqlite_ruta=config['CRM_SQLITE_RUTA'],
+            pool_size=config['CRM_POOL_SIZE'],
+            max_overflow=config['CRM_POOL_OVERFLOW'],
+            pool_timeout=config['CRM_POOL_TIMEOUT'],
+            lote_filas=config['CRM_LOTE_FILAS'],
+            lote_bytes=config['CRM_LOTE_BYTES'],
+            chunks_por_commit=config['CRM_CHUNKS_POR_COMMIT'],
+            allow_local_infile=config['CRM_LOAD_DATA'],
+            ttl_estadisticas=config['CRM_STATS_TTL'],
+            ttl_estado_tablas=config['CRM_ESTADO_TTL'],
+            cache_tamano=config['CRM_CACHE_TAMANO'],
+            cache_ttl=config['CRM_CACHE_TTL'],
+            umbral_consulta_lenta=config['CRM_UMBRAL_LENTA'],
+            capacidad_consultas_lentas=config['CRM_CONSULTAS_LENTAS']
+        )
+        self.jobs = JobManager(max_workers=config['CRM_JOB_WORKERS'])
+
+    def cerrar(self, esperar=True):
+        self.jobs.cerrar(esperar=esperar)
+
+def servicios():
+    """Servicios de la aplicación que atiende la petición"""
+    return current_app.extensions['crm']
+
+rutas = Blueprint('crm', __name__)
+
+def create_app(config=None):
+    """OPTIMIZACIÓN: Crea la aplicación Flask con sus propios servicios.
+
+    ``config`` sustituye valores de configuracion_entorno() con las mismas
+    claves CRM_*. Cada aplicación tiene su base de datos, su cola de trabajos
+    y su compresor (ServiciosCRM): crear otra no afecta a las anteriores.
+    servidor.py llama a create_app en cada worker después del fork, con sus
+    propios pools de conexiones.
+    """
+    config = {**configuracion_entorno(), **(config or {})}
+
+    configurar_logging(nivel=config['CRM_LOG_NIVEL'], formato=config['CRM_LOG_FORMATO'])
+    app = Flask(__name__)
+    app.config.update(config)
+    app.extensions['crm'] = ServiciosCRM(config)
+    CORS(app)
+    app.json = ProveedorJSON(app)
+    app.register_blueprint(rutas)
+    return app
 
 def get_local_ip():
     """Obtiene la IP local de la máquina"""
@@ -28,285 +136,515 @@ def get_local_ip():
         return "127.0.0.1"
 
 # Ruta principal - SERVIR INDEX.HTML
-@app.route('/')
+@rutas.route('/')
 def index():
     return render_template('index.html')
 
 # Ruta explícita para servir archivos estáticos
-@app.route('/static/<path:filename>')
+@rutas.route('/static/<path:filename>')
 def serve_static(filename):
     return send_from_directory('static', filename)
 
 # Ruta para servir CSS
-@app.route('/static/css/<path:filename>')
+@rutas.route('/static/css/<path:filename>')
 def serve_css(filename):
     return send_from_directory('static/css', filename)
 
 # Ruta para servir JS
-@app.route('/static/js/<path:filename>')
+@rutas.route('/static/js/<path:filename>')
 def serve_js(filename):
     return send_from_directory('static/js', filename)
 
+def respuesta_con_etag(tablas, construir):
+    """OPTIMIZACIÓN: GET condicional con un ETag fuerte derivado del estado de las tablas.
+
+    El ETag combina la ruta y la query string con la huella (MAX(id),
+    COUNT(*)) de ``tablas``; si coincide con If-None-Match se responde 304
+    sin ejecutar la consulta ni serializar nada. ``construir(huella)`` genera
+    la respuesta completa solo cuando hace falta y recibe el estado del ETag,
+    para que el cuerpo cacheado corresponda siempre a ese mismo estado aunque
+    escriban otros workers.
+    """
+    estado = servicios().db.obtener_estado_tablas(*tablas)
+    if estado is None:
+        return construir(None)
+    
+    etag, coincidente = etag_peticion(request, estado)
+    if coincidente:
+        return fijar_etag(Response(status=304), coincidente)
+    respuesta = current_app.make_response(construir(estado))
+    if respuesta.status_code != 200:
+        return respuesta
+    return fijar_etag(respuesta, etag)
+
 # API Routes
-@app.route('/usuarios', methods=['GET'])
+@rutas.route('/usuarios', methods=['GET'])
 def obtener_usuarios():
     try:
-        usuarios = db.obtener_usuarios()
-        print(f"Obtenidos {len(usuarios)} usuarios de la BD")
-        return jsonify(usuarios)
+        db = servicios().db
+        try:
+            filtros, columnar, limite, despues_de = leer_listado(request.args, leer_filtros_usuarios)
+        except ValueError as e:
+            return jsonify({'error': f'Filtro no válido: {str(e)}'}), 400
+        
+        def construir(huella):
+            usuarios = db.obtener_usuarios(filas_a_consultar(limite), despues_de, filtros, huella)
+            logger.debug("Obtenidos %s usuarios de la BD", len(usuarios))
+            return jsonify(respuesta_listado('usuarios', usuarios, limite, columnar))
+        
+        return respuesta_con_etag(('usuarios',), construir)
     except Exception as e:
         error_msg = f"Error obteniendo usuarios: {str(e)}"
-        print(error_msg)
+        logger.exception(error_msg)
         return jsonify({'error': error_msg}), 500
 
-@app.route('/usuarios', methods=['POST'])
+@rutas.route('/usuarios', methods=['POST'])
 def agregar_usuario():
     try:
+        db = servicios().db
         if not request.is_json:
             return jsonify({'error': 'Content-Type must be application/json'}), 400
             
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'No JSON data provided'}), 400
-            
-        nombre = data.get('nombre')
-        apellido = data.get('apellido')
-        edad = data.get('edad')
-        
-        print(f"Recibiendo datos: nombre={nombre}, apellido={apellido}, edad={edad}")
+        try:
+            nombre, apellido, edad = leer_usuario_nuevo(request.get_json())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if not nombre or not apellido or not edad:
-            return jsonify({'error': 'Todos los campos son obligatorios'}), 400
+        logger.debug("Recibiendo datos: nombre=%s, apellido=%s, edad=%s", nombre, apellido, edad)
         
         usuario_id = db.agregar_usuario(nombre, apellido, edad)
         if usuario_id:
-            return jsonify({
-                'id': usuario_id, 
-                'mensaje': 'Usuario agregado correctamente',
-                'usuario': {'id': usuario_id, 'nombre': nombre, 'apellido': apellido, 'edad': edad}
-            })
+            return jsonify(respuesta_usuario_agregado(usuario_id, nombre, apellido, edad))
         else:
             return jsonify({'error': 'Error al agregar usuario a la base de datos'}), 500
     except Exception as e:
         error_msg = f"Error agregando usuario: {str(e)}"
-        print(error_msg)
+        logger.exception(error_msg)
         return jsonify({'error': error_msg}), 500
 
-@app.route('/usuarios/aleatorios', methods=['POST'])
+@rutas.route('/usuarios/aleatorios', methods=['POST'])
 def generar_usuarios_aleatorios():
-    try:
-        if not request.is_json:
-            return jsonify({'error': 'Content-Type must be application/json'}), 400
-            
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'No JSON data provided'}), 400
-            
-        cantidad = data.get('cantidad', 1000)
-        
-        print(f"Solicitando generar {cantidad} usuarios aleatorios...")
-        
-        usuarios_generados = generar_usuarios_masivos(cantidad)
-        
-        response_data = {
-            'mensaje': f'Se generaron {len(usuarios_generados)} usuarios aleatorios',
-            'usuarios': usuarios_generados
-        }
-        
-        return jsonify(response_data)
-        
-    except Exception as e:
-        error_msg = f"Error generando usuarios aleatorios: {str(e)}"
-        print(error_msg)
-        return jsonify({'error': error_msg}), 500
+    if not request.is_json:
+        return jsonify({'error': 'Content-Type must be application/json'}), 400
+    respuesta, estado = atender_generar_usuarios(servicios().db, request.args, request.get_json(silent=True))
+    return jsonify(respuesta), estado
 
-@app.route('/usuarios/<int:usuario_id>', methods=['DELETE'])
+@rutas.route('/usuarios/<int:usuario_id>', methods=['DELETE'])
 def eliminar_usuario(usuario_id):
     try:
-        print(f"Eliminando usuario con ID: {usuario_id}")
+        db = servicios().db
+        logger.info("Eliminando usuario con ID: %s", usuario_id)
         db.eliminar_usuario(usuario_id)
         return jsonify({'mensaje': 'Usuario eliminado correctamente'})
     except Exception as e:
         error_msg = f"Error eliminando usuario: {str(e)}"
-        print(error_msg)
+        logger.exception(error_msg)
         return jsonify({'error': error_msg}), 500
 
-@app.route('/usuarios/todos', methods=['DELETE'])
-def eliminar_todos_usuarios():
+@rutas.route('/usuarios', methods=['DELETE'])
+@rutas.route('/usuarios/eliminar', methods=['POST'])
+def eliminar_usuarios():
+    """Borra varios usuarios en una petición: {"ids": [...]} o {"desde": a, "hasta": b}"""
+    respuesta, estado = atender_eliminar_usuarios(servicios().db, request.get_json(silent=True))
+    return jsonify(respuesta), estado
+
+@rutas.route('/usuarios/<int:usuario_id>/correos', methods=['GET'])
+def obtener_correos_usuario(usuario_id):
     try:
-        print("Eliminando todos los usuarios...")
-        db.eliminar_todos_usuarios()
-        return jsonify({'mensaje': 'Todos los usuarios han sido eliminados'})
+        db = servicios().db
+        try:
+            tipos = leer_tipos_correo(request.args)
+        except ValueError as e:
+            return jsonify({'error': f'Filtro no válido: {str(e)}'}), 400
+        
+        def construir(huella):
+            correos = db.obtener_correos_usuario(usuario_id, tipos)
+            if correos is None:
+                return jsonify({'error': 'Usuario no encontrado'}), 404
+            return jsonify(correos)
+        
+        return respuesta_con_etag(('usuarios', 'correos'), construir)
     except Exception as e:
-        error_msg = f"Error eliminando todos los usuarios: {str(e)}"
-        print(error_msg)
+        error_msg = f"Error obteniendo correos del usuario: {str(e)}"
+        logger.exception(error_msg)
         return jsonify({'error': error_msg}), 500
 
-@app.route('/generar-correos', methods=['POST'])
+@rutas.route('/usuarios/todos', methods=['DELETE'])
+def eliminar_todos_usuarios():
+    return encolar_borrado('usuarios', 'Borrado de todos los usuarios encolado')
+
+@rutas.route('/generar-correos', methods=['POST'])
 def generar_correos():
+    crm = servicios()
+    data = request.get_json(silent=True) if request.is_json else None
+    respuesta, estado = atender_generar_correos(
+        crm.db, crm.jobs, request.args, data, current_app.config['CRM_GEN_PROCESOS']
+    )
+    return jsonify(respuesta), estado
+
+def exportar_correos_stream(db, exportacion, filtros=None):
+    """Genera la exportación de correos por trozos, un trozo por lote leído de la BD"""
+    for filas in db.iterar_correos(filtros=filtros):
+        yield exportacion.trozo(filas)
+    cierre = exportacion.cierre()
+    if cierre:
+        yield cierre
+
+@rutas.route('/correos', methods=['GET'])
+def obtener_correos():
     try:
-        print("🚀 Iniciando generación MASIVA de correos...")
+        db = servicios().db
+        try:
+            filtros, columnar, limite, despues_de = leer_listado(request.args, leer_filtros_correos)
+        except ValueError as e:
+            return jsonify({'error': f'Filtro no válido: {str(e)}'}), 400
+        
+        modo = modo_exportacion(request.args, request.accept_mimetypes.best)
+        if modo:
+            exportacion = ExportacionPorTrozos(modo)
+            return Response(
+                stream_with_context(exportar_correos_stream(db, exportacion, filtros)),
+                mimetype=exportacion.mimetype
+            )
+        
+        def construir(huella):
+            correos = db.obtener_correos(filas_a_consultar(limite), despues_de, filtros, huella)
+            logger.debug("Obtenidos %s correos de la BD", len(correos))
+            return jsonify(respuesta_listado('correos', correos, limite, columnar))
+        
+        return respuesta_con_etag(('usuarios', 'correos'), construir)
+    except Exception as e:
+        error_msg = f"Error obteniendo correos: {str(e)}"
+        logger.exception(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+@rutas.route('/correos/todos', methods=['DELETE'])
+def eliminar_todos_correos():
+    return encolar_borrado('correos', 'Borrado de todos los correos encolado')
+
+def encolar_borrado(tabla, mensaje):
+    crm = servicios()
+    respuesta, estado = atender_encolar_borrado(
+        crm.db, crm.jobs, tabla, mensaje, request.args, current_app.config['CRM_BORRADO_PAUSA']
+    )
+    return jsonify(respuesta), estado
+
+@rutas.route('/jobs', methods=['GET'])
+def listar_jobs():
+    return jsonify([job.to_dict() for job in servicios().jobs.listar()])
+
+@rutas.route('/jobs/<job_id>', methods=['GET'])
+def obtener_job(job_id):
+    respuesta, estado = atender_obtener_job(servicios().jobs, job_id)
+    return jsonify(respuesta), estado
+
+@rutas.route('/jobs/<job_id>', methods=['DELETE'])
+def cancelar_job(job_id):
+    respuesta, estado = atender_cancelar_job(servicios().jobs, job_id)
+    return jsonify(respuesta), estado
+
+@rutas.route('/stats', methods=['GET'])
+def obtener_estadisticas():
+    estadisticas = servicios().db.obtener_estadisticas()
+    if estadisticas is None:
+        return jsonify({'error': 'No se pudieron calcular las estadísticas'}), 500
+    return jsonify(estadisticas)
+
+@rutas.route('/pool/estadisticas', methods=['GET'])
+def estadisticas_pool():
+    return jsonify(servicios().db.estadisticas_pool())
+
+@rutas.route('/metrics', methods=['GET'])
+def metrics():
+    # Estadísticas del pool de esta aplicación, leídas en el momento de exponer
+    recolector_pool(servicios().db.estadisticas_pool)()
+    return Response(REGISTRO.exponer(), mimetype='text/plain; version=0.0.4')
+
+@rutas.route('/cache/estadisticas', methods=['GET'])
+def estadisticas_cache():
+    return jsonify(servicios().db.estadisticas_cache())
+
+@rutas.route('/admin/consultas-lentas', methods=['GET'])
+def listar_consultas_lentas():
+    registro = servicios().db.consultas_lentas
+    return jsonify({**registro.estadisticas(), 'consultas': registro.listar()})
+
+@rutas.route('/admin/consultas-lentas', methods=['DELETE'])
+def limpiar_consultas_lentas():
+    servicios().db.consultas_lentas.limpiar()
+    return jsonify({'mensaje': 'Registro de consultas lentas vaciado'})
+
+@rutas.before_app_request
+def iniciar_medicion():
+    g.inicio_peticion = time.perf_counter()
+
+# Registrado antes que la compresión para que la latencia la incluya
+# (Flask ejecuta los after_request en orden inverso)
+@rutas.after_app_request
+def registrar_metricas(respuesta):
+    inicio = g.pop('inicio_peticion', None)
+    if inicio is not None:
+        # La plantilla de la ruta (no la URL) para acotar las series
+        ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+        registrar_peticion(request.method, ruta, respuesta.status_code, time.perf_counter() - inicio)
+    return respuesta
+
+@rutas.after_app_request
+def comprimir_respuesta(respuesta):
+    return servicios().compresor(request, respuesta)
+
+# Manejo de errores para rutas no encontradas
+@rutas.app_errorhandler(404)
+def not_found(error):
+    return jsonify({'error': 'Endpoint no encontrado'}), 404
+
+# Cuerpos de las rutas que también usa app_async.py (en un hilo cuando
+# bloquean): reciben los servicios y la petición ya leída, y devuelven
+# (respuesta, estado) para que cada aplicación haga su jsonify
+def atender_generar_usuarios(db, args, data):
+    """POST /usuarios/aleatorios"""
+    try:
+        if not data:
+            return {'error': 'No JSON data provided'}, 400
+            
+        cantidad = data.get('cantidad', 1000)
+        
+        logger.info("Solicitando generar %s usuarios aleatorios...", cantidad)
+        
         start_time = datetime.now()
+        usuarios_generados = generar_usuarios_masivos(db, cantidad)
+        tiempo_total = (datetime.now() - start_time).total_seconds()
         
-        # Obtener tipos específicos si se proporcionan
-        tipos_seleccionados = None
-        if request.is_json:
-            data = request.get_json()
-            if data and 'tipos' in data:
-                tipos_seleccionados = data['tipos']
-                print(f"📧 Generando correos para tipos seleccionados: {tipos_seleccionados}")
+        return respuesta_usuarios_generados(usuarios_generados, tiempo_total, respuesta_completa(args, data)), 200
         
-        usuarios = db.obtener_usuarios()
+    except Exception as e:
+        error_msg = f"Error generando usuarios aleatorios: {str(e)}"
+        logger.exception(error_msg)
+        return {'error': error_msg}, 500
+
+def atender_eliminar_usuarios(db, data):
+    """DELETE /usuarios y POST /usuarios/eliminar"""
+    try:
+        try:
+            ids, rango = leer_ids_a_eliminar(data)
+        except (TypeError, ValueError) as e:
+            return {'error': str(e)}, 400
+
+        if rango:
+            logger.info("Eliminando usuarios con ID entre %s y %s", *rango)
+            try:
+                eliminados = eliminar_rango_acotado(db, 'usuarios', *rango, MAXIMO_IDS_POR_PETICION)
+            except ValueError as e:
+                return {'error': str(e)}, 400
+        else:
+            logger.info("Eliminando %s usuarios", len(ids))
+            eliminados = db.eliminar_usuarios(ids)
+            if eliminados is None:
+                return {'error': 'Error eliminando usuarios de la base de datos'}, 500
+        return {'mensaje': f'{eliminados} usuarios eliminados', 'eliminados': eliminados}, 200
+    except Exception as e:
+        error_msg = f"Error eliminando usuarios: {str(e)}"
+        logger.exception(error_msg)
+        return {'error': error_msg}, 500
+
+def atender_generar_correos(db, jobs, args, data, maximo_procesos):
+    """POST /generar-correos"""
+    try:
+        logger.info("Iniciando generación MASIVA de correos...")
+        start_time = datetime.now()
+        
+        try:
+            tipos_seleccionados, en_segundo_plano, incremental, procesos = leer_opciones_generacion(
+                args, data, maximo_procesos
+            )
+        except ValueError as e:
+            return {'error': f'procesos no válido: {str(e)}'}, 400
+        if tipos_seleccionados:
+            logger.info("Generando correos para tipos seleccionados: %s", tipos_seleccionados)
+        if procesos and not db.multiproceso:
+            return {'error': 'El backend configurado no admite generación en varios procesos'}, 400
         
-        if not usuarios:
-            return jsonify({'error': 'No hay usuarios para generar correos'}), 400
+        # Modo asíncrono: se encola un trabajo y se consulta en /jobs/<id>
+        if en_segundo_plano:
+            job = jobs.enviar('generar-correos', ejecutar_generacion_correos, db, tipos_seleccionados,
+                              incremental, procesos)
+            return respuesta_trabajo(job, 'Generación de correos encolada'), 202
         
-        print(f"📧 Generando correos para {len(usuarios)} usuarios...")
+        completa = respuesta_completa(args, data)
+        correos_generados = None
         
-        # Pasar los tipos seleccionados a la función de generación
-        correos_generados = generar_correos_masivos(usuarios, tipos_seleccionados)
+        if procesos:
+            # Varios procesos escriben sus shards; solo se puede devolver el resumen combinado
+            resumen = generar_en_paralelo(db, tipos_seleccionados, incremental, procesos)
+        elif incremental:
+            # Solo los pares (usuario, tipo) que aún no tienen correo
+            correos_generados, resumen = generar_correos_incrementales(db, tipos_seleccionados, acumular=completa)
+            resumen = resumen.to_dict()
+        else:
+            usuarios = db.obtener_usuarios()
+            
+            if not usuarios:
+                return {'error': 'No hay usuarios para generar correos'}, 400
+            
+            logger.info("Generando correos para %s usuarios...", len(usuarios))
+            
+            # Pasar los tipos seleccionados a la función de generación
+            correos_generados, resumen = generar_correos_masivos(db, usuarios, tipos_seleccionados, acumular=completa)
+            resumen = resumen.to_dict()
         
         end_time = datetime.now()
         tiempo_total = (end_time - start_time).total_seconds()
+        total = resumen['total_correos']
         
-        print(f"✅ Generados {len(correos_generados)} correos en {tiempo_total:.2f} segundos")
+        logger.info("Generados %s correos en %.2f segundos", total, tiempo_total)
+        registrar_generacion(modo_generacion(incremental, procesos), total, tiempo_total)
         
-        return jsonify({
-            'mensaje': f'Se generaron {len(correos_generados)} correos electrónicos en {tiempo_total:.2f} segundos',
-            'correos': correos_generados,
-            'tiempo': tiempo_total,
-            'tipos_generados': list(set(c['tipo'] for c in correos_generados)) if correos_generados else []
-        })
+        return respuesta_generacion(resumen, tiempo_total, correos_generados if completa else None), 200
     
     except Exception as e:
         error_msg = f"Error generando correos: {str(e)}"
-        print(error_msg)
-        return jsonify({'error': error_msg}), 500
+        logger.exception(error_msg)
+        return {'error': error_msg}, 500
 
-@app.route('/correos', methods=['GET'])
-def obtener_correos():
-    try:
-        correos = db.obtener_correos()
-        print(f"Obtenidos {len(correos)} correos de la BD")
-        return jsonify(correos)
-    except Exception as e:
-        error_msg = f"Error obteniendo correos: {str(e)}"
-        print(error_msg)
-        return jsonify({'error': error_msg}), 500
+def atender_encolar_borrado(db, jobs, tabla, mensaje, args, pausa=0.0):
+    """DELETE /usuarios/todos y /correos/todos: encola el vaciado por lotes (202).
 
-@app.route('/correos/todos', methods=['DELETE'])
-def eliminar_todos_correos():
+    ``lote`` fija los ids por transacción y ``truncate=1`` prueba antes con
+    TRUNCATE (solo al vaciar correos); el progreso se consulta en /jobs/<id>.
+    """
     try:
-        print("Eliminando todos los correos...")
-        db.eliminar_todos_correos()
-        return jsonify({'mensaje': 'Todos los correos han sido eliminados'})
+        ids_por_lote, truncar = leer_opciones_borrado(args)
+        logger.info("Encolando el borrado de %s (truncate: %s)", tabla, truncar)
+        job = jobs.enviar(f'eliminar-{tabla}', ejecutar_borrado, db, tabla, ids_por_lote, truncar, pausa)
+        return respuesta_trabajo(job, mensaje), 202
     except Exception as e:
-        error_msg = f"Error eliminando todos los correos: {str(e)}"
-        print(error_msg)
-        return jsonify({'error': error_msg}), 500
+        error_msg = f"Error eliminando {tabla}: {str(e)}"
+        logger.exception(error_msg)
+        return {'error': error_msg}, 500
 
-# Manejo de errores para rutas no encontradas
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({'error': 'Endpoint no encontrado'}), 404
+def atender_obtener_job(jobs, job_id):
+    """GET /jobs/<id>"""
+    job = jobs.obtener(job_id)
+    if not job:
+        return {'error': 'Trabajo no encontrado'}, 404
+    return job.to_dict(), 200
+
+def atender_cancelar_job(jobs, job_id):
+    """DELETE /jobs/<id>"""
+    job = jobs.cancelar(job_id)
+    if not job:
+        return {'error': 'Trabajo no encontrado'}, 404
+    return {'mensaje': 'Cancelación solicitada', 'job': job.to_dict()}, 200
 
 # Funciones auxiliares
-def generar_usuarios_masivos(cantidad):
+def generar_usuarios_masivos(db, cantidad):
     """Genera usuarios aleatorios de forma masiva"""
-    nombres = [
-        'Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Laura', 'Pedro', 'Sofía', 
-        'José', 'Elena', 'Miguel', 'Isabel', 'David', 'Carmen', 'Javier', 'Rosa',
-        'Daniel', 'Patricia', 'Francisco', 'Lucía', 'Antonio', 'Teresa', 'Manuel', 'Eva',
-        'Jorge', 'Marta', 'Pablo', 'Cristina', 'Alberto', 'Silvia', 'Fernando', 'Raquel'
-    ]
-    
-    apellidos = [
-        'García', 'Rodríguez', 'González', 'Fernández', 'López', 'Martínez', 'Sánchez',
-        'Pérez', 'Gómez', 'Martín', 'Jiménez', 'Ruiz', 'Hernández', 'Díaz', 'Moreno',
-        'Álvarez', 'Romero', 'Alonso', 'Gutiérrez', 'Navarro', 'Torres', 'Domínguez',
-        'Vázquez', 'Ramos', 'Gil', 'Ramírez', 'Serrano', 'Blanco', 'Molina', 'Morales'
-    ]
-    
-    usuarios_generados = []
-    
-    for i in range(cantidad):
-        nombre = random.choice(nombres)
-        apellido = random.choice(apellidos)
-        edad = random.randint(18, 80)
-        
-        usuario_id = db.agregar_usuario(nombre, apellido, edad)
-        
-        if usuario_id:
-            usuarios_generados.append({
-                'id': usuario_id,
-                'nombre': nombre,
-                'apellido': apellido,
-                'edad': edad
-            })
+    usuarios_generados = usuarios_aleatorios(cantidad)
     
-    return usuarios_generados
+    # OPTIMIZACIÓN: Inserción multi-fila en una sola transacción
+    return usuarios_con_ids(usuarios_generados, db.agregar_usuarios_lote(usuarios_generados))
 
-def generar_correos_masivos(usuarios, tipos_seleccionados=None):
-    """Genera correos para todos los usuarios usando inserción por lotes, con tipos opcionales"""
+def generar_correos_masivos(db, usuarios, tipos_seleccionados=None, job=None, usuarios_por_lote=5000, acumular=True):
+    """Genera correos para todos los usuarios usando inserción por lotes, con tipos opcionales.
+
+    Con ``job`` se inserta un lote cada ``usuarios_por_lote`` usuarios, se
+    informa del progreso al trabajo y se atiende su cancelación entre lotes.
+    Devuelve las filas generadas (solo si ``acumular``) y su ResumenGeneracion.
+    """
     todos_los_correos = []
+    resumen = ResumenGeneracion()
+    tamano = usuarios_por_lote if job else max(len(usuarios), 1)
     
-    for usuario in usuarios:
-        correos_generados = generar_correos_usuario(usuario['nombre'], usuario['apellido'])
+    for inicio in range(0, len(usuarios), tamano):
+        if job:
+            job.comprobar_cancelacion()
         
+        lote = usuarios[inicio:inicio + tamano]
         # Filtrar por tipos seleccionados si se especifican
-        if tipos_seleccionados:
-            correos_filtrados = {tipo: correo for tipo, correo in correos_generados.items() if tipo in tipos_seleccionados}
-        else:
-            correos_filtrados = correos_generados
+        correos_lote = motor_correos.generar_lote(lote, tipos_seleccionados)
+        
+        insertados = 0
+        if correos_lote:
+            logger.debug("Insertando %s correos en lote...", len(correos_lote), extra={'muestreo': 20})
+            insertados = db.guardar_correos_lote(correos_lote)
+            resumen.registrar(correos_lote, insertados)
         
-        for tipo, correo in correos_filtrados.items():
-            todos_los_correos.append({
-                'usuario_id': usuario['id'],
-                'tipo': tipo,
-                'correo': correo
-            })
+        if acumular:
+            todos_los_correos.extend(correos_lote)
+        if job:
+            job.avanzar(len(lote), insertados)
     
-    # Insertar en un solo lote masivo
-    if todos_los_correos:
-        print(f"💾 Insertando {len(todos_los_correos)} correos en lote único...")
-        db.guardar_correos_lote(todos_los_correos)
+    return todos_los_correos, resumen
+
+def generar_correos_incrementales(db, tipos_seleccionados=None, job=None, ids_por_lote=5000, acumular=True):
+    """Genera solo los correos que faltan, recorriendo los usuarios por rangos de id.
+
+    La base de datos calcula con un anti-join qué pares (usuario, tipo) no
+    tienen correo todavía, así una re-ejecución solo toca usuarios nuevos.
+    Con ``job`` el progreso se mide en ids recorridos.
+    """
+    id_minimo, id_maximo = db.obtener_rango_ids('usuarios')
+    if id_minimo is None:
+        return [], ResumenGeneracion()
     
-    return todos_los_correos
+    if job:
+        job.fijar_total(id_maximo - id_minimo + 1)
+    
+    return generar_rango(
+        db, motor_correos, id_minimo, id_maximo, tipos_seleccionados,
+        incremental=True, job=job, ids_por_lote=ids_por_lote, acumular=acumular
+    )
+
+def ejecutar_generacion_correos(job, db, tipos_seleccionados=None, incremental=False, procesos=None):
+    """Trabajo en segundo plano lanzado por /generar-correos; devuelve el resumen"""
+    inicio = time.perf_counter()
+    if procesos:
+        resumen = generar_en_paralelo(db, tipos_seleccionados, incremental, procesos, job=job)
+    elif incremental:
+        _, resumen = generar_correos_incrementales(db, tipos_seleccionados, job=job, acumular=False)
+        resumen = resumen.to_dict()
+    else:
+        usuarios = db.obtener_usuarios()
+        job.fijar_total(len(usuarios))
+        _, resumen = generar_correos_masivos(db, usuarios, tipos_seleccionados, job=job, acumular=False)
+        resumen = resumen.to_dict()
+    registrar_generacion(modo_generacion(incremental, procesos), resumen['total_correos'], time.perf_counter() - inicio)
+    return resumen
+
+def ejecutar_borrado(job, db, tabla, ids_por_lote=None, truncar=False, pausa=0.0):
+    """Trabajo en segundo plano de DELETE /usuarios/todos y /correos/todos"""
+    return eliminar_por_lotes(db, tabla, job=job, ids_por_lote=ids_por_lote, truncar=truncar, pausa=pausa)
 
 def generar_correos_usuario(nombre, apellido):
     """Genera diferentes formatos de correo para un usuario"""
     try:
-        # Normalizar nombres
-        regex_limpiar = re.compile(r'[^a-zA-Z]')
-        nombre_limpio = regex_limpiar.sub('', nombre).lower()
-        apellido_limpio = regex_limpiar.sub('', apellido).lower()
-        
-        # Pre-calcular valores
-        inicial_nombre = nombre_limpio[0] if nombre_limpio else 'a'
-        inicial_apellido = apellido_limpio[0] if apellido_limpio else 'b'
-        
-        # Generar diferentes formatos de correo
-        correos = {
-            'gmail': f"{nombre_limpio}.{apellido_limpio}@gmail.com",
-            'outlook': f"{nombre_limpio}_{apellido_limpio}@outlook.com",
-            'hotmail': f"{inicial_nombre}{apellido_limpio}@hotmail.com",
-            'yahoo': f"{nombre_limpio}-{apellido_limpio}@yahoo.com",
-            'empresa': f"{inicial_nombre}.{apellido_limpio}@empresa.com",
-            'custom1': f"{nombre_limpio}{apellido_limpio}@custom.com",
-            'custom2': f"{apellido_limpio}.{nombre_limpio}@company.com",
-            'custom3': f"{inicial_nombre}{inicial_apellido}@corporate.com"
-        }
-        
-        return correos
+        return motor_correos.generar(nombre, apellido)
     except Exception as e:
-        print(f"Error generando correos usuario: {str(e)}")
+        logger.error("Error generando correos usuario: %s", str(e))
         return {}
 
+# Aplicación por defecto para `flask --app app run`, `from app import app` y
+# los tests. Se crea en el primer acceso: importar el módulo (como hace
+# servidor.py en cada worker) no abre pools ni arranca la cola de trabajos.
+_app_por_defecto = None
+_app_lock = threading.Lock()
+
+def __getattr__(nombre):
+    global _app_por_defecto
+    if nombre != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    with _app_lock:
+        if _app_por_defecto is None:
+            _app_por_defecto = create_app()
+    return _app_por_defecto
+
 if __name__ == '__main__':
+    app = create_app()
+    
     # Crear tablas si no existen
     try:
         print("Verificando/Creando tablas en la base de datos...")
-        db.crear_tablas()
+        app.extensions['crm'].db.crear_tablas()
         print("Tablas verificadas/creadas correctamente")
     except Exception as e:
         print(f"Error creando tablas: {e}")
@@ -329,6 +667,7 @@ if __name__ == '__main__':
     print("="*60)
     print("Para que otros se conecten:")
     print(f" Usen en sus navegadores: http://{local_ip}:{port}")
+    print(" Servidor de desarrollo: en producción use python servidor.py")
     print("="*60 + "\n")
     
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
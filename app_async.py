@@ -0,0 +1,367 @@
+"""API del CRM sobre asyncio (Quart), alternativa a app.py con las mismas rutas.
+
+Cada petición es una corrutina y las consultas de la API van por
+DatabaseAsync, así unos pocos procesos multiplexan miles de peticiones
+concurrentes de listado y alta en lugar de ocupar un hilo por consulta
+lenta. La configuración (configuracion_entorno), los servicios (ServiciosCRM)
+y los cuerpos de las rutas de generación, borrado masivo y trabajos son los
+de app.py: esas rutas ejecutan la misma función en un hilo aparte, porque
+son lotes de CPU y E/S que no ganan nada con el bucle de eventos.
+
+Ejecución: ``python app_async.py`` o, en producción,
+``hypercorn app_async:app --workers N``.
+"""
+import asyncio
+import os
+import threading
+import time
+
+try:
+    from quart import Blueprint, Quart, Response, current_app, g, jsonify, render_template, request, send_from_directory
+except ImportError as e:
+    raise ImportError("app_async necesita Quart: pip install quart") from e
+
+from app import (
+    ServiciosCRM, atender_cancelar_job, atender_eliminar_usuarios, atender_encolar_borrado,
+    atender_generar_correos, atender_generar_usuarios, atender_obtener_job, configuracion_entorno
+)
+from bitacora import configurar_logging, obtener_logger
+from database_async import DatabaseAsync
+from metricas import REGISTRO, recolector_pool, registrar_peticion
+from peticiones import (
+    ExportacionPorTrozos, etag_peticion, filas_a_consultar, fijar_etag, leer_filtros_correos,
+    leer_filtros_usuarios, leer_listado, leer_tipos_correo, leer_usuario_nuevo, modo_exportacion,
+    respuesta_listado, respuesta_usuario_agregado
+)
+from serializacion import ProveedorJSON
+
+logger = obtener_logger('app_async')
+
+class ServiciosAsync(ServiciosCRM):
+    """Servicios de app.py más una DatabaseAsync para las consultas de la API.
+
+    La Database síncrona (con el pool configurado) atiende las generaciones,
+    los borrados masivos y los trabajos; las dos comparten versiones y caché
+    de lecturas, así lo que escribe una invalida lo que ha leído la otra.
+    """
+
+    def __init__(self, config):
+        if config['CRM_BACKEND'] != 'mysql':
+            raise ValueError(f"app_async solo admite el backend mysql (configurado: {config['CRM_BACKEND']})")
+        super().__init__(config)
+        self.db_async = DatabaseAsync(
+            pool_size=config['CRM_POOL_SIZE'],
+            max_overflow=config['CRM_POOL_OVERFLOW'],
+            pool_timeout=config['CRM_POOL_TIMEOUT'],
+            ttl_estadisticas=config['CRM_STATS_TTL'],
+            ttl_estado_tablas=config['CRM_ESTADO_TTL'],
+            cache_tamano=config['CRM_CACHE_TAMANO'],
+            cache_ttl=config['CRM_CACHE_TTL'],
+            umbral_consulta_lenta=config['CRM_UMBRAL_LENTA'],
+            capacidad_consultas_lentas=config['CRM_CONSULTAS_LENTAS']
+        )
+        self.db_async.compartir_lecturas(self.db)
+
+def servicios():
+    """Servicios de la aplicación que atiende la petición"""
+    return current_app.extensions['crm']
+
+rutas = Blueprint('crm', __name__)
+
+def create_app(config=None):
+    """Crea la aplicación Quart con la configuración de app.create_app (claves CRM_*)"""
+    config = {**configuracion_entorno(), **(config or {})}
+
+    configurar_logging(nivel=config['CRM_LOG_NIVEL'], formato=config['CRM_LOG_FORMATO'])
+    app = Quart(__name__)
+    app.config.update(config)
+    app.extensions['crm'] = ServiciosAsync(config)
+    app.json = ProveedorJSON(app)
+    app.register_blueprint(rutas)
+    return app
+
+# Ruta principal - SERVIR INDEX.HTML
+@rutas.route('/')
+async def index():
+    return await render_template('index.html')
+
+@rutas.route('/static/<path:filename>')
+async def serve_static(filename):
+    return await send_from_directory('static', filename)
+
+@rutas.route('/static/css/<path:filename>')
+async def serve_css(filename):
+    return await send_from_directory('static/css', filename)
+
+@rutas.route('/static/js/<path:filename>')
+async def serve_js(filename):
+    return await send_from_directory('static/js', filename)
+
+async def respuesta_con_etag(tablas, construir):
+    """GET condicional con ETag (ver app.respuesta_con_etag); ``construir`` es una corrutina"""
+    estado = await servicios().db_async.obtener_estado_tablas(*tablas)
+    if estado is None:
+        return await construir(None)
+
+    etag, coincidente = etag_peticion(request, estado)
+    if coincidente:
+        return fijar_etag(Response(status=304), coincidente)
+    respuesta = await current_app.make_response(await construir(estado))
+    if respuesta.status_code != 200:
+        return respuesta
+    return fijar_etag(respuesta, etag)
+
+async def en_hilo(atender, *args):
+    """Ejecuta en un hilo un cuerpo de ruta compartido con app.py y responde con su resultado"""
+    respuesta, estado = await asyncio.to_thread(atender, *args)
+    return jsonify(respuesta), estado
+
+# API Routes
+@rutas.route('/usuarios', methods=['GET'])
+async def obtener_usuarios():
+    try:
+        db = servicios().db_async
+        try:
+            filtros, columnar, limite, despues_de = leer_listado(request.args, leer_filtros_usuarios)
+        except ValueError as e:
+            return jsonify({'error': f'Filtro no válido: {str(e)}'}), 400
+
+        async def construir(huella):
+            usuarios = await db.obtener_usuarios(filas_a_consultar(limite), despues_de, filtros, huella)
+            return jsonify(respuesta_listado('usuarios', usuarios, limite, columnar))
+
+        return await respuesta_con_etag(('usuarios',), construir)
+    except Exception as e:
+        error_msg = f"Error obteniendo usuarios: {str(e)}"
+        logger.exception(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+@rutas.route('/usuarios', methods=['POST'])
+async def agregar_usuario():
+    try:
+        db = servicios().db_async
+        if not request.is_json:
+            return jsonify({'error': 'Content-Type must be application/json'}), 400
+
+        try:
+            nombre, apellido, edad = leer_usuario_nuevo(await request.get_json())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        usuario_id = await db.agregar_usuario(nombre, apellido, edad)
+        if usuario_id:
+            return jsonify(respuesta_usuario_agregado(usuario_id, nombre, apellido, edad))
+        return jsonify({'error': 'Error al agregar usuario a la base de datos'}), 500
+    except Exception as e:
+        error_msg = f"Error agregando usuario: {str(e)}"
+        logger.exception(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+@rutas.route('/usuarios/aleatorios', methods=['POST'])
+async def generar_usuarios_aleatorios():
+    if not request.is_json:
+        return jsonify({'error': 'Content-Type must be application/json'}), 400
+    return await en_hilo(atender_generar_usuarios, servicios().db, request.args,
+                         await request.get_json(silent=True))
+
+@rutas.route('/usuarios/<int:usuario_id>', methods=['DELETE'])
+async def eliminar_usuario(usuario_id):
+    try:
+        logger.info("Eliminando usuario con ID: %s", usuario_id)
+        await servicios().db_async.eliminar_usuario(usuario_id)
+        return jsonify({'mensaje': 'Usuario eliminado correctamente'})
+    except Exception as e:
+        error_msg = f"Error eliminando usuario: {str(e)}"
+        logger.exception(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+@rutas.route('/usuarios', methods=['DELETE'])
+@rutas.route('/usuarios/eliminar', methods=['POST'])
+async def eliminar_usuarios():
+    """Borra varios usuarios en una petición: {"ids": [...]} o {"desde": a, "hasta": b}"""
+    return await en_hilo(atender_eliminar_usuarios, servicios().db, await request.get_json(silent=True))
+
+@rutas.route('/usuarios/<int:usuario_id>/correos', methods=['GET'])
+async def obtener_correos_usuario(usuario_id):
+    try:
+        db = servicios().db_async
+        try:
+            tipos = leer_tipos_correo(request.args)
+        except ValueError as e:
+            return jsonify({'error': f'Filtro no válido: {str(e)}'}), 400
+
+        async def construir(huella):
+            correos = await db.obtener_correos_usuario(usuario_id, tipos)
+            if correos is None:
+                return jsonify({'error': 'Usuario no encontrado'}), 404
+            return jsonify(correos)
+
+        return await respuesta_con_etag(('usuarios', 'correos'), construir)
+    except Exception as e:
+        error_msg = f"Error obteniendo correos del usuario: {str(e)}"
+        logger.exception(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+@rutas.route('/usuarios/todos', methods=['DELETE'])
+async def eliminar_todos_usuarios():
+    return encolar_borrado('usuarios', 'Borrado de todos los usuarios encolado')
+
+@rutas.route('/generar-correos', methods=['POST'])
+async def generar_correos():
+    # Sin async se espera al resultado, pero en un hilo: el bucle sigue libre
+    crm = servicios()
+    data = await request.get_json(silent=True) if request.is_json else None
+    return await en_hilo(atender_generar_correos, crm.db, crm.jobs, request.args, data,
+                         current_app.config['CRM_GEN_PROCESOS'])
+
+async def exportar_correos_stream(db, exportacion, filtros=None):
+    """Genera la exportación de correos por trozos, un trozo por lote leído de la BD"""
+    async for filas in db.iterar_correos(filtros=filtros):
+        yield exportacion.trozo(filas)
+    cierre = exportacion.cierre()
+    if cierre:
+        yield cierre
+
+@rutas.route('/correos', methods=['GET'])
+async def obtener_correos():
+    try:
+        db = servicios().db_async
+        try:
+            filtros, columnar, limite, despues_de = leer_listado(request.args, leer_filtros_correos)
+        except ValueError as e:
+            return jsonify({'error': f'Filtro no válido: {str(e)}'}), 400
+
+        modo = modo_exportacion(request.args, request.accept_mimetypes.best)
+        if modo:
+            exportacion = ExportacionPorTrozos(modo)
+            return Response(exportar_correos_stream(db, exportacion, filtros), mimetype=exportacion.mimetype)
+
+        async def construir(huella):
+            correos = await db.obtener_correos(filas_a_consultar(limite), despues_de, filtros, huella)
+            return jsonify(respuesta_listado('correos', correos, limite, columnar))
+
+        return await respuesta_con_etag(('usuarios', 'correos'), construir)
+    except Exception as e:
+        error_msg = f"Error obteniendo correos: {str(e)}"
+        logger.exception(error_msg)
+        return jsonify({'error': error_msg}), 500
+
+@rutas.route('/correos/todos', methods=['DELETE'])
+async def eliminar_todos_correos():
+    return encolar_borrado('correos', 'Borrado de todos los correos encolado')
+
+def encolar_borrado(tabla, mensaje):
+    crm = servicios()
+    respuesta, estado = atender_encolar_borrado(
+        crm.db, crm.jobs, tabla, mensaje, request.args, current_app.config['CRM_BORRADO_PAUSA']
+    )
+    return jsonify(respuesta), estado
+
+@rutas.route('/jobs', methods=['GET'])
+async def listar_jobs():
+    return jsonify([job.to_dict() for job in servicios().jobs.listar()])
+
+@rutas.route('/jobs/<job_id>', methods=['GET'])
+async def obtener_job(job_id):
+    respuesta, estado = atender_obtener_job(servicios().jobs, job_id)
+    return jsonify(respuesta), estado
+
+@rutas.route('/jobs/<job_id>', methods=['DELETE'])
+async def cancelar_job(job_id):
+    respuesta, estado = atender_cancelar_job(servicios().jobs, job_id)
+    return jsonify(respuesta), estado
+
+@rutas.route('/stats', methods=['GET'])
+async def obtener_estadisticas():
+    estadisticas = await servicios().db_async.obtener_estadisticas()
+    if estadisticas is None:
+        return jsonify({'error': 'No se pudieron calcular las estadísticas'}), 500
+    return jsonify(estadisticas)
+
+@rutas.route('/pool/estadisticas', methods=['GET'])
+async def estadisticas_pool():
+    return jsonify(servicios().db_async.estadisticas_pool())
+
+@rutas.route('/metrics', methods=['GET'])
+async def metrics():
+    crm = servicios()
+    # Los dos pools de la aplicación: el asíncrono de la API y el de la capa síncrona
+    recolector_pool(crm.db_async.estadisticas_pool)()
+    recolector_pool(crm.db.estadisticas_pool)()
+    return Response(REGISTRO.exponer(), mimetype='text/plain; version=0.0.4')
+
+@rutas.route('/cache/estadisticas', methods=['GET'])
+async def estadisticas_cache():
+    return jsonify(servicios().db_async.estadisticas_cache())
+
+@rutas.route('/admin/consultas-lentas', methods=['GET'])
+async def listar_consultas_lentas():
+    registro = servicios().db_async.consultas_lentas
+    return jsonify({**registro.estadisticas(), 'consultas': registro.listar()})
+
+@rutas.route('/admin/consultas-lentas', methods=['DELETE'])
+async def limpiar_consultas_lentas():
+    servicios().db_async.consultas_lentas.limpiar()
+    return jsonify({'mensaje': 'Registro de consultas lentas vaciado'})
+
+@rutas.before_app_request
+async def iniciar_medicion():
+    g.inicio_peticion = time.perf_counter()
+
+# Mismo orden que en app.py: los after_request se ejecutan en orden inverso
+@rutas.after_app_request
+async def registrar_metricas(respuesta):
+    inicio = g.pop('inicio_peticion', None)
+    if inicio is not None:
+        ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+        registrar_peticion(request.method, ruta, respuesta.status_code, time.perf_counter() - inicio)
+    return respuesta
+
+@rutas.after_app_request
+async def comprimir_respuesta(respuesta):
+    compresor = servicios().compresor
+    codificacion = compresor.negociar(request, respuesta)
+    if codificacion:
+        # Comprimir es CPU: fuera del bucle para no frenar al resto de peticiones
+        datos = await respuesta.get_data()
+        await asyncio.to_thread(compresor.aplicar, respuesta, datos, codificacion)
+    return respuesta
+
+@rutas.after_app_request
+async def cabeceras_cors(respuesta):
+    # Equivalente a CORS(app) de app.py: la API se consume desde cualquier origen
+    respuesta.headers.setdefault('Access-Control-Allow-Origin', '*')
+    if request.method == 'OPTIONS':
+        respuesta.headers['Access-Control-Allow-Headers'] = request.headers.get(
+            'Access-Control-Request-Headers', 'Content-Type')
+        respuesta.headers['Access-Control-Allow-Methods'] = 'GET, POST, DELETE, OPTIONS'
+    return respuesta
+
+@rutas.app_errorhandler(404)
+async def not_found(error):
+    return jsonify({'error': 'Endpoint no encontrado'}), 404
+
+@rutas.after_app_serving
+async def cerrar_servicios():
+    crm = servicios()
+    crm.cerrar(esperar=False)
+    await crm.db_async.cerrar()
+
+# Aplicación por defecto para hypercorn, `from app_async import app` y los
+# tests, creada en el primer acceso como la de app.py
+_app_por_defecto = None
+_app_lock = threading.Lock()
+
+def __getattr__(nombre):
+    global _app_por_defecto
+    if nombre != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    with _app_lock:
+        if _app_por_defecto is None:
+            _app_por_defecto = create_app()
+    return _app_por_defecto
+
+if __name__ == '__main__':
+    app = create_app()
+    app.extensions['crm'].db.crear_tablas()
+    app.run(host='0.0.0.0', port=int(os.environ.get('CRM_PUERTO', 5000)))
@@ -0,0 +1,129 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+
+# Logger raíz de la aplicación: todos los módulos cuelgan de él
+NOMBRE_RAIZ = 'crm'
+
+# Atributos estándar de LogRecord; el resto llega por ``extra`` y se publica
+_ATRIBUTOS_RECORD = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_lock = threading.Lock()
+
+
+def obtener_logger(nombre):
+    """Logger de un módulo, hijo del logger raíz de la aplicación"""
+    return logging.getLogger(f'{NOMBRE_RAIZ}.{nombre}')
+
+
+class FormateadorJSON(logging.Formatter):
+    """Una línea JSON por mensaje, con los campos pasados en ``extra``"""
+
+    def format(self, record):
+        datos = {
+            'ts': round(record.created, 3),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+            'hilo': record.threadName
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_RECORD and not clave.startswith('_'):
+                datos[clave] = valor
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class FiltroMuestreo(logging.Filter):
+    """Deja pasar 1 de cada N mensajes de los eventos muy frecuentes.
+
+    Un mensaje se muestrea si se registra con ``extra={'muestreo': N}``; los
+    mensajes se agrupan por logger y plantilla (el texto antes de formatear).
+    El que pasa lleva en ``omitidos`` cuántos se descartaron desde el anterior.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        cada = getattr(record, 'muestreo', None)
+        if not cada or cada <= 1:
+            return True
+        clave = (record.name, record.msg)
+        with self._lock:
+            vistos = self._contadores.get(clave, 0)
+            self._contadores[clave] = vistos + 1
+        if vistos % cada:
+            return False
+        record.omitidos = cada - 1 if vistos else 0
+        return True
+
+
+class _QueueHandlerSinCopia(logging.handlers.QueueHandler):
+    """QueueHandler que conserva exc_info para que el formateador final lo use.
+
+    El QueueHandler estándar formatea el mensaje en el hilo que registra;
+    aquí solo se resuelven los argumentos y el formateo (JSON o texto) se hace
+    en el hilo del listener, fuera del camino de la petición.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configurar_logging(nivel='INFO', formato='texto', destino=None):
+    """Configura el logging de la aplicación con un handler no bloqueante.
+
+    Los mensajes se encolan y un hilo aparte los escribe en ``destino``
+    (stdout por defecto), así registrar nunca espera por la E/S. ``formato``
+    es 'json' (una línea JSON por mensaje) o 'texto'. Se puede llamar varias
+    veces: cada llamada sustituye la configuración anterior.
+    """
+    global _listener
+    with _lock:
+        if _listener:
+            _listener.stop()
+            _listener = None
+
+        salida = logging.StreamHandler(destino or sys.stdout)
+        if formato == 'json':
+            salida.setFormatter(FormateadorJSON())
+        else:
+            salida.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+        cola = queue.SimpleQueue()
+        entrada = _QueueHandlerSinCopia(cola)
+        entrada.addFilter(FiltroMuestreo())
+
+        raiz = logging.getLogger(NOMBRE_RAIZ)
+        for handler in list(raiz.handlers):
+            raiz.removeHandler(handler)
+        raiz.addHandler(entrada)
+        raiz.setLevel(nivel.upper() if isinstance(nivel, str) else nivel)
+        raiz.propagate = False
+
+        _listener = logging.handlers.QueueListener(cola, salida, respect_handler_level=True)
+        _listener.start()
+    return raiz
+
+
+def detener_logging():
+    """Vacía la cola y para el hilo escritor"""
+    global _listener
+    with _lock:
+        if _listener:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(detener_logging)
@@ -0,0 +1,101 @@
+import time
+
+from bitacora import obtener_logger
+
+logger = obtener_logger('borrado')
+
+# Ids por transacción: borrar usuarios arrastra en cascada sus correos
+IDS_POR_LOTE = {'usuarios': 1000, 'correos': 5000}
+
+
+def eliminar_rango_por_lotes(db, tabla, desde_id, hasta_id, job=None, ids_por_lote=None, pausa=0.0):
+    """Borra las filas con id en [desde_id, hasta_id] con un commit por lote.
+
+    Cada lote empieza en el siguiente id que existe (un seek sobre la clave
+    primaria), así los huecos del espacio de ids no cuestan transacciones
+    vacías. El progreso del trabajo se cuenta en filas borradas. Devuelve
+    (filas eliminadas, lotes); RuntimeError si algún lote falla.
+    """
+    if tabla not in IDS_POR_LOTE:
+        raise ValueError(f"Tabla no permitida: {tabla}")
+    ids_por_lote = ids_por_lote or IDS_POR_LOTE[tabla]
+    filas = lotes = 0
+    desde = desde_id
+    while desde <= hasta_id:
+        if job:
+            job.comprobar_cancelacion()
+        desde, _ = db.obtener_rango_ids(tabla, desde)
+        if desde is None or desde > hasta_id:
+            break
+        hasta = min(desde + ids_por_lote - 1, hasta_id)
+        eliminadas = db.eliminar_rango(tabla, desde, hasta)
+        if eliminadas is None:
+            raise RuntimeError(f"Error eliminando {tabla} {desde}-{hasta}")
+        filas += eliminadas
+        lotes += 1
+        if job:
+            job.avanzar(eliminadas, eliminadas)
+        if pausa:
+            time.sleep(pausa)
+        desde = hasta + 1
+    return filas, lotes
+
+
+def eliminar_rango_acotado(db, tabla, desde_id, hasta_id, maximo_ids):
+    """Borra [desde_id, hasta_id] recortado a los ids que existen en la tabla.
+
+    Un rango como 1..10**12 se reduce así a las filas reales; si aun recortado
+    abarca más de ``maximo_ids`` ids se rechaza con ValueError (los vaciados
+    completos van por los trabajos en segundo plano). Devuelve las filas
+    eliminadas.
+    """
+    id_minimo, id_maximo = db.obtener_rango_ids(tabla)
+    if id_minimo is None:
+        return 0
+    desde_id, hasta_id = max(desde_id, id_minimo), min(hasta_id, id_maximo)
+    if desde_id > hasta_id:
+        return 0
+    if hasta_id - desde_id + 1 > maximo_ids:
+        raise ValueError(f"Como máximo {maximo_ids} ids por petición (el rango abarca {desde_id}-{hasta_id})")
+    filas, _ = eliminar_rango_por_lotes(db, tabla, desde_id, hasta_id)
+    return filas
+
+
+def eliminar_por_lotes(db, tabla, job=None, ids_por_lote=None, truncar=False, pausa=0.0):
+    """OPTIMIZACIÓN: Vacía una tabla en transacciones cortas por rangos de id.
+
+    En lugar de un único DELETE que bloquea la tabla y llena el undo log, se
+    borra el rango de ids existente al empezar en lotes de ``ids_por_lote``
+    con un commit por lote; entre lotes las lecturas siguen atendiéndose y
+    se pueden intercalar ``pausa`` segundos. Las filas insertadas después de
+    empezar no se borran. Con ``truncar`` y la tabla correos se intenta antes
+    vaciarla con TRUNCATE y solo se borra por lotes si no se puede (usuarios
+    siempre se borra por lotes, con sus correos en cascada). Devuelve un
+    resumen del borrado.
+    """
+    if tabla not in IDS_POR_LOTE:
+        raise ValueError(f"Tabla no permitida: {tabla}")
+    inicio = time.perf_counter()
+    resumen = {'tabla': tabla, 'filas_eliminadas': 0, 'lotes': 0, 'truncada': False}
+
+    if truncar and tabla == 'correos':
+        # Filas contadas justo antes del TRUNCATE, que no las informa
+        truncadas = db.truncar_correos()
+        if truncadas is not None:
+            resumen['truncada'] = True
+            resumen['filas_eliminadas'] = truncadas
+    if not resumen['truncada']:
+        id_minimo, id_maximo = db.obtener_rango_ids(tabla)
+        if id_minimo is not None:
+            if job:
+                # Progreso en filas: COUNT(*) de la huella de la tabla
+                estado = db.obtener_estado_tablas(tabla)
+                job.fijar_total(estado[0][1] if estado else 0)
+            resumen['filas_eliminadas'], resumen['lotes'] = eliminar_rango_por_lotes(
+                db, tabla, id_minimo, id_maximo, job=job, ids_por_lote=ids_por_lote, pausa=pausa
+            )
+
+    resumen['tiempo'] = round(time.perf_counter() - inicio, 3)
+    logger.info("Borrado de %s: %s filas en %s lotes (truncada: %s) en %.2fs", tabla,
+                resumen['filas_eliminadas'], resumen['lotes'], resumen['truncada'], resumen['tiempo'])
+    return resumen
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLecturas:
+    """Caché LRU acotada por tamaño y TTL para resultados de consultas.
+
+    Cada entrada guarda las versiones de las tablas de las que se leyó; al
+    consultarla con versiones distintas se descarta, así una escritura
+    invalida todas las lecturas de su tabla sin recorrer la caché.
+    """
+
+    def __init__(self, tamano_maximo=256, ttl=30.0):
+        self.tamano_maximo = tamano_maximo
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidadas = 0
+        self.expiradas = 0
+        self.desalojadas = 0
+
+    def obtener(self, clave, versiones):
+        """Devuelve (True, valor) si hay una entrada vigente, si no (False, None)"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return False, None
+
+            versiones_entrada, expira, valor = entrada
+            if versiones_entrada != versiones:
+                del self._entradas[clave]
+                self.invalidadas += 1
+                self.fallos += 1
+                return False, None
+            if expira <= time.monotonic():
+                del self._entradas[clave]
+                self.expiradas += 1
+                self.fallos += 1
+                return False, None
+
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return True, valor
+
+    def guardar(self, clave, versiones, valor, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.tamano_maximo <= 0:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            self._purgar_expiradas(ahora)
+            self._entradas[clave] = (versiones, ahora + ttl, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.tamano_maximo:
+                self._entradas.popitem(last=False)
+                self.desalojadas += 1
+
+    def _purgar_expiradas(self, ahora):
+        """Descarta las entradas caducadas aunque nadie vuelva a leerlas"""
+        caducadas = [clave for clave, (_, expira, _) in self._entradas.items() if expira <= ahora]
+        for clave in caducadas:
+            del self._entradas[clave]
+        self.expiradas += len(caducadas)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'tamano': len(self._entradas),
+                'tamano_maximo': self.tamano_maximo,
+                'ttl': self.ttl,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0.0,
+                'invalidadas': self.invalidadas,
+                'expiradas': self.expiradas,
+                'desalojadas': self.desalojadas
+            }
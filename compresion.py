@@ -0,0 +1,83 @@
+import gzip
+
+# brotli es opcional: sin él solo se negocia gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TIPOS_COMPRIMIBLES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/'
+)
+
+
+def codificaciones_disponibles():
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def elegir_codificacion(accept_encoding):
+    """Codificación preferida por el cliente entre las disponibles (br antes que gzip)"""
+    mejor = None
+    mejor_calidad = 0
+    for codificacion in codificaciones_disponibles():
+        calidad = accept_encoding.quality(codificacion)
+        if calidad > mejor_calidad:
+            mejor, mejor_calidad = codificacion, calidad
+    return mejor
+
+
+def comprimir(datos, codificacion, nivel_gzip=6, calidad_brotli=4):
+    if codificacion == 'br':
+        return brotli.compress(datos, quality=calidad_brotli)
+    return gzip.compress(datos, compresslevel=nivel_gzip, mtime=0)
+
+
+class Compresor:
+    """OPTIMIZACIÓN: Comprime las respuestas grandes según Accept-Encoding.
+
+    Se registra como ``after_request``. Solo actúa sobre respuestas 200 ya
+    completas en memoria (no sobre streams ni ficheros estáticos), de tipo
+    comprimible y de al menos ``minimo`` bytes. El ETag de la respuesta se
+    marca con la codificación para que cada representación tenga el suyo.
+    """
+
+    def __init__(self, minimo=1024, nivel_gzip=6, calidad_brotli=4):
+        self.minimo = minimo
+        self.nivel_gzip = nivel_gzip
+        self.calidad_brotli = calidad_brotli
+
+    def __call__(self, request, respuesta):
+        if respuesta.direct_passthrough or respuesta.is_streamed:
+            return respuesta
+        codificacion = self.negociar(request, respuesta)
+        if codificacion:
+            self.aplicar(respuesta, respuesta.get_data(), codificacion)
+        return respuesta
+
+    def negociar(self, request, respuesta):
+        """Codificación con la que comprimir la respuesta, o None si no se comprime.
+
+        No lee el cuerpo: así la usa también app_async, donde leerlo es una
+        corrutina y los streams no tienen ``is_streamed``.
+        """
+        if respuesta.status_code != 200 or 'Content-Encoding' in respuesta.headers:
+            return None
+        if not (respuesta.mimetype or '').startswith(TIPOS_COMPRIMIBLES):
+            return None
+
+        respuesta.vary.add('Accept-Encoding')
+        codificacion = elegir_codificacion(request.accept_encodings)
+        if not codificacion or respuesta.content_length is None or respuesta.content_length < self.minimo:
+            return None
+        return codificacion
+
+    def aplicar(self, respuesta, datos, codificacion):
+        """Sustituye el cuerpo por ``datos`` comprimidos y marca el ETag con la codificación"""
+        respuesta.set_data(comprimir(datos, codificacion, self.nivel_gzip, self.calidad_brotli))
+        respuesta.headers['Content-Encoding'] = codificacion
+        etag, debil = respuesta.get_etag()
+        if etag:
+            respuesta.set_etag(f"{etag}-{codificacion}", weak=debil)
@@ -0,0 +1,268 @@
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from bitacora import obtener_logger
+from metricas import REGISTRO
+
+logger = obtener_logger('consultas_lentas')
+
+DB_SENTENCIAS = REGISTRO.histograma(
+    'crm_db_sentencia_duracion_segundos', 'Latencia de cada sentencia SQL', ('operacion',))
+
+# Solo estas sentencias admiten EXPLAIN con sentido (un INSERT ... VALUES no)
+_OPERACIONES_EXPLAIN = ('SELECT', 'UPDATE', 'DELETE')
+
+_REGEX_ESPACIOS = re.compile(r'\s+')
+_REGEX_VALORES = re.compile(r'(\((?:%s, )*%s\))(?:, \1)+')
+
+LONGITUD_MAXIMA_SQL = 1000
+
+
+def normalizar_sql(sql):
+    """SQL en una línea, con las filas de un INSERT multi-fila resumidas"""
+    sql = _REGEX_ESPACIOS.sub(' ', sql).strip()
+    sql = _REGEX_VALORES.sub(
+        lambda m: f"{m.group(1)} x{(len(m.group(0)) + 2) // (len(m.group(1)) + 2)}", sql
+    )
+    if len(sql) > LONGITUD_MAXIMA_SQL:
+        sql = sql[:LONGITUD_MAXIMA_SQL] + '...'
+    return sql
+
+
+def forma_parametros(params):
+    """Número y tipos de los parámetros, sin sus valores"""
+    params = params or ()
+    if isinstance(params, dict):
+        params = list(params.values())
+    return {
+        'cantidad': len(params),
+        'tipos': dict(Counter(type(p).__name__ for p in params))
+    }
+
+
+def operacion_sql(sql):
+    return sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ''
+
+
+class RegistroConsultasLentas:
+    """Guarda las últimas sentencias que superaron el umbral, con su plan.
+
+    ``umbral`` está en segundos; None desactiva el registro (las sentencias
+    se siguen midiendo para las métricas).
+    """
+
+    def __init__(self, umbral=0.5, capacidad=100):
+        self.umbral = umbral
+        self._entradas = deque(maxlen=capacidad)
+        self._lock = threading.Lock()
+        self.sentencias = 0
+        self.lentas = 0
+
+    def es_lenta(self, duracion):
+        return self.umbral is not None and duracion >= self.umbral
+
+    def contar(self, lenta):
+        with self._lock:
+            self.sentencias += 1
+            if lenta:
+                self.lentas += 1
+
+    def registrar(self, sql, params, duracion, filas, plan):
+        entrada = {
+            'ts': time.time(),
+            'operacion': operacion_sql(sql),
+            'sql': normalizar_sql(sql),
+            'parametros': forma_parametros(params),
+            'duracion': round(duracion, 4),
+            'filas': filas,
+            'plan': plan
+        }
+        with self._lock:
+            self._entradas.append(entrada)
+        logger.warning(
+            "Consulta lenta (%.3fs, %s filas): %s", duracion, filas, entrada['sql'],
+            extra={'consulta_lenta': entrada}
+        )
+        return entrada
+
+    def listar(self):
+        """Entradas de la más reciente a la más antigua"""
+        with self._lock:
+            return list(reversed(self._entradas))
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'umbral': self.umbral,
+                'capacidad': self._entradas.maxlen,
+                'sentencias': self.sentencias,
+                'lentas': self.lentas,
+                'guardadas': len(self._entradas)
+            }
+
+
+def _contabilizar(registro, pendiente):
+    """Publica la latencia de una sentencia terminada; devuelve su operación si fue lenta"""
+    sql, _, duracion = pendiente
+    operacion = operacion_sql(sql)
+    DB_SENTENCIAS.observe(duracion, operacion=operacion)
+    lenta = registro.es_lenta(duracion)
+    registro.contar(lenta)
+    return operacion if lenta else None
+
+
+class CursorMedido:
+    """OPTIMIZACIÓN: Cursor que mide cada sentencia y captura el EXPLAIN de las lentas.
+
+    En un SELECT el tiempo incluye la lectura de las filas, y la sentencia se
+    evalúa al cerrar el cursor o al ejecutar la siguiente: con cursores sin
+    buffer el EXPLAIN solo puede lanzarse por la misma conexión cuando ya se
+    han leído todas las filas. El resto de atributos se delegan en el cursor.
+    """
+
+    def __init__(self, cursor, connection, registro):
+        self._cursor = cursor
+        self._connection = connection
+        self._registro = registro
+        self._pendiente = None
+
+    def execute(self, sql, params=None, **kwargs):
+        self._finalizar()
+        inicio = time.perf_counter()
+        try:
+            if params is None:
+                return self._cursor.execute(sql, **kwargs)
+            return self._cursor.execute(sql, params, **kwargs)
+        finally:
+            self._pendiente = [sql, params, time.perf_counter() - inicio]
+            if not self._cursor.with_rows:
+                # Sin filas que leer (INSERT, DELETE...): se evalúa ya
+                self._finalizar()
+
+    def _medir_lectura(self, metodo, *args):
+        inicio = time.perf_counter()
+        try:
+            return metodo(*args)
+        finally:
+            if self._pendiente:
+                self._pendiente[2] += time.perf_counter() - inicio
+
+    def fetchone(self):
+        return self._medir_lectura(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._medir_lectura(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._medir_lectura(self._cursor.fetchall)
+
+    def close(self):
+        self._finalizar()
+        return self._cursor.close()
+
+    def _finalizar(self):
+        if not self._pendiente:
+            return
+        sql, params, duracion = pendiente = self._pendiente
+        self._pendiente = None
+        operacion = _contabilizar(self._registro, pendiente)
+        if operacion:
+            self._registro.registrar(sql, params, duracion, self._cursor.rowcount, self._explicar(sql, params, operacion))
+
+    def _explicar(self, sql, params, operacion):
+        if operacion not in _OPERACIONES_EXPLAIN:
+            return None
+        cursor = None
+        try:
+            cursor = self._connection.cursor(dictionary=True, buffered=True)
+            cursor.execute("EXPLAIN " + sql, params)
+            return cursor.fetchall()
+        except Exception as e:
+            logger.debug("No se pudo obtener el EXPLAIN: %s", e)
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class CursorMedidoAsync:
+    """Equivalente de CursorMedido para los cursores de mysql.connector.aio"""
+
+    def __init__(self, cursor, connection, registro):
+        self._cursor = cursor
+        self._connection = connection
+        self._registro = registro
+        self._pendiente = None
+
+    async def execute(self, sql, params=None, **kwargs):
+        await self._finalizar()
+        inicio = time.perf_counter()
+        try:
+            if params is None:
+                return await self._cursor.execute(sql, **kwargs)
+            return await self._cursor.execute(sql, params, **kwargs)
+        finally:
+            self._pendiente = [sql, params, time.perf_counter() - inicio]
+            if not self._cursor.with_rows:
+                await self._finalizar()
+
+    async def _medir_lectura(self, metodo, *args):
+        inicio = time.perf_counter()
+        try:
+            return await metodo(*args)
+        finally:
+            if self._pendiente:
+                self._pendiente[2] += time.perf_counter() - inicio
+
+    async def fetchone(self):
+        return await self._medir_lectura(self._cursor.fetchone)
+
+    async def fetchmany(self, *args):
+        return await self._medir_lectura(self._cursor.fetchmany, *args)
+
+    async def fetchall(self):
+        return await self._medir_lectura(self._cursor.fetchall)
+
+    async def close(self):
+        await self._finalizar()
+        return await self._cursor.close()
+
+    async def _finalizar(self):
+        if not self._pendiente:
+            return
+        sql, params, duracion = pendiente = self._pendiente
+        self._pendiente = None
+        operacion = _contabilizar(self._registro, pendiente)
+        if operacion:
+            plan = await self._explicar(sql, params, operacion)
+            self._registro.registrar(sql, params, duracion, self._cursor.rowcount, plan)
+
+    async def _explicar(self, sql, params, operacion):
+        if operacion not in _OPERACIONES_EXPLAIN:
+            return None
+        cursor = None
+        try:
+            cursor = await self._connection.cursor(dictionary=True, buffered=True)
+            await cursor.execute("EXPLAIN " + sql, params)
+            return await cursor.fetchall()
+        except Exception as e:
+            logger.debug("No se pudo obtener el EXPLAIN: %s", e)
+            return None
+        finally:
+            if cursor:
+                await cursor.close()
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
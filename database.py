@@ -1,35 +1,340 @@
 import mysql.connector
-from mysql.connector import Error
-import traceback
-
-class Database:
-    def __init__(self):
-        self.host = 'localhost'
-        self.database = 'usuarios_db'
-        self.user = 'root'
-        self.password = ''
-        
+from mysql.connector import Error, IntegrityError
+from contextlib import contextmanager
+import os
+import tempfile
+import threading
+
+from bitacora import obtener_logger
+from cache import CacheLecturas
+from consultas_lentas import CursorMedido, RegistroConsultasLentas
+from metricas import DB_FILAS, medir_db
+from pool import obtener_pool, PoolExhaustedError
+
+logger = obtener_logger('database')
+
+def _dividir_en_chunks(filas, max_filas, max_bytes):
+    """Agrupa filas de correos en chunks que no superan max_filas ni max_bytes"""
+    chunk = []
+    tamano = 0
+    for fila in filas:
+        # Estimación del tamaño de la fila dentro del INSERT: valores + separadores
+        tamano_fila = len(fila['correo']) + len(fila['tipo']) + 24
+        if chunk and (len(chunk) >= max_filas or tamano + tamano_fila > max_bytes):
+            yield chunk
+            chunk = []
+            tamano = 0
+        chunk.append(fila)
+        tamano += tamano_fila
+    if chunk:
+        yield chunk
+
+def _escapar_like(valor):
+    """Escapa los comodines de LIKE para buscar el valor literalmente"""
+    return valor.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _prefijo_like(valor):
+    """Patrón LIKE 'valor%' con los comodines del valor escapados"""
+    return _escapar_like(valor) + '%'
+
+def _filtros_usuarios(filtros, alias=''):
+    """Traduce los filtros de usuarios a condiciones SQL que usan los índices de la tabla"""
+    condiciones = []
+    params = []
+    if not filtros:
+        return condiciones, params
+    
+    # Prefijos: LIKE 'x%' se resuelve como rango sobre idx_nombre / idx_apellido
+    if filtros.get('nombre'):
+        condiciones.append(f"{alias}nombre LIKE %s")
+        params.append(_prefijo_like(filtros['nombre']))
+    if filtros.get('apellido'):
+        condiciones.append(f"{alias}apellido LIKE %s")
+        params.append(_prefijo_like(filtros['apellido']))
+    if filtros.get('q'):
+        condiciones.append(f"({alias}nombre LIKE %s OR {alias}apellido LIKE %s)")
+        params.extend([_prefijo_like(filtros['q'])] * 2)
+    # Rangos sobre idx_edad e idx_fecha_creacion
+    if filtros.get('edad_min') is not None:
+        condiciones.append(f"{alias}edad >= %s")
+        params.append(filtros['edad_min'])
+    if filtros.get('edad_max') is not None:
+        condiciones.append(f"{alias}edad <= %s")
+        params.append(filtros['edad_max'])
+    if filtros.get('creado_desde') is not None:
+        condiciones.append(f"{alias}fecha_creacion >= %s")
+        params.append(filtros['creado_desde'])
+    if filtros.get('creado_hasta') is not None:
+        condiciones.append(f"{alias}fecha_creacion < %s")
+        params.append(filtros['creado_hasta'])
+    return condiciones, params
+
+def _filtros_correos(filtros):
+    """Traduce los filtros de correos a condiciones SQL sobre la tabla correos (alias c)"""
+    condiciones = []
+    params = []
+    if not filtros:
+        return condiciones, params
+    
+    # usuario_id (+ tipo) se resuelve con idx_usuario_tipo; tipo solo, con idx_tipo
+    if filtros.get('usuario_id') is not None:
+        condiciones.append("c.usuario_id = %s")
+        params.append(filtros['usuario_id'])
+    if filtros.get('tipos') is not None:
+        if filtros['tipos']:
+            condiciones.append(f"c.tipo IN ({', '.join(['%s'] * len(filtros['tipos']))})")
+            params.extend(filtros['tipos'])
+        else:
+            condiciones.append("FALSE")
+    # Prefijo de la dirección: rango sobre idx_correo
+    if filtros.get('prefijo'):
+        condiciones.append("c.correo LIKE %s")
+        params.append(_prefijo_like(filtros['prefijo']))
+    # Un dominio que no corresponde a ningún tipo solo puede buscarse por sufijo
+    if filtros.get('dominio'):
+        condiciones.append("c.correo LIKE %s")
+        params.append('%@' + _escapar_like(filtros['dominio']))
+    return condiciones, params
+
+# Filas máximas de una lectura cacheada: una página de LIMITE_MAXIMO_PAGINA
+# más la fila con la que se detecta la siguiente. Las lecturas sin límite no se
+# cachean: su tamaño solo lo acota la tabla
+FILAS_MAXIMAS_CACHEABLES = 5001
+
+# Rangos de edad del panel (los mismos que el filtro de la interfaz)
+CONSULTA_RANGOS_EDAD = """
+    SELECT CASE
+        WHEN edad < 18 THEN '<18'
+        WHEN edad <= 25 THEN '18-25'
+        WHEN edad <= 35 THEN '26-35'
+        WHEN edad <= 50 THEN '36-50'
+        ELSE '51+'
+    END AS rango, COUNT(*) AS total
+    FROM usuarios
+    GROUP BY rango
+"""
+
+def _paginar(query, condiciones, params, columna_id, limite, despues_de):
+    """Añade el seek por id, el orden descendente y el LIMIT a una consulta de lista"""
+    if despues_de is not None:
+        condiciones.append(f"{columna_id} < %s")
+        params.append(despues_de)
+    if condiciones:
+        query += " WHERE " + " AND ".join(condiciones)
+    query += f" ORDER BY {columna_id} DESC"
+    if limite is not None:
+        query += " LIMIT %s"
+        params.append(limite)
+    return query, params
+
+def consulta_usuarios(limite=None, despues_de=None, filtros=None):
+    """SQL y parámetros del listado de usuarios (compartido con DatabaseAsync)"""
+    condiciones, params = _filtros_usuarios(filtros)
+    return _paginar("SELECT * FROM usuarios", condiciones, params, "id", limite, despues_de)
+
+def consulta_correos(limite=None, despues_de=None, filtros=None):
+    """SQL y parámetros del listado de correos con el nombre del usuario"""
+    condiciones, params = _filtros_correos(filtros)
+    return _paginar("""
+            SELECT c.*, u.nombre, u.apellido 
+            FROM correos c 
+            JOIN usuarios u ON c.usuario_id = u.id 
+        """, condiciones, params, "c.id", limite, despues_de)
+
+def consulta_estado_tablas(tablas):
+    """Una sola consulta con la huella (MAX(id), COUNT(*)) de cada tabla"""
+    return "SELECT " + ", ".join(
+        f"(SELECT MAX(id) FROM {tabla}), (SELECT COUNT(*) FROM {tabla})" for tabla in tablas
+    )
+
+def _escapar_tsv(valor):
+    return valor.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+class _LecturasVersionadas:
+    """Versiones por tabla, caché de lecturas y registro de consultas lentas.
+
+    Es la parte común de Database y DatabaseAsync: lo que no depende de si
+    las consultas se hacen con bloqueo o con asyncio.
+    """
+
+    # Otros procesos pueden abrir la misma base con parametros_conexion()
+    multiproceso = True
+
+    def _iniciar_lecturas(self, cache_tamano, cache_ttl, umbral_consulta_lenta, capacidad_consultas_lentas):
+        # Contador de escrituras por tabla: invalida lo cacheado a partir de ellas
+        self._versiones = {'usuarios': 0, 'correos': 0}
+        self._lock_versiones = threading.Lock()
+        self.cache = CacheLecturas(cache_tamano, cache_ttl)
+        self.consultas_lentas = RegistroConsultasLentas(umbral_consulta_lenta, capacidad_consultas_lentas)
+
+    def compartir_lecturas(self, otra):
+        """Usa las versiones y la caché de ``otra``: una escritura de cualquiera invalida las dos.
+
+        app_async lo usa para que DatabaseAsync vea lo que escribe la capa
+        síncrona (generaciones y borrados por lotes) de la misma aplicación.
+        """
+        self._versiones = otra._versiones
+        self._lock_versiones = otra._lock_versiones
+        self.cache = otra.cache
+
+    def marcar_escritura(self, *tablas):
+        """Incrementa la versión de las tablas modificadas.
+
+        Lo llaman todos los métodos que escriben; quien modifique las tablas
+        por otra vía (por ejemplo, otros procesos) debe llamarlo al terminar.
+        """
+        with self._lock_versiones:
+            for tabla in tablas:
+                self._versiones[tabla] += 1
+
+    def version_tablas(self, *tablas):
+        """Versiones actuales de las tablas dadas (todas si no se indica ninguna)"""
+        with self._lock_versiones:
+            return tuple(self._versiones[t] for t in (tablas or sorted(self._versiones)))
+
+    def _validar_tablas(self, tablas):
+        """Las tablas pedidas (todas si no se indica ninguna); ValueError si alguna no existe"""
+        tablas = tablas or tuple(sorted(self._versiones))
+        desconocidas = [t for t in tablas if t not in self._versiones]
+        if desconocidas:
+            raise ValueError(f"Tabla desconocida: {', '.join(desconocidas)}")
+        return tablas
+
+    def estadisticas_cache(self):
+        return self.cache.estadisticas()
+
+    def parametros_conexion(self):
+        """Datos para crear con crear_database una Database equivalente en otro proceso"""
+        return {
+            'backend': 'mysql',
+            'host': self.host,
+            'database': self.database,
+            'user': self.user,
+            'password': self.password
+        }
+
+class Database(_LecturasVersionadas):
+    # Segundos de inactividad tras los que el pool valida la conexión con ping
+    reciclar_conexiones = 300.0
+
+    def __init__(self, host='localhost', database='usuarios_db', user='root', password='',
+                 pool_name='crm_pool', pool_size=10, max_overflow=5, pool_timeout=30.0,
+                 lote_filas=5000, lote_bytes=1024 * 1024, chunks_por_commit=1,
+                 allow_local_infile=False, umbral_load_data=100000, ttl_estadisticas=5.0,
+                 cache_tamano=256, cache_ttl=30.0, ttl_estado_tablas=1.0,
+                 umbral_consulta_lenta=0.5, capacidad_consultas_lentas=100):
+        self.host = host
+        self.database = database
+        self.user = user
+        self.password = password
+        self.pool_name = pool_name
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.lote_filas = lote_filas
+        self.lote_bytes = lote_bytes
+        self.chunks_por_commit = chunks_por_commit
+        self.allow_local_infile = allow_local_infile
+        self.umbral_load_data = umbral_load_data
+        self.ttl_estadisticas = ttl_estadisticas
+        self.ttl_estado_tablas = ttl_estado_tablas
+        self._iniciar_lecturas(cache_tamano, cache_ttl, umbral_consulta_lenta, capacidad_consultas_lentas)
+
+    def _crear_conexion(self):
+        """Abre una conexión nueva a MySQL (solo la usa el pool)"""
+        return mysql.connector.connect(
+            host=self.host,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            autocommit=False,
+            allow_local_infile=self.allow_local_infile
+        )
+
+    @property
+    def pool(self):
+        """OPTIMIZACIÓN: Pool único por proceso, compartido entre instancias"""
+        return obtener_pool(
+            self.pool_name,
+            self._crear_conexion,
+            tamano=self.pool_size,
+            max_overflow=self.max_overflow,
+            timeout=self.pool_timeout,
+            reciclar=self.reciclar_conexiones
+        )
+
     def get_connection(self):
+        """Presta una conexión del pool; close() la devuelve al pool"""
         try:
-            connection = mysql.connector.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                autocommit=False,
-                pool_size=10,  # OPTIMIZACIÓN: Pool de conexiones
-                pool_reset_session=True
-            )
-            return connection
-        except Error as e:
-            print(f"Error conectando a MySQL: {e}")
+            return self.pool.checkout()
+        except (Error, PoolExhaustedError) as e:
+            logger.error("Error conectando a MySQL: %s", e)
             return None
-    
+
+    @contextmanager
+    def conexion(self):
+        """Context manager para tomar prestada una conexión del pool"""
+        connection = self.get_connection()
+        try:
+            yield connection
+        finally:
+            if connection:
+                connection.close()
+
+    def _cursor(self, connection, **opciones):
+        """Cursor que mide sus sentencias y registra las lentas con su EXPLAIN"""
+        return CursorMedido(connection.cursor(**opciones), connection, self.consultas_lentas)
+
+    def estadisticas_pool(self):
+        return self.pool.estadisticas()
+
+    def _consultar_cacheado(self, query, params, tablas, descripcion, huella=None, limite=None):
+        """OPTIMIZACIÓN: Ejecuta un SELECT pasando por la caché de lecturas.
+
+        La clave es la consulta con sus parámetros y la entrada queda ligada a
+        la versión de ``tablas``. Las versiones solo ven escrituras de este
+        proceso: ``huella`` (el estado de las tablas con el que se calcula un
+        ETag) se añade a ellas para que una escritura de otro proceso, que
+        cambia la huella, invalide también la entrada. Los errores no se
+        cachean, ni las lecturas sin ``limite`` o de más de
+        FILAS_MAXIMAS_CACHEABLES filas. Las listas devueltas se comparten entre
+        llamadas: no deben modificarse.
+        """
+        cacheable = limite is not None and limite <= FILAS_MAXIMAS_CACHEABLES
+        clave = (query, tuple(params))
+        versiones = self.version_tablas(*tablas) + (huella,)
+        if cacheable:
+            encontrado, filas = self.cache.obtener(clave, versiones)
+            if encontrado:
+                return filas
+        
+        connection = self.get_connection()
+        filas = []
+        if connection:
+            cursor = None
+            try:
+                cursor = self._cursor(connection, dictionary=True)
+                cursor.execute(query, params)
+                filas = cursor.fetchall()
+                # Versiones leídas antes de consultar: una escritura concurrente
+                # deja la entrada ya invalidada
+                if cacheable:
+                    self.cache.guardar(clave, versiones, filas)
+            except Error as e:
+                logger.error("Error obteniendo %s: %s", descripcion, e)
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+        return filas
+
+    @medir_db
     def crear_tablas(self):
         connection = self.get_connection()
         if connection:
+            cursor = None
             try:
-                cursor = connection.cursor()
+                cursor = self._cursor(connection)
                 
                 # Tabla de usuarios
                 cursor.execute("""
@@ -38,7 +343,11 @@ class Database:
                         nombre VARCHAR(50) NOT NULL,
                         apellido VARCHAR(50) NOT NULL,
                         edad INT NOT NULL,
-                        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        INDEX idx_nombre (nombre),
+                        INDEX idx_apellido (apellido),
+                        INDEX idx_edad (edad),
+                        INDEX idx_fecha_creacion (fecha_creacion)
                     ) ENGINE=InnoDB
                 """)
                 
@@ -51,71 +360,181 @@ class Database:
                         correo VARCHAR(100) NOT NULL,
                         fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
-                        INDEX idx_usuario_tipo (usuario_id, tipo)
+                        INDEX idx_tipo (tipo),
+                        INDEX idx_correo (correo),
+                        INDEX idx_usuario_tipo (usuario_id, tipo),
+                        UNIQUE KEY unique_correo_usuario (usuario_id, tipo)
                     ) ENGINE=InnoDB
                 """)
                 
                 connection.commit()
-                print("✅ Tablas creadas/verificadas correctamente")
+                logger.info("Tablas creadas/verificadas correctamente")
             except Error as e:
-                print(f"Error creando tablas: {e}")
+                logger.error("Error creando tablas: %s", e)
                 connection.rollback()
             finally:
                 if cursor:
                     cursor.close()
                 connection.close()
     
-    def guardar_correos_lote(self, correos):
-        """OPTIMIZACIÓN: Inserta múltiples correos en un solo lote"""
+    @medir_db(devuelve_cuenta=True)
+    def guardar_correos_lote(self, correos, filas_por_chunk=None, bytes_por_chunk=None,
+                             chunks_por_commit=None, usar_load_data=None):
+        """OPTIMIZACIÓN: Inserta correos en chunks acotados por filas y por bytes.
+
+        Cada chunk es un INSERT multi-fila que no supera ``bytes_por_chunk``
+        (muy por debajo de max_allowed_packet) y se hace commit cada
+        ``chunks_por_commit`` chunks para no acumular bloqueos. Si un grupo
+        falla solo ese grupo pasa al fallback fila a fila. Con
+        ``usar_load_data`` y cargas grandes se usa LOAD DATA LOCAL INFILE.
+        Devuelve el número de filas insertadas.
+        """
         if not correos:
-            return
+            return 0
+        
+        filas_por_chunk = filas_por_chunk or self.lote_filas
+        bytes_por_chunk = bytes_por_chunk or self.lote_bytes
+        chunks_por_commit = chunks_por_commit or self.chunks_por_commit
+        if usar_load_data is None:
+            usar_load_data = self.allow_local_infile and len(correos) >= self.umbral_load_data
+        
+        if usar_load_data:
+            cargados = self._cargar_correos_load_data(correos)
+            if cargados is not None:
+                return cargados
+            logger.warning("LOAD DATA no disponible, usando INSERT por chunks...")
         
         connection = self.get_connection()
+        insertados = 0
         if connection:
+            cursor = None
+            pendientes = []
             try:
-                cursor = connection.cursor()
-                
-                # Preparar la consulta de inserción múltiple
-                query = """
-                    INSERT INTO correos (usuario_id, tipo, correo) 
-                    VALUES (%s, %s, %s)
-                """
+                cursor = self._cursor(connection)
+                chunks_sin_commit = 0
                 
-                # Preparar los datos para inserción masiva
-                datos = [
-                    (correo['usuario_id'], correo['tipo'], correo['correo'])
-                    for correo in correos
-                ]
+                for chunk in _dividir_en_chunks(correos, filas_por_chunk, bytes_por_chunk):
+                    valores = []
+                    for correo in chunk:
+                        valores.extend((correo['usuario_id'], correo['tipo'], correo['correo']))
+                    
+                    # Filas sin commit si este chunk entra en la transacción
+                    grupo = pendientes + chunk
+                    try:
+                        cursor.execute(
+                            "INSERT INTO correos (usuario_id, tipo, correo) VALUES "
+                            + ", ".join(["(%s, %s, %s)"] * len(chunk)),
+                            valores
+                        )
+                        pendientes = grupo
+                        chunks_sin_commit += 1
+                        if chunks_sin_commit >= chunks_por_commit:
+                            connection.commit()
+                            insertados += len(pendientes)
+                            pendientes = []
+                            chunks_sin_commit = 0
+                    except Error as e:
+                        logger.error("Error en inserción masiva de correos: %s", e)
+                        connection.rollback()
+                        # Fallback: insertar uno por uno solo el grupo que falló
+                        insertados += self._guardar_correos_individualmente(connection, cursor, grupo)
+                        pendientes = []
+                        chunks_sin_commit = 0
                 
-                # Ejecutar inserción masiva
-                cursor.executemany(query, datos)
-                connection.commit()
+                if pendientes:
+                    connection.commit()
+                    insertados += len(pendientes)
+                    pendientes = []
                 
-                print(f"✅ Insertados {len(correos)} correos en lote")
+                # Uno por lote durante las generaciones masivas: se muestrea
+                logger.info("Insertados %s correos en lote", insertados, extra={'muestreo': 20})
                 
             except Error as e:
-                print(f"Error en inserción masiva de correos: {e}")
+                logger.error("Error en inserción masiva de correos: %s", e)
                 connection.rollback()
-                # Fallback: insertar uno por uno si falla la inserción masiva
-                self._guardar_correos_individualmente(correos)
+                try:
+                    insertados += self._guardar_correos_individualmente(connection, cursor, pendientes)
+                except Error as e:
+                    logger.error("Error en inserción individual de correos: %s", e)
+                    connection.rollback()
             finally:
                 if cursor:
                     cursor.close()
                 connection.close()
+                self.marcar_escritura('correos')
+        return insertados
     
-    def _guardar_correos_individualmente(self, correos):
-        """Fallback: Inserta correos uno por uno"""
-        print("🔄 Usando inserción individual como fallback...")
+    def _cargar_correos_load_data(self, correos):
+        """Carga masiva con LOAD DATA LOCAL INFILE desde un fichero temporal.
+
+        mysql.connector solo acepta rutas de fichero, así que el buffer se
+        vuelca en un temporal (en /dev/shm si existe, es decir, en memoria).
+        Devuelve None si la carga falla, para que el llamador use INSERT.
+        """
+        directorio = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        connection = self.get_connection()
+        cargados = None
+        if connection:
+            cursor = None
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.tsv', dir=directorio) as buffer:
+                for correo in correos:
+                    buffer.write(f"{correo['usuario_id']}\t{_escapar_tsv(correo['tipo'])}\t{_escapar_tsv(correo['correo'])}\n")
+                buffer.flush()
+                
+                try:
+                    cursor = self._cursor(connection)
+                    cursor.execute(
+                        "LOAD DATA LOCAL INFILE %s INTO TABLE correos "
+                        "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                        "(usuario_id, tipo, correo)",
+                        (buffer.name,)
+                    )
+                    cargados = cursor.rowcount
+                    connection.commit()
+                    logger.info("Cargados %s correos con LOAD DATA", cargados)
+                except Error as e:
+                    logger.error("Error en LOAD DATA de correos: %s", e)
+                    connection.rollback()
+                    cargados = None
+                finally:
+                    if cursor:
+                        cursor.close()
+                    connection.close()
+                    self.marcar_escritura('correos')
+        return cargados
+    
+    def _guardar_correos_individualmente(self, connection, cursor, correos):
+        """Fallback: Inserta correos uno por uno con la conexión que ya tiene el lote.
+
+        Pedir otra conexión al pool mientras el lote retiene la suya agotaría
+        un pool de tamaño 1 (los shards de generación). Las filas que violan
+        una restricción se descartan; devuelve cuántas se insertaron.
+        """
+        if not correos or cursor is None:
+            return 0
+        logger.warning("Usando inserción individual como fallback...")
+        insertados = 0
         for correo in correos:
-            self.guardar_correo(correo['usuario_id'], correo['tipo'], correo['correo'])
+            try:
+                cursor.execute(
+                    "INSERT INTO correos (usuario_id, tipo, correo) VALUES (%s, %s, %s)",
+                    (correo['usuario_id'], correo['tipo'], correo['correo'])
+                )
+                insertados += 1
+            except IntegrityError as e:
+                logger.warning("Correo descartado: %s", e, extra={'muestreo': 20})
+        connection.commit()
+        return insertados
     
+    @medir_db
     def guardar_correo(self, usuario_id, tipo, correo):
         """Método original para inserción individual"""
         connection = self.get_connection()
         correo_id = None
         if connection:
+            cursor = None
             try:
-                cursor = connection.cursor()
+                cursor = self._cursor(connection)
                 cursor.execute(
                     "INSERT INTO correos (usuario_id, tipo, correo) VALUES (%s, %s, %s)",
                     (usuario_id, tipo, correo)
@@ -123,36 +542,37 @@ class Database:
                 correo_id = cursor.lastrowid
                 connection.commit()
             except Error as e:
-                print(f"Error guardando correo: {e}")
+                logger.error("Error guardando correo: %s", e)
                 connection.rollback()
             finally:
                 if cursor:
                     cursor.close()
                 connection.close()
+                self.marcar_escritura('correos')
         return correo_id
     
-    def obtener_usuarios(self):
-        connection = self.get_connection()
-        usuarios = []
-        if connection:
-            try:
-                cursor = connection.cursor(dictionary=True)
-                cursor.execute("SELECT * FROM usuarios ORDER BY id DESC")
-                usuarios = cursor.fetchall()
-            except Error as e:
-                print(f"Error obteniendo usuarios: {e}")
-            finally:
-                if cursor:
-                    cursor.close()
-                connection.close()
-        return usuarios
+    @medir_db
+    def obtener_usuarios(self, limite=None, despues_de=None, filtros=None, huella=None):
+        """Lista usuarios por id descendente.
+
+        Con ``limite`` se pagina por cursor (keyset): ``despues_de`` es el
+        último id de la página anterior y la consulta hace un seek sobre la
+        clave primaria, así cada página cuesta lo mismo sea cual sea su posición.
+        ``filtros`` admite nombre, apellido y q (prefijos), edad_min, edad_max,
+        creado_desde y creado_hasta, y se resuelven en SQL. ``huella`` es el
+        estado de las tablas del ETag de la respuesta (ver _consultar_cacheado).
+        """
+        query, params = consulta_usuarios(limite, despues_de, filtros)
+        return self._consultar_cacheado(query, params, ('usuarios',), 'usuarios', huella, limite)
     
+    @medir_db
     def agregar_usuario(self, nombre, apellido, edad):
         connection = self.get_connection()
         usuario_id = None
         if connection:
+            cursor = None
             try:
-                cursor = connection.cursor()
+                cursor = self._cursor(connection)
                 cursor.execute(
                     "INSERT INTO usuarios (nombre, apellido, edad) VALUES (%s, %s, %s)",
                     (nombre, apellido, edad)
@@ -160,76 +580,516 @@ class Database:
                 usuario_id = cursor.lastrowid
                 connection.commit()
             except Error as e:
-                print(f"Error agregando usuario: {e}")
+                logger.error("Error agregando usuario: %s", e)
                 connection.rollback()
             finally:
                 if cursor:
                     cursor.close()
                 connection.close()
+                self.marcar_escritura('usuarios')
         return usuario_id
     
+    @medir_db
+    def agregar_usuarios_lote(self, usuarios, tamano_lote=1000):
+        """OPTIMIZACIÓN: Inserta usuarios con INSERT multi-fila en una sola transacción.
+
+        Recibe dicts con nombre, apellido y edad y devuelve sus ids en el mismo
+        orden. InnoDB reserva un bloque consecutivo de AUTO_INCREMENT para cada
+        INSERT multi-fila, así que los ids se obtienen a partir de lastrowid.
+        """
+        if not usuarios:
+            return []
+        
+        connection = self.get_connection()
+        ids = []
+        if connection:
+            cursor = None
+            try:
+                cursor = self._cursor(connection)
+                incremento = self._incremento_ids(cursor)
+                
+                for inicio in range(0, len(usuarios), tamano_lote):
+                    lote = usuarios[inicio:inicio + tamano_lote]
+                    valores = []
+                    for usuario in lote:
+                        valores.extend((usuario['nombre'], usuario['apellido'], usuario['edad']))
+                    cursor.execute(
+                        "INSERT INTO usuarios (nombre, apellido, edad) VALUES "
+                        + ", ".join(["(%s, %s, %s)"] * len(lote)),
+                        valores
+                    )
+                    primer_id = self._primer_id_lote(cursor, len(lote))
+                    ids.extend(range(primer_id, primer_id + len(lote) * incremento, incremento))
+                
+                connection.commit()
+                logger.info("Insertados %s usuarios en lote", len(ids), extra={'muestreo': 20})
+            except Error as e:
+                logger.error("Error en inserción masiva de usuarios: %s", e)
+                connection.rollback()
+                ids = []
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+                self.marcar_escritura('usuarios')
+        return ids
+    
+    def _incremento_ids(self, cursor):
+        """Paso entre ids consecutivos de AUTO_INCREMENT"""
+        cursor.execute("SELECT @@auto_increment_increment")
+        return cursor.fetchone()[0] or 1
+    
+    def _primer_id_lote(self, cursor, filas):
+        """Id de la primera fila de un INSERT multi-fila (MySQL lo da en lastrowid)"""
+        return cursor.lastrowid
+    
+    @medir_db
     def eliminar_usuario(self, usuario_id):
         connection = self.get_connection()
         if connection:
+            cursor = None
             try:
-                cursor = connection.cursor()
+                cursor = self._cursor(connection)
                 cursor.execute("DELETE FROM usuarios WHERE id = %s", (usuario_id,))
                 connection.commit()
             except Error as e:
-                print(f"Error eliminando usuario: {e}")
+                logger.error("Error eliminando usuario: %s", e)
+                connection.rollback()
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+                self.marcar_escritura('usuarios', 'correos')
+
+    @medir_db(devuelve_cuenta=True)
+    def eliminar_usuarios(self, ids, tamano_lote=1000):
+        """OPTIMIZACIÓN: Borra varios usuarios (y sus correos) con una sola conexión.
+
+        Los ids se ordenan y se borran con un DELETE ... IN por lote de
+        ``tamano_lote`` ids, con un commit por lote para no retener bloqueos.
+        Devuelve cuántos usuarios se borraron, o None si hubo un error (los
+        lotes ya confirmados quedan borrados).
+        """
+        ids = sorted(set(ids))
+        if not ids:
+            return 0
+
+        connection = self.get_connection()
+        eliminados = None
+        if connection:
+            cursor = None
+            try:
+                cursor = self._cursor(connection)
+                eliminados = 0
+                for i in range(0, len(ids), tamano_lote):
+                    lote = ids[i:i + tamano_lote]
+                    cursor.execute(
+                        f"DELETE FROM usuarios WHERE id IN ({', '.join(['%s'] * len(lote))})", lote
+                    )
+                    eliminados += cursor.rowcount
+                    connection.commit()
+            except Error as e:
+                logger.error("Error eliminando usuarios: %s", e)
                 connection.rollback()
+                eliminados = None
             finally:
                 if cursor:
                     cursor.close()
                 connection.close()
+                self.marcar_escritura('usuarios', 'correos')
+        return eliminados
     
+    @medir_db
     def eliminar_todos_usuarios(self):
         connection = self.get_connection()
         if connection:
+            cursor = None
             try:
-                cursor = connection.cursor()
+                cursor = self._cursor(connection)
                 cursor.execute("DELETE FROM usuarios")
                 connection.commit()
             except Error as e:
-                print(f"Error eliminando todos los usuarios: {e}")
+                logger.error("Error eliminando todos los usuarios: %s", e)
                 connection.rollback()
             finally:
                 if cursor:
                     cursor.close()
                 connection.close()
+                self.marcar_escritura('usuarios', 'correos')
+    
+    @medir_db
+    def obtener_correos(self, limite=None, despues_de=None, filtros=None, huella=None):
+        """Lista correos con el nombre del usuario, paginable por cursor como obtener_usuarios.
+
+        ``filtros`` admite usuario_id, tipos (lista), prefijo y dominio, y se
+        resuelven en SQL antes del JOIN.
+        """
+        query, params = consulta_correos(limite, despues_de, filtros)
+        return self._consultar_cacheado(query, params, ('usuarios', 'correos'), 'correos', huella, limite)
     
-    def obtener_correos(self):
+    @medir_db
+    def obtener_correos_usuario(self, usuario_id, tipos=None):
+        """Correos de un usuario mediante un seek sobre idx_usuario_tipo.
+
+        Devuelve None si el usuario no existe. Los errores de la base se
+        propagan para no confundirlos con un usuario inexistente.
+        """
         connection = self.get_connection()
-        correos = []
+        if not connection:
+            raise Error("No hay conexión con la base de datos")
+        correos = None
+        cursor = None
+        try:
+            cursor = self._cursor(connection, dictionary=True)
+            cursor.execute("SELECT id FROM usuarios WHERE id = %s", (usuario_id,))
+            if cursor.fetchone():
+                condiciones, params = _filtros_correos({'usuario_id': usuario_id, 'tipos': tipos})
+                cursor.execute(
+                    "SELECT c.* FROM correos c WHERE " + " AND ".join(condiciones) + " ORDER BY c.tipo",
+                    params
+                )
+                correos = cursor.fetchall()
+        except Error as e:
+            logger.error("Error obteniendo correos del usuario %s: %s", usuario_id, e)
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            connection.close()
+        return correos
+    
+    def iterar_correos(self, tamano_lote=1000, filtros=None):
+        """OPTIMIZACIÓN: Recorre los correos con un cursor sin buffer.
+
+        Genera listas de hasta ``tamano_lote`` filas leídas con fetchmany, de
+        modo que la memoria usada no depende del tamaño de la tabla. Admite
+        los mismos ``filtros`` que obtener_correos. La conexión queda prestada
+        mientras dure la iteración. Los errores se propagan: quien exporta
+        por trozos debe cortar la respuesta en lugar de darla por completa.
+        """
+        connection = self.get_connection()
+        if not connection:
+            raise Error("No hay conexión con la base de datos")
+        cursor = None
+        completo = False
+        try:
+            cursor = self._cursor(connection, dictionary=True, buffered=False)
+            query, params = consulta_correos(filtros=filtros)
+            cursor.execute(query, params)
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    break
+                DB_FILAS.inc(len(filas), metodo='iterar_correos')
+                yield filas
+            completo = True
+        except Error as e:
+            logger.error("Error recorriendo correos: %s", e)
+            raise
+        finally:
+            if completo:
+                cursor.close()
+                connection.close()
+            else:
+                # Quedan filas sin leer en el servidor: la conexión no es reutilizable
+                connection.invalidar()
+    
+    @medir_db
+    def obtener_estado_tablas(self, *tablas):
+        """Huella de cada tabla, (MAX(id), COUNT(*)), para validar cachés de clientes.
+
+        Cambia con cualquier alta o baja: los ids no se reutilizan, así que
+        borrar e insertar a la vez mueve MAX(id). Se resuelve en una sola
+        consulta y se cachea ``ttl_estado_tablas`` segundos mientras no haya
+        escrituras locales. Devuelve None si no hay conexión.
+        """
+        tablas = self._validar_tablas(tablas)
+        clave = ('estado',) + tablas
+        versiones = self.version_tablas(*tablas)
+        encontrado, estado = self.cache.obtener(clave, versiones)
+        if encontrado:
+            return estado
+        
+        connection = self.get_connection()
+        estado = None
         if connection:
+            cursor = None
             try:
-                cursor = connection.cursor(dictionary=True)
-                cursor.execute("""
-                    SELECT c.*, u.nombre, u.apellido 
-                    FROM correos c 
-                    JOIN usuarios u ON c.usuario_id = u.id 
-                    ORDER BY c.id DESC
-                """)
-                correos = cursor.fetchall()
+                cursor = self._cursor(connection)
+                cursor.execute(consulta_estado_tablas(tablas))
+                fila = cursor.fetchone()
+                estado = tuple(zip(fila[0::2], fila[1::2]))
+                self.cache.guardar(clave, versiones, estado, self.ttl_estado_tablas)
             except Error as e:
-                print(f"Error obteniendo correos: {e}")
+                logger.error("Error obteniendo el estado de las tablas: %s", e)
             finally:
                 if cursor:
                     cursor.close()
                 connection.close()
-        return correos
+        return estado
+    
+    @medir_db
+    def obtener_estadisticas(self, ttl=None):
+        """OPTIMIZACIÓN: Cifras del panel con consultas agregadas y caché corta.
+
+        El resultado se reutiliza durante ``ttl`` segundos mientras no haya
+        escrituras en las tablas desde este proceso; las de otros procesos
+        se reflejan al caducar el TTL. Devuelve None si no hay conexión.
+        """
+        ttl = self.ttl_estadisticas if ttl is None else ttl
+        versiones = self.version_tablas()
+        encontrado, estadisticas = self.cache.obtener(('estadisticas',), versiones)
+        if encontrado:
+            return estadisticas
+        
+        connection = self.get_connection()
+        estadisticas = None
+        if connection:
+            cursor = None
+            try:
+                cursor = self._cursor(connection)
+                cursor.execute("SELECT COUNT(*), MAX(fecha_creacion) FROM usuarios")
+                total_usuarios, ultimo_usuario = cursor.fetchone()
+                cursor.execute(CONSULTA_RANGOS_EDAD)
+                por_edad = {rango: total for rango, total in cursor.fetchall()}
+                cursor.execute("SELECT tipo, COUNT(*) FROM correos GROUP BY tipo")
+                por_tipo = {tipo: total for tipo, total in cursor.fetchall()}
+                cursor.execute("SELECT MAX(fecha_creacion) FROM correos")
+                ultimo_correo = cursor.fetchone()[0]
+                
+                estadisticas = {
+                    'total_usuarios': total_usuarios,
+                    'total_correos': sum(por_tipo.values()),
+                    'correos_por_tipo': por_tipo,
+                    'usuarios_por_edad': por_edad,
+                    'ultimo_usuario': ultimo_usuario,
+                    'ultimo_correo': ultimo_correo
+                }
+                self.cache.guardar(('estadisticas',), versiones, estadisticas, ttl)
+            except Error as e:
+                logger.error("Error obteniendo estadísticas: %s", e)
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+        return estadisticas
+    
+    @medir_db
+    def obtener_rango_ids(self, tabla, desde_id=None):
+        """Devuelve (MIN(id), MAX(id)) de la tabla; (None, None) si está vacía.
+
+        Con ``desde_id`` solo cuenta los ids >= desde_id: es el seek al
+        siguiente id existente con el que se recorren rangos con huecos.
+        """
+        if tabla not in ('usuarios', 'correos'):
+            raise ValueError(f"Tabla no permitida: {tabla}")
+        
+        connection = self.get_connection()
+        rango = (None, None)
+        if connection:
+            cursor = None
+            try:
+                cursor = self._cursor(connection)
+                if desde_id is None:
+                    cursor.execute(f"SELECT MIN(id), MAX(id) FROM {tabla}")
+                else:
+                    cursor.execute(f"SELECT MIN(id), MAX(id) FROM {tabla} WHERE id >= %s", (desde_id,))
+                rango = tuple(cursor.fetchone())
+            except Error as e:
+                logger.error("Error obteniendo rango de ids: %s", e)
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+        return rango
+    
+    @medir_db
+    def obtener_usuarios_rango(self, desde_id, hasta_id):
+        """Usuarios con id en [desde_id, hasta_id], solo las columnas para generar correos"""
+        connection = self.get_connection()
+        usuarios = []
+        if connection:
+            cursor = None
+            try:
+                cursor = self._cursor(connection, dictionary=True)
+                cursor.execute(
+                    "SELECT id, nombre, apellido FROM usuarios WHERE id BETWEEN %s AND %s ORDER BY id",
+                    (desde_id, hasta_id)
+                )
+                usuarios = cursor.fetchall()
+            except Error as e:
+                logger.error("Error obteniendo usuarios por rango: %s", e)
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+        return usuarios
     
+    @medir_db
+    def obtener_correos_faltantes(self, tipos, desde_id, hasta_id):
+        """OPTIMIZACIÓN: Anti-join de usuarios x tipos contra correos.
+
+        Devuelve los pares (usuario, tipo) del rango de ids que todavía no
+        tienen correo. El LEFT JOIN se resuelve con el índice (usuario_id, tipo).
+        """
+        if not tipos:
+            return []
+        
+        connection = self.get_connection()
+        faltantes = []
+        if connection:
+            cursor = None
+            try:
+                cursor = self._cursor(connection, dictionary=True)
+                tipos_sql = " UNION ALL ".join(["SELECT %s AS tipo"] * len(tipos))
+                cursor.execute(f"""
+                    SELECT u.id, u.nombre, u.apellido, t.tipo
+                    FROM usuarios u
+                    CROSS JOIN ({tipos_sql}) t
+                    LEFT JOIN correos c ON c.usuario_id = u.id AND c.tipo = t.tipo
+                    WHERE u.id BETWEEN %s AND %s AND c.id IS NULL
+                    ORDER BY u.id
+                """, [*tipos, desde_id, hasta_id])
+                faltantes = cursor.fetchall()
+            except Error as e:
+                logger.error("Error obteniendo correos faltantes: %s", e)
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+        return faltantes
+    
+    @medir_db
     def eliminar_todos_correos(self):
         connection = self.get_connection()
         if connection:
+            cursor = None
             try:
-                cursor = connection.cursor()
+                cursor = self._cursor(connection)
                 cursor.execute("DELETE FROM correos")
                 connection.commit()
             except Error as e:
-                print(f"Error eliminando todos los correos: {e}")
+                logger.error("Error eliminando todos los correos: %s", e)
+                connection.rollback()
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+                self.marcar_escritura('correos')
+
+    @medir_db(devuelve_cuenta=True)
+    def eliminar_rango(self, tabla, desde_id, hasta_id):
+        """OPTIMIZACIÓN: Borra las filas con id en [desde_id, hasta_id] en una transacción corta.
+
+        El rango se resuelve sobre la clave primaria, así que solo bloquea
+        esas filas. Borrar usuarios borra en cascada sus correos. Devuelve
+        cuántas filas de ``tabla`` se borraron, o None si hubo un error.
+        """
+        if tabla not in ('usuarios', 'correos'):
+            raise ValueError(f"Tabla no permitida: {tabla}")
+
+        connection = self.get_connection()
+        eliminadas = None
+        if connection:
+            cursor = None
+            try:
+                cursor = self._cursor(connection)
+                cursor.execute(f"DELETE FROM {tabla} WHERE id BETWEEN %s AND %s", (desde_id, hasta_id))
+                eliminadas = cursor.rowcount
+                connection.commit()
+            except Error as e:
+                logger.error("Error eliminando %s %s-%s: %s", tabla, desde_id, hasta_id, e)
                 connection.rollback()
+                eliminadas = None
             finally:
                 if cursor:
                     cursor.close()
-                connection.close()
\ No newline at end of file
+                connection.close()
+                self.marcar_escritura(*(('usuarios', 'correos') if tabla == 'usuarios' else ('correos',)))
+        return eliminadas
+
+    @medir_db
+    def truncar_correos(self, espera_bloqueo=5):
+        """Vacía correos con TRUNCATE si se puede hacer sin bloquear las lecturas.
+
+        TRUNCATE no genera undo por fila, pero necesita el bloqueo exclusivo
+        de metadatos: si no lo consigue en ``espera_bloqueo`` segundos (hay
+        lecturas largas en curso) se abandona en vez de dejar en cola a las
+        consultas que lleguen detrás. Se conserva el AUTO_INCREMENT para que
+        los ids no se reutilicen. Devuelve las filas que tenía la tabla (contadas
+        justo antes de truncar) si quedó vacía, aunque no se haya podido
+        restaurar el AUTO_INCREMENT, o None si no se truncó.
+        """
+        connection = self.get_connection()
+        eliminadas = None
+        if connection:
+            cursor = None
+            try:
+                cursor = self._cursor(connection)
+                cursor.execute("SET SESSION lock_wait_timeout = %s", (espera_bloqueo,))
+                try:
+                    cursor.execute("SELECT COUNT(*) FROM correos")
+                    filas = cursor.fetchone()[0]
+                    # Justo antes de truncar: incluye los ids ya repartidos a
+                    # inserciones concurrentes, aunque aún no tengan commit
+                    siguiente_id = self._siguiente_auto_increment(cursor, 'correos')
+                    cursor.execute("TRUNCATE TABLE correos")
+                    eliminadas = filas
+                    try:
+                        cursor.execute(f"ALTER TABLE correos AUTO_INCREMENT = {int(siguiente_id)}")
+                    except Error as e:
+                        logger.warning("Correos truncada, pero no se pudo conservar el AUTO_INCREMENT: %s", e)
+                finally:
+                    # La conexión vuelve al pool: no dejar el timeout cambiado
+                    cursor.execute("SET SESSION lock_wait_timeout = DEFAULT")
+            except Error as e:
+                logger.warning("No se pudo truncar correos, se borrará por lotes: %s", e)
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+                self.marcar_escritura('correos')
+        return eliminadas
+
+    def _siguiente_auto_increment(self, cursor, tabla):
+        """AUTO_INCREMENT actual de la tabla, leído de information_schema sin caché"""
+        sin_cache = False
+        try:
+            # MySQL 8 cachea las estadísticas de information_schema por defecto
+            cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+            sin_cache = True
+        except Error:
+            # Servidores sin esa variable no cachean el AUTO_INCREMENT
+            pass
+        try:
+            cursor.execute(
+                "SELECT AUTO_INCREMENT FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                (tabla,)
+            )
+            fila = cursor.fetchone()
+        finally:
+            if sin_cache:
+                cursor.execute("SET SESSION information_schema_stats_expiry = DEFAULT")
+        return (fila[0] if fila else None) or 1
+
+BACKENDS = ('mysql', 'sqlite', 'memoria')
+
+def crear_database(backend='mysql', sqlite_ruta=None, **opciones):
+    """Crea la Database del backend indicado con las mismas opciones que Database.
+
+    'mysql' es Database; 'sqlite' guarda en el fichero ``sqlite_ruta`` en modo
+    WAL; 'memoria' no persiste nada y no necesita ningún servicio externo.
+    Todos ofrecen los mismos métodos públicos.
+    """
+    if backend == 'mysql':
+        return Database(**opciones)
+    if backend == 'sqlite':
+        from database_sqlite import DatabaseSQLite
+        if sqlite_ruta:
+            opciones['ruta'] = sqlite_ruta
+        return DatabaseSQLite(**opciones)
+    if backend == 'memoria':
+        from database_memoria import DatabaseMemoria
+        return DatabaseMemoria(**opciones)
+    raise ValueError(f"Backend desconocido: {backend} (disponibles: {', '.join(BACKENDS)})")
@@ -0,0 +1,392 @@
+from mysql.connector import Error
+
+from bitacora import obtener_logger
+from consultas_lentas import CursorMedidoAsync
+from database import (
+    CONSULTA_RANGOS_EDAD, FILAS_MAXIMAS_CACHEABLES, _LecturasVersionadas, _filtros_correos,
+    consulta_correos, consulta_estado_tablas, consulta_usuarios
+)
+from metricas import DB_FILAS, medir_db
+from pool import PoolExhaustedError
+from pool_async import PoolAsync
+
+# El conector asyncio llegó en mysql-connector-python 8.3: sin él la capa
+# asíncrona no puede abrir conexiones
+try:
+    import mysql.connector.aio as mysql_aio
+except ImportError:
+    mysql_aio = None
+
+logger = obtener_logger('database_async')
+
+
+class DatabaseAsync(_LecturasVersionadas):
+    """OPTIMIZACIÓN: Versión asyncio de Database para app_async.
+
+    Mismas consultas, caché de lecturas y registro de consultas lentas que
+    Database, pero cada método es una corrutina: mientras MySQL responde, el
+    bucle de eventos atiende otras peticiones en lugar de tener un hilo
+    bloqueado por consulta. Cubre las lecturas y escrituras de la API; las
+    generaciones masivas siguen en la capa síncrona.
+    """
+
+    def __init__(self, host='localhost', database='usuarios_db', user='root', password='',
+                 pool_name='crm_pool_async', pool_size=10, max_overflow=5, pool_timeout=30.0,
+                 ttl_estadisticas=5.0, cache_tamano=256, cache_ttl=30.0, ttl_estado_tablas=1.0,
+                 umbral_consulta_lenta=0.5, capacidad_consultas_lentas=100):
+        self.host = host
+        self.database = database
+        self.user = user
+        self.password = password
+        self.pool_name = pool_name
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.ttl_estadisticas = ttl_estadisticas
+        self.ttl_estado_tablas = ttl_estado_tablas
+        self._iniciar_lecturas(cache_tamano, cache_ttl, umbral_consulta_lenta, capacidad_consultas_lentas)
+        self._pool = None
+
+    async def _crear_conexion(self):
+        """Abre una conexión nueva a MySQL (solo la usa el pool)"""
+        if mysql_aio is None:
+            raise RuntimeError("DatabaseAsync necesita mysql-connector-python >= 8.3 (mysql.connector.aio)")
+        return await mysql_aio.connect(
+            host=self.host,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            autocommit=False
+        )
+
+    @property
+    def pool(self):
+        """Pool propio de la instancia, ligado al bucle de eventos que lo usa"""
+        if self._pool is None:
+            self._pool = PoolAsync(
+                self.pool_name,
+                self._crear_conexion,
+                tamano=self.pool_size,
+                max_overflow=self.max_overflow,
+                timeout=self.pool_timeout
+            )
+        return self._pool
+
+    async def get_connection(self):
+        """Presta una conexión del pool; await close() la devuelve al pool"""
+        try:
+            return await self.pool.checkout()
+        except (Error, PoolExhaustedError) as e:
+            logger.error("Error conectando a MySQL: %s", e)
+            return None
+
+    async def _cursor(self, connection, **opciones):
+        """Cursor medido; con buffer salvo que se pida lo contrario (varias sentencias por cursor)"""
+        opciones.setdefault('buffered', True)
+        return CursorMedidoAsync(await connection.cursor(**opciones), connection, self.consultas_lentas)
+
+    def estadisticas_pool(self):
+        return self.pool.estadisticas()
+
+    async def cerrar(self):
+        """Cierra las conexiones inactivas del pool (al parar el servidor)"""
+        if self._pool is not None:
+            await self._pool.cerrar()
+
+    async def _consultar_cacheado(self, query, params, tablas, descripcion, huella=None, limite=None):
+        """Ejecuta un SELECT pasando por la caché de lecturas (ver Database)"""
+        cacheable = limite is not None and limite <= FILAS_MAXIMAS_CACHEABLES
+        clave = (query, tuple(params))
+        versiones = self.version_tablas(*tablas) + (huella,)
+        if cacheable:
+            encontrado, filas = self.cache.obtener(clave, versiones)
+            if encontrado:
+                return filas
+
+        connection = await self.get_connection()
+        filas = []
+        if connection:
+            cursor = None
+            try:
+                cursor = await self._cursor(connection, dictionary=True)
+                await cursor.execute(query, params)
+                filas = await cursor.fetchall()
+                if cacheable:
+                    self.cache.guardar(clave, versiones, filas)
+            except Error as e:
+                logger.error("Error obteniendo %s: %s", descripcion, e)
+            finally:
+                if cursor:
+                    await cursor.close()
+                await connection.close()
+        return filas
+
+    @medir_db
+    async def obtener_usuarios(self, limite=None, despues_de=None, filtros=None, huella=None):
+        """Lista usuarios por id descendente, paginable por cursor (ver Database)"""
+        query, params = consulta_usuarios(limite, despues_de, filtros)
+        return await self._consultar_cacheado(query, params, ('usuarios',), 'usuarios', huella, limite)
+
+    @medir_db
+    async def obtener_correos(self, limite=None, despues_de=None, filtros=None, huella=None):
+        """Lista correos con el nombre del usuario, paginable por cursor (ver Database)"""
+        query, params = consulta_correos(limite, despues_de, filtros)
+        return await self._consultar_cacheado(query, params, ('usuarios', 'correos'), 'correos', huella, limite)
+
+    @medir_db
+    async def agregar_usuario(self, nombre, apellido, edad):
+        connection = await self.get_connection()
+        usuario_id = None
+        if connection:
+            cursor = None
+            try:
+                cursor = await self._cursor(connection)
+                await cursor.execute(
+                    "INSERT INTO usuarios (nombre, apellido, edad) VALUES (%s, %s, %s)",
+                    (nombre, apellido, edad)
+                )
+                usuario_id = cursor.lastrowid
+                await connection.commit()
+            except Error as e:
+                logger.error("Error agregando usuario: %s", e)
+                await connection.rollback()
+            finally:
+                if cursor:
+                    await cursor.close()
+                await connection.close()
+                self.marcar_escritura('usuarios')
+        return usuario_id
+
+    @medir_db
+    async def agregar_usuarios_lote(self, usuarios, tamano_lote=1000):
+        """Inserta usuarios con INSERT multi-fila en una sola transacción (ver Database)"""
+        if not usuarios:
+            return []
+
+        connection = await self.get_connection()
+        ids = []
+        if connection:
+            cursor = None
+            try:
+                cursor = await self._cursor(connection)
+                await cursor.execute("SELECT @@auto_increment_increment")
+                incremento = (await cursor.fetchone())[0] or 1
+
+                for inicio in range(0, len(usuarios), tamano_lote):
+                    lote = usuarios[inicio:inicio + tamano_lote]
+                    valores = []
+                    for usuario in lote:
+                        valores.extend((usuario['nombre'], usuario['apellido'], usuario['edad']))
+                    await cursor.execute(
+                        "INSERT INTO usuarios (nombre, apellido, edad) VALUES "
+                        + ", ".join(["(%s, %s, %s)"] * len(lote)),
+                        valores
+                    )
+                    primer_id = cursor.lastrowid
+                    ids.extend(range(primer_id, primer_id + len(lote) * incremento, incremento))
+
+                await connection.commit()
+                logger.info("Insertados %s usuarios en lote", len(ids), extra={'muestreo': 20})
+            except Error as e:
+                logger.error("Error en inserción masiva de usuarios: %s", e)
+                await connection.rollback()
+                ids = []
+            finally:
+                if cursor:
+                    await cursor.close()
+                await connection.close()
+                self.marcar_escritura('usuarios')
+        return ids
+
+    async def _ejecutar_escritura(self, sql, params, tablas, descripcion):
+        """Ejecuta una sentencia de escritura en su propia transacción"""
+        connection = await self.get_connection()
+        if connection:
+            cursor = None
+            try:
+                cursor = await self._cursor(connection)
+                await cursor.execute(sql, params)
+                await connection.commit()
+            except Error as e:
+                logger.error("Error %s: %s", descripcion, e)
+                await connection.rollback()
+            finally:
+                if cursor:
+                    await cursor.close()
+                await connection.close()
+                self.marcar_escritura(*tablas)
+
+    @medir_db
+    async def eliminar_usuario(self, usuario_id):
+        await self._ejecutar_escritura(
+            "DELETE FROM usuarios WHERE id = %s", (usuario_id,), ('usuarios', 'correos'), "eliminando usuario"
+        )
+
+    @medir_db(devuelve_cuenta=True)
+    async def eliminar_usuarios(self, ids, tamano_lote=1000):
+        """Como Database.eliminar_usuarios: DELETE ... IN por lotes con un commit por lote"""
+        ids = sorted(set(ids))
+        if not ids:
+            return 0
+
+        connection = await self.get_connection()
+        eliminados = None
+        if connection:
+            cursor = None
+            try:
+                cursor = await self._cursor(connection)
+                eliminados = 0
+                for i in range(0, len(ids), tamano_lote):
+                    lote = ids[i:i + tamano_lote]
+                    await cursor.execute(
+                        f"DELETE FROM usuarios WHERE id IN ({', '.join(['%s'] * len(lote))})", lote
+                    )
+                    eliminados += cursor.rowcount
+                    await connection.commit()
+            except Error as e:
+                logger.error("Error eliminando usuarios: %s", e)
+                await connection.rollback()
+                eliminados = None
+            finally:
+                if cursor:
+                    await cursor.close()
+                await connection.close()
+                self.marcar_escritura('usuarios', 'correos')
+        return eliminados
+
+    @medir_db
+    async def eliminar_todos_usuarios(self):
+        await self._ejecutar_escritura(
+            "DELETE FROM usuarios", None, ('usuarios', 'correos'), "eliminando todos los usuarios"
+        )
+
+    @medir_db
+    async def eliminar_todos_correos(self):
+        await self._ejecutar_escritura(
+            "DELETE FROM correos", None, ('correos',), "eliminando todos los correos"
+        )
+
+    @medir_db
+    async def obtener_correos_usuario(self, usuario_id, tipos=None):
+        """Correos de un usuario; None si el usuario no existe (los errores de la base se propagan)"""
+        connection = await self.get_connection()
+        if not connection:
+            raise Error("No hay conexión con la base de datos")
+        correos = None
+        cursor = None
+        try:
+            cursor = await self._cursor(connection, dictionary=True)
+            await cursor.execute("SELECT id FROM usuarios WHERE id = %s", (usuario_id,))
+            if await cursor.fetchone():
+                condiciones, params = _filtros_correos({'usuario_id': usuario_id, 'tipos': tipos})
+                await cursor.execute(
+                    "SELECT c.* FROM correos c WHERE " + " AND ".join(condiciones) + " ORDER BY c.tipo",
+                    params
+                )
+                correos = await cursor.fetchall()
+        except Error as e:
+            logger.error("Error obteniendo correos del usuario %s: %s", usuario_id, e)
+            raise
+        finally:
+            if cursor:
+                await cursor.close()
+            await connection.close()
+        return correos
+
+    async def iterar_correos(self, tamano_lote=1000, filtros=None):
+        """Recorre los correos (con ``filtros`` opcionales) por lotes con un cursor sin buffer (generador asíncrono)"""
+        connection = await self.get_connection()
+        if not connection:
+            raise Error("No hay conexión con la base de datos")
+        cursor = None
+        completo = False
+        try:
+            cursor = await self._cursor(connection, dictionary=True, buffered=False)
+            query, params = consulta_correos(filtros=filtros)
+            await cursor.execute(query, params)
+            while True:
+                filas = await cursor.fetchmany(tamano_lote)
+                if not filas:
+                    break
+                DB_FILAS.inc(len(filas), metodo='iterar_correos')
+                yield filas
+            completo = True
+        except Error as e:
+            logger.error("Error recorriendo correos: %s", e)
+            raise
+        finally:
+            if completo:
+                await cursor.close()
+                await connection.close()
+            else:
+                # Quedan filas sin leer en el servidor: la conexión no es reutilizable
+                await connection.invalidar()
+
+    @medir_db
+    async def obtener_estado_tablas(self, *tablas):
+        """Huella (MAX(id), COUNT(*)) de cada tabla; None si no hay conexión"""
+        tablas = self._validar_tablas(tablas)
+        clave = ('estado',) + tablas
+        versiones = self.version_tablas(*tablas)
+        encontrado, estado = self.cache.obtener(clave, versiones)
+        if encontrado:
+            return estado
+
+        connection = await self.get_connection()
+        estado = None
+        if connection:
+            cursor = None
+            try:
+                cursor = await self._cursor(connection)
+                await cursor.execute(consulta_estado_tablas(tablas))
+                fila = await cursor.fetchone()
+                estado = tuple(zip(fila[0::2], fila[1::2]))
+                self.cache.guardar(clave, versiones, estado, self.ttl_estado_tablas)
+            except Error as e:
+                logger.error("Error obteniendo el estado de las tablas: %s", e)
+            finally:
+                if cursor:
+                    await cursor.close()
+                await connection.close()
+        return estado
+
+    @medir_db
+    async def obtener_estadisticas(self, ttl=None):
+        """Cifras del panel con consultas agregadas y caché corta (ver Database)"""
+        ttl = self.ttl_estadisticas if ttl is None else ttl
+        versiones = self.version_tablas()
+        encontrado, estadisticas = self.cache.obtener(('estadisticas',), versiones)
+        if encontrado:
+            return estadisticas
+
+        connection = await self.get_connection()
+        estadisticas = None
+        if connection:
+            cursor = None
+            try:
+                cursor = await self._cursor(connection)
+                await cursor.execute("SELECT COUNT(*), MAX(fecha_creacion) FROM usuarios")
+                total_usuarios, ultimo_usuario = await cursor.fetchone()
+                await cursor.execute(CONSULTA_RANGOS_EDAD)
+                por_edad = {rango: total for rango, total in await cursor.fetchall()}
+                await cursor.execute("SELECT tipo, COUNT(*) FROM correos GROUP BY tipo")
+                por_tipo = {tipo: total for tipo, total in await cursor.fetchall()}
+                await cursor.execute("SELECT MAX(fecha_creacion) FROM correos")
+                ultimo_correo = (await cursor.fetchone())[0]
+
+                estadisticas = {
+                    'total_usuarios': total_usuarios,
+                    'total_correos': sum(por_tipo.values()),
+                    'correos_por_tipo': por_tipo,
+                    'usuarios_por_edad': por_edad,
+                    'ultimo_usuario': ultimo_usuario,
+                    'ultimo_correo': ultimo_correo
+                }
+                self.cache.guardar(('estadisticas',), versiones, estadisticas, ttl)
+            except Error as e:
+                logger.error("Error obteniendo estadísticas: %s", e)
+            finally:
+                if cursor:
+                    await cursor.close()
+                await connection.close()
+        return estadisticas
@@ -0,0 +1,425 @@
+import bisect
+import threading
+from collections import Counter
+from datetime import datetime
+
+from bitacora import obtener_logger
+from database import _LecturasVersionadas
+from metricas import DB_FILAS, medir_db
+
+logger = obtener_logger('database_memoria')
+
+
+def _empieza(valor, prefijo):
+    """LIKE 'prefijo%' sin distinguir mayúsculas, como la colación por defecto de MySQL"""
+    return valor.casefold().startswith(prefijo.casefold())
+
+
+def _cumple_usuario(usuario, filtros):
+    """Mismos filtros que _filtros_usuarios, evaluados en Python"""
+    if filtros.get('nombre') and not _empieza(usuario['nombre'], filtros['nombre']):
+        return False
+    if filtros.get('apellido') and not _empieza(usuario['apellido'], filtros['apellido']):
+        return False
+    if filtros.get('q') and not (_empieza(usuario['nombre'], filtros['q'])
+                                 or _empieza(usuario['apellido'], filtros['q'])):
+        return False
+    if filtros.get('edad_min') is not None and usuario['edad'] < filtros['edad_min']:
+        return False
+    if filtros.get('edad_max') is not None and usuario['edad'] > filtros['edad_max']:
+        return False
+    if filtros.get('creado_desde') is not None and usuario['fecha_creacion'] < filtros['creado_desde']:
+        return False
+    if filtros.get('creado_hasta') is not None and usuario['fecha_creacion'] >= filtros['creado_hasta']:
+        return False
+    return True
+
+
+def _cumple_correo(correo, filtros):
+    """Mismos filtros que _filtros_correos, evaluados en Python"""
+    if filtros.get('usuario_id') is not None and correo['usuario_id'] != filtros['usuario_id']:
+        return False
+    if filtros.get('tipos') is not None and correo['tipo'] not in filtros['tipos']:
+        return False
+    if filtros.get('prefijo') and not _empieza(correo['correo'], filtros['prefijo']):
+        return False
+    if filtros.get('dominio') and not correo['correo'].casefold().endswith('@' + filtros['dominio'].casefold()):
+        return False
+    return True
+
+
+def _rango_edad(edad):
+    """Mismos tramos que CONSULTA_RANGOS_EDAD"""
+    if edad < 18:
+        return '<18'
+    if edad <= 25:
+        return '18-25'
+    if edad <= 35:
+        return '26-35'
+    if edad <= 50:
+        return '36-50'
+    return '51+'
+
+
+class _Tabla:
+    """Filas por id con los ids ordenados, para recorrer por id descendente con seek"""
+
+    def __init__(self):
+        self.filas = {}
+        self.ids = []
+        self.siguiente_id = 1
+
+    def insertar(self, fila):
+        # Los ids crecen siempre y no se reutilizan, como AUTO_INCREMENT
+        fila['id'] = self.siguiente_id
+        self.siguiente_id += 1
+        self.filas[fila['id']] = fila
+        self.ids.append(fila['id'])
+        return fila['id']
+
+    def eliminar(self, ids):
+        ids = sorted(set(ids) & self.filas.keys())
+        for fila_id in ids:
+            del self.filas[fila_id]
+        if not ids:
+            return 0
+        inicio = bisect.bisect_left(self.ids, ids[0])
+        fin = bisect.bisect_right(self.ids, ids[-1])
+        if fin - inicio == len(ids):
+            # Ids contiguos en la lista (un rango, un vaciado): un solo corte
+            del self.ids[inicio:fin]
+        elif len(ids) <= 32:
+            for fila_id in reversed(ids):
+                del self.ids[bisect.bisect_left(self.ids, fila_id)]
+        else:
+            # Muchos ids sueltos: se reconstruye solo el tramo que los contiene
+            borrar = set(ids)
+            self.ids[inicio:fin] = [fila_id for fila_id in self.ids[inicio:fin] if fila_id not in borrar]
+        return len(ids)
+
+    def descendente(self, despues_de=None):
+        """Filas por id descendente a partir del seek ``id < despues_de``"""
+        fin = len(self.ids) if despues_de is None else bisect.bisect_left(self.ids, despues_de)
+        for i in range(fin - 1, -1, -1):
+            yield self.filas[self.ids[i]]
+
+    def rango(self, desde_id, hasta_id):
+        """Filas con id en [desde_id, hasta_id] por id ascendente"""
+        inicio = bisect.bisect_left(self.ids, desde_id)
+        fin = bisect.bisect_right(self.ids, hasta_id)
+        return [self.filas[fila_id] for fila_id in self.ids[inicio:fin]]
+
+
+class DatabaseMemoria(_LecturasVersionadas):
+    """OPTIMIZACIÓN: Backend en memoria con los mismos métodos públicos que Database.
+
+    Guarda las tablas en diccionarios protegidos por un lock y evalúa los
+    filtros, la paginación y las restricciones (correo único por usuario y
+    tipo, borrado en cascada) en Python. No persiste nada ni necesita
+    servicios externos: sirve para pruebas, demos y para medir el coste del
+    resto de la aplicación sin la base de datos. Las opciones de conexión y
+    de lotes de Database se aceptan y se ignoran.
+    """
+
+    # Los datos viven en este proceso: no hay generación en paralelo
+    multiproceso = False
+
+    def __init__(self, ttl_estadisticas=5.0, ttl_estado_tablas=1.0, cache_tamano=256, cache_ttl=30.0,
+                 umbral_consulta_lenta=0.5, capacidad_consultas_lentas=100, **opciones_conexion):
+        self.ttl_estadisticas = ttl_estadisticas
+        self.ttl_estado_tablas = ttl_estado_tablas
+        self._iniciar_lecturas(cache_tamano, cache_ttl, umbral_consulta_lenta, capacidad_consultas_lentas)
+        self._usuarios = _Tabla()
+        self._correos = _Tabla()
+        # usuario_id -> {tipo: id del correo}: la clave única de la tabla correos,
+        # indexada por usuario para consultar y borrar sus correos sin recorrerlos todos
+        self._correos_por_usuario = {}
+        self._lock = threading.RLock()
+
+    def get_connection(self):
+        """No hay conexiones: los métodos acceden directamente a las tablas"""
+        return None
+
+    def estadisticas_pool(self):
+        # Mismas claves que ConnectionPool.estadisticas() para /pool/estadisticas y /metrics
+        return {
+            'nombre': 'memoria',
+            'tamano': 0,
+            'max_overflow': 0,
+            'timeout': 0,
+            'en_uso': 0,
+            'libres': 0,
+            'max_en_uso': 0,
+            'checkouts': 0,
+            'esperas': 0,
+            'tiempo_espera_total': 0.0,
+            'agotamientos': 0,
+            'conexiones_creadas': 0,
+            'conexiones_descartadas': 0
+        }
+
+    def parametros_conexion(self):
+        raise RuntimeError("El backend en memoria no se puede compartir con otros procesos: genera sin procesos o usa mysql o sqlite")
+
+    @medir_db
+    def crear_tablas(self):
+        logger.info("Backend en memoria: no hay tablas que crear")
+
+    def _usuario(self, usuario):
+        return {
+            'id': usuario['id'],
+            'nombre': usuario['nombre'],
+            'apellido': usuario['apellido'],
+            'edad': usuario['edad'],
+            'fecha_creacion': usuario['fecha_creacion']
+        }
+
+    def _correo(self, correo, con_usuario=False):
+        fila = {
+            'id': correo['id'],
+            'usuario_id': correo['usuario_id'],
+            'tipo': correo['tipo'],
+            'correo': correo['correo'],
+            'fecha_creacion': correo['fecha_creacion']
+        }
+        if con_usuario:
+            usuario = self._usuarios.filas[correo['usuario_id']]
+            fila['nombre'] = usuario['nombre']
+            fila['apellido'] = usuario['apellido']
+        return fila
+
+    @staticmethod
+    def _pagina(filas, limite):
+        resultado = []
+        for fila in filas:
+            if limite is not None and len(resultado) >= limite:
+                break
+            resultado.append(fila)
+        return resultado
+
+    @medir_db
+    def agregar_usuario(self, nombre, apellido, edad):
+        with self._lock:
+            usuario_id = self._usuarios.insertar({
+                'nombre': nombre, 'apellido': apellido, 'edad': edad, 'fecha_creacion': datetime.now()
+            })
+        self.marcar_escritura('usuarios')
+        return usuario_id
+
+    @medir_db
+    def agregar_usuarios_lote(self, usuarios, tamano_lote=1000):
+        if not usuarios:
+            return []
+        ahora = datetime.now()
+        with self._lock:
+            ids = [
+                self._usuarios.insertar({
+                    'nombre': u['nombre'], 'apellido': u['apellido'], 'edad': u['edad'], 'fecha_creacion': ahora
+                })
+                for u in usuarios
+            ]
+        self.marcar_escritura('usuarios')
+        return ids
+
+    @medir_db
+    def obtener_usuarios(self, limite=None, despues_de=None, filtros=None, huella=None):
+        filtros = filtros or {}
+        with self._lock:
+            return self._pagina(
+                (self._usuario(u) for u in self._usuarios.descendente(despues_de) if _cumple_usuario(u, filtros)),
+                limite
+            )
+
+    @medir_db
+    def obtener_usuarios_rango(self, desde_id, hasta_id):
+        with self._lock:
+            return [
+                {'id': u['id'], 'nombre': u['nombre'], 'apellido': u['apellido']}
+                for u in self._usuarios.rango(desde_id, hasta_id)
+            ]
+
+    def _insertar_correo(self, usuario_id, tipo, correo, fecha):
+        """Inserta respetando la clave única y la foránea; None si alguna lo impide"""
+        if usuario_id not in self._usuarios.filas or tipo in self._correos_por_usuario.get(usuario_id, ()):
+            return None
+        correo_id = self._correos.insertar({
+            'usuario_id': usuario_id, 'tipo': tipo, 'correo': correo, 'fecha_creacion': fecha
+        })
+        self._correos_por_usuario.setdefault(usuario_id, {})[tipo] = correo_id
+        return correo_id
+
+    def _desindexar_correo(self, correo):
+        tipos = self._correos_por_usuario[correo['usuario_id']]
+        del tipos[correo['tipo']]
+        if not tipos:
+            del self._correos_por_usuario[correo['usuario_id']]
+
+    @medir_db
+    def guardar_correo(self, usuario_id, tipo, correo):
+        with self._lock:
+            correo_id = self._insertar_correo(usuario_id, tipo, correo, datetime.now())
+        if correo_id is None:
+            logger.error("Error guardando correo: usuario %s inexistente o tipo %s duplicado", usuario_id, tipo)
+        self.marcar_escritura('correos')
+        return correo_id
+
+    @medir_db(devuelve_cuenta=True)
+    def guardar_correos_lote(self, correos, *args, **kwargs):
+        """Inserta los correos válidos y devuelve cuántos se insertaron.
+
+        Los duplicados y los de usuarios inexistentes se descartan, como hace
+        la inserción fila a fila de Database cuando falla el lote.
+        """
+        if not correos:
+            return 0
+        ahora = datetime.now()
+        with self._lock:
+            insertados = sum(
+                self._insertar_correo(c['usuario_id'], c['tipo'], c['correo'], ahora) is not None
+                for c in correos
+            )
+        if insertados < len(correos):
+            logger.warning("Descartados %s correos duplicados o sin usuario", len(correos) - insertados)
+        self.marcar_escritura('correos')
+        return insertados
+
+    @medir_db
+    def obtener_correos(self, limite=None, despues_de=None, filtros=None, huella=None):
+        filtros = filtros or {}
+        with self._lock:
+            return self._pagina(
+                (self._correo(c, con_usuario=True) for c in self._correos.descendente(despues_de)
+                 if _cumple_correo(c, filtros)),
+                limite
+            )
+
+    @medir_db
+    def obtener_correos_usuario(self, usuario_id, tipos=None):
+        with self._lock:
+            if usuario_id not in self._usuarios.filas:
+                return None
+            correos = [
+                self._correo(self._correos.filas[correo_id])
+                for tipo, correo_id in self._correos_por_usuario.get(usuario_id, {}).items()
+                if tipos is None or tipo in tipos
+            ]
+        return sorted(correos, key=lambda c: c['tipo'])
+
+    def iterar_correos(self, tamano_lote=1000, filtros=None):
+        """Recorre los correos por id descendente en lotes de ``tamano_lote`` filas"""
+        filtros = filtros or {}
+        despues_de = None
+        while True:
+            with self._lock:
+                filas = self._pagina(
+                    (self._correo(c, con_usuario=True) for c in self._correos.descendente(despues_de)
+                     if _cumple_correo(c, filtros)),
+                    tamano_lote
+                )
+            if not filas:
+                return
+            DB_FILAS.inc(len(filas), metodo='iterar_correos')
+            yield filas
+            despues_de = filas[-1]['id']
+
+    @medir_db
+    def obtener_correos_faltantes(self, tipos, desde_id, hasta_id):
+        if not tipos:
+            return []
+        with self._lock:
+            return [
+                {'id': u['id'], 'nombre': u['nombre'], 'apellido': u['apellido'], 'tipo': tipo}
+                for u in self._usuarios.rango(desde_id, hasta_id)
+                for tipo in tipos
+                if tipo not in self._correos_por_usuario.get(u['id'], ())
+            ]
+
+    def _eliminar_usuarios(self, ids):
+        ids = set(ids)
+        correos = [
+            correo_id for usuario_id in ids
+            for correo_id in self._correos_por_usuario.pop(usuario_id, {}).values()
+        ]
+        self._correos.eliminar(correos)
+        return self._usuarios.eliminar(ids)
+
+    @medir_db
+    def eliminar_usuario(self, usuario_id):
+        with self._lock:
+            self._eliminar_usuarios([usuario_id])
+        self.marcar_escritura('usuarios', 'correos')
+
+    @medir_db(devuelve_cuenta=True)
+    def eliminar_usuarios(self, ids, tamano_lote=1000):
+        with self._lock:
+            eliminados = self._eliminar_usuarios(ids)
+        self.marcar_escritura('usuarios', 'correos')
+        return eliminados
+
+    @medir_db
+    def eliminar_todos_usuarios(self):
+        with self._lock:
+            self._eliminar_usuarios(list(self._usuarios.filas))
+        self.marcar_escritura('usuarios', 'correos')
+
+    @medir_db
+    def eliminar_todos_correos(self):
+        with self._lock:
+            self._correos.eliminar(list(self._correos.filas))
+            self._correos_por_usuario.clear()
+        self.marcar_escritura('correos')
+
+    @medir_db(devuelve_cuenta=True)
+    def eliminar_rango(self, tabla, desde_id, hasta_id):
+        if tabla not in ('usuarios', 'correos'):
+            raise ValueError(f"Tabla no permitida: {tabla}")
+        with self._lock:
+            if tabla == 'usuarios':
+                eliminadas = self._eliminar_usuarios(u['id'] for u in self._usuarios.rango(desde_id, hasta_id))
+            else:
+                correos = self._correos.rango(desde_id, hasta_id)
+                for correo in correos:
+                    self._desindexar_correo(correo)
+                eliminadas = self._correos.eliminar(c['id'] for c in correos)
+        self.marcar_escritura(*(('usuarios', 'correos') if tabla == 'usuarios' else ('correos',)))
+        return eliminadas
+
+    @medir_db
+    def truncar_correos(self, espera_bloqueo=5):
+        with self._lock:
+            filas = len(self._correos.filas)
+            self.eliminar_todos_correos()
+        return filas
+
+    @medir_db
+    def obtener_rango_ids(self, tabla, desde_id=None):
+        if tabla not in ('usuarios', 'correos'):
+            raise ValueError(f"Tabla no permitida: {tabla}")
+        with self._lock:
+            ids = (self._usuarios if tabla == 'usuarios' else self._correos).ids
+            inicio = 0 if desde_id is None else bisect.bisect_left(ids, desde_id)
+            return (ids[inicio], ids[-1]) if inicio < len(ids) else (None, None)
+
+    @medir_db
+    def obtener_estado_tablas(self, *tablas):
+        tablas = self._validar_tablas(tablas)
+        with self._lock:
+            return tuple(
+                ((t.ids[-1] if t.ids else None), len(t.ids))
+                for t in (self._usuarios if tabla == 'usuarios' else self._correos for tabla in tablas)
+            )
+
+    @medir_db
+    def obtener_estadisticas(self, ttl=None):
+        with self._lock:
+            usuarios = self._usuarios.filas.values()
+            correos = self._correos.filas.values()
+            por_tipo = Counter(c['tipo'] for c in correos)
+            return {
+                'total_usuarios': len(usuarios),
+                'total_correos': len(correos),
+                'correos_por_tipo': dict(por_tipo),
+                'usuarios_por_edad': dict(Counter(_rango_edad(u['edad']) for u in usuarios)),
+                'ultimo_usuario': max((u['fecha_creacion'] for u in usuarios), default=None),
+                'ultimo_correo': max((c['fecha_creacion'] for c in correos), default=None)
+            }
@@ -0,0 +1,233 @@
+import re
+import sqlite3
+from functools import lru_cache
+
+from mysql.connector import errors
+
+from bitacora import obtener_logger
+from database import Database
+from metricas import medir_db
+
+logger = obtener_logger('database_sqlite')
+
+_REGEX_LIKE = re.compile(r'\bLIKE \?')
+
+
+@lru_cache(maxsize=512)
+def _traducir_sql(sql):
+    """Adapta el SQL de Database (MySQL) a SQLite.
+
+    Los parámetros pasan de %s a ?, los LIKE declaran la barra invertida como
+    carácter de escape (en MySQL lo es por defecto) y el EXPLAIN del registro
+    de consultas lentas se convierte en EXPLAIN QUERY PLAN.
+    """
+    sql = _REGEX_LIKE.sub(r"LIKE ? ESCAPE '\\'", sql.replace('%s', '?'))
+    if sql.lstrip().upper().startswith('EXPLAIN '):
+        sql = 'EXPLAIN QUERY PLAN ' + sql.lstrip()[len('EXPLAIN '):]
+    return sql
+
+
+def _error_mysql(error):
+    """El error de sqlite3 como el equivalente de mysql.connector, que es lo que captura Database"""
+    clase = errors.IntegrityError if isinstance(error, sqlite3.IntegrityError) else errors.DatabaseError
+    return clase(msg=str(error))
+
+
+class CursorSQLite:
+    """Cursor de sqlite3 con la interfaz que usa Database de los cursores de mysql.connector"""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    @property
+    def with_rows(self):
+        return self._cursor.description is not None
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def execute(self, sql, params=()):
+        try:
+            self._cursor.execute(_traducir_sql(sql), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def _fila(self, fila):
+        if fila is None or not self._dictionary:
+            return fila
+        return dict(zip((d[0] for d in self._cursor.description), fila))
+
+    def _filas(self, filas):
+        if not self._dictionary:
+            return filas
+        columnas = [d[0] for d in self._cursor.description]
+        return [dict(zip(columnas, fila)) for fila in filas]
+
+    def fetchone(self):
+        try:
+            return self._fila(self._cursor.fetchone())
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def fetchmany(self, size=1):
+        try:
+            return self._filas(self._cursor.fetchmany(size))
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def fetchall(self):
+        try:
+            return self._filas(self._cursor.fetchall())
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexionSQLite:
+    """Conexión de sqlite3 con la interfaz de conexión de mysql.connector que usa Database"""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    @property
+    def in_transaction(self):
+        return self._raw.in_transaction
+
+    def cursor(self, dictionary=False, buffered=True):
+        # sqlite3 lee siempre de forma incremental: ``buffered`` no cambia nada
+        return CursorSQLite(self._raw.cursor(), dictionary)
+
+    def ejecutar_script(self, sql):
+        """Varias sentencias separadas por ';' (el esquema)"""
+        try:
+            self._raw.executescript(sql)
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def commit(self):
+        try:
+            self._raw.commit()
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def rollback(self):
+        try:
+            self._raw.rollback()
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def close(self):
+        self._raw.close()
+
+
+class DatabaseSQLite(Database):
+    """OPTIMIZACIÓN: Database sobre un fichero SQLite en modo WAL, sin servidor.
+
+    Ejecuta las mismas consultas que Database a través de ConexionSQLite;
+    solo cambian el esquema y los ids de los INSERT multi-fila. Con WAL los
+    lectores no bloquean al escritor, y ``espera_bloqueo`` es lo que espera
+    una escritura mientras otra conexión tiene la base bloqueada. Pensada
+    para despliegues en el borde, pruebas y microbenchmarks.
+    """
+
+    # Las conexiones a un fichero local no caducan: no hace falta validarlas
+    reciclar_conexiones = None
+
+    def __init__(self, ruta='usuarios_db.sqlite3', espera_bloqueo=5.0, **opciones):
+        opciones.setdefault('pool_name', f'crm_sqlite:{ruta}')
+        # LOAD DATA es exclusivo de MySQL
+        opciones['allow_local_infile'] = False
+        super().__init__(**opciones)
+        self.ruta = ruta
+        self.espera_bloqueo = espera_bloqueo
+
+    def _crear_conexion(self):
+        try:
+            raw = sqlite3.connect(
+                self.ruta, timeout=self.espera_bloqueo,
+                detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False
+            )
+            raw.execute("PRAGMA journal_mode=WAL")
+            raw.execute("PRAGMA synchronous=NORMAL")
+            raw.execute("PRAGMA foreign_keys=ON")
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+        return ConexionSQLite(raw)
+
+    def parametros_conexion(self):
+        return {'backend': 'sqlite', 'sqlite_ruta': self.ruta}
+
+    @medir_db
+    def crear_tablas(self):
+        connection = self.get_connection()
+        if connection:
+            try:
+                # NOCASE: LIKE por prefijo usa el índice y no distingue mayúsculas, como en MySQL
+                connection.ejecutar_script("""
+                    CREATE TABLE IF NOT EXISTS usuarios (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        nombre VARCHAR(50) NOT NULL COLLATE NOCASE,
+                        apellido VARCHAR(50) NOT NULL COLLATE NOCASE,
+                        edad INTEGER NOT NULL,
+                        fecha_creacion TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_nombre ON usuarios (nombre);
+                    CREATE INDEX IF NOT EXISTS idx_apellido ON usuarios (apellido);
+                    CREATE INDEX IF NOT EXISTS idx_edad ON usuarios (edad);
+                    CREATE INDEX IF NOT EXISTS idx_fecha_creacion ON usuarios (fecha_creacion);
+
+                    CREATE TABLE IF NOT EXISTS correos (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        usuario_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+                        tipo VARCHAR(20) NOT NULL,
+                        correo VARCHAR(100) NOT NULL COLLATE NOCASE,
+                        fecha_creacion TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+                        UNIQUE (usuario_id, tipo)
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_tipo ON correos (tipo);
+                    CREATE INDEX IF NOT EXISTS idx_correo ON correos (correo);
+                """)
+                logger.info("Tablas creadas/verificadas correctamente en %s", self.ruta)
+            except errors.Error as e:
+                logger.error("Error creando tablas: %s", e)
+            finally:
+                connection.close()
+
+    def _incremento_ids(self, cursor):
+        return 1
+
+    def _primer_id_lote(self, cursor, filas):
+        # SQLite devuelve el id de la última fila; las de un mismo INSERT son consecutivas
+        return cursor.lastrowid - filas + 1
+
+    @medir_db
+    def truncar_correos(self, espera_bloqueo=5):
+        # Un DELETE sin WHERE ya vacía la tabla sin recorrer fila a fila
+        # (truncate optimization) y AUTOINCREMENT no reutiliza los ids
+        connection = self.get_connection()
+        eliminadas = None
+        if connection:
+            cursor = None
+            try:
+                cursor = self._cursor(connection)
+                cursor.execute("DELETE FROM correos")
+                filas = cursor.rowcount
+                connection.commit()
+                eliminadas = filas
+            except errors.Error as e:
+                logger.warning("No se pudo vaciar correos, se borrará por lotes: %s", e)
+                connection.rollback()
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+                self.marcar_escritura('correos')
+        return eliminadas
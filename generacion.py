@@ -0,0 +1,251 @@
+import multiprocessing
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from database import crear_database
+from jobs import JobCancelado
+from plantillas import MotorPlantillas
+
+# Motor propio de cada proceso hijo (se crea en el primer shard que procesa)
+_motor_proceso = None
+# Evento compartido con el proceso padre para cancelar los shards en curso
+_cancelacion_proceso = None
+
+
+class ResumenGeneracion:
+    """Resumen de una generación: correos por tipo y rango de usuarios afectados.
+
+    ``por_tipo`` cuenta los correos generados; los que la base de datos
+    rechaza (p. ej. duplicados) se restan del total como ``descartados``.
+    """
+
+    def __init__(self):
+        self.por_tipo = Counter()
+        self.descartados = 0
+        self.usuario_id_minimo = None
+        self.usuario_id_maximo = None
+
+    @property
+    def total(self):
+        return sum(self.por_tipo.values()) - self.descartados
+
+    def registrar(self, filas, insertados=None):
+        if not filas:
+            return
+        self.por_tipo.update(fila['tipo'] for fila in filas)
+        if insertados is not None:
+            self.descartados += len(filas) - insertados
+        ids = [fila['usuario_id'] for fila in filas]
+        self._ampliar_rango(min(ids), max(ids))
+
+    def combinar(self, datos):
+        """Suma el resumen (en forma de dict) de otro shard o lote"""
+        self.por_tipo.update(datos['por_tipo'])
+        self.descartados += datos.get('correos_descartados', 0)
+        if datos['rango_usuarios']:
+            self._ampliar_rango(*datos['rango_usuarios'])
+
+    def _ampliar_rango(self, minimo, maximo):
+        if self.usuario_id_minimo is None or minimo < self.usuario_id_minimo:
+            self.usuario_id_minimo = minimo
+        if self.usuario_id_maximo is None or maximo > self.usuario_id_maximo:
+            self.usuario_id_maximo = maximo
+
+    def to_dict(self):
+        return {
+            'total_correos': self.total,
+            'correos_descartados': self.descartados,
+            'por_tipo': dict(self.por_tipo),
+            'tipos_generados': sorted(self.por_tipo),
+            'rango_usuarios': (
+                [self.usuario_id_minimo, self.usuario_id_maximo]
+                if self.usuario_id_minimo is not None else None
+            )
+        }
+
+
+NOMBRES = [
+    'Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Laura', 'Pedro', 'Sofía',
+    'José', 'Elena', 'Miguel', 'Isabel', 'David', 'Carmen', 'Javier', 'Rosa',
+    'Daniel', 'Patricia', 'Francisco', 'Lucía', 'Antonio', 'Teresa', 'Manuel', 'Eva',
+    'Jorge', 'Marta', 'Pablo', 'Cristina', 'Alberto', 'Silvia', 'Fernando', 'Raquel'
+]
+
+APELLIDOS = [
+    'García', 'Rodríguez', 'González', 'Fernández', 'López', 'Martínez', 'Sánchez',
+    'Pérez', 'Gómez', 'Martín', 'Jiménez', 'Ruiz', 'Hernández', 'Díaz', 'Moreno',
+    'Álvarez', 'Romero', 'Alonso', 'Gutiérrez', 'Navarro', 'Torres', 'Domínguez',
+    'Vázquez', 'Ramos', 'Gil', 'Ramírez', 'Serrano', 'Blanco', 'Molina', 'Morales'
+]
+
+
+def usuarios_aleatorios(cantidad):
+    """Datos de ``cantidad`` usuarios aleatorios (sin id), listos para agregar_usuarios_lote"""
+    return [
+        {
+            'nombre': random.choice(NOMBRES),
+            'apellido': random.choice(APELLIDOS),
+            'edad': random.randint(18, 80)
+        }
+        for _ in range(cantidad)
+    ]
+
+
+def usuarios_con_ids(usuarios, ids):
+    """Une los usuarios con los ids devueltos por agregar_usuarios_lote; [] si el alta falló"""
+    if len(ids) != len(usuarios):
+        return []
+    return [{'id': usuario_id, **usuario} for usuario_id, usuario in zip(ids, usuarios)]
+
+
+def modo_generacion(incremental, procesos):
+    """Etiqueta del modo de generación para las métricas"""
+    if procesos:
+        return 'paralelo'
+    return 'incremental' if incremental else 'completa'
+
+
+def dividir_en_shards(id_minimo, id_maximo, num_shards):
+    """Parte el rango [id_minimo, id_maximo] en hasta num_shards rangos contiguos"""
+    total = id_maximo - id_minimo + 1
+    num_shards = max(1, min(num_shards, total))
+    tamano, resto = divmod(total, num_shards)
+    shards = []
+    desde = id_minimo
+    for i in range(num_shards):
+        hasta = desde + tamano - 1 + (1 if i < resto else 0)
+        shards.append((desde, hasta))
+        desde = hasta + 1
+    return shards
+
+
+def _filas_faltantes(db, motor, tipos, desde, hasta):
+    """Filas de los pares (usuario, tipo) del rango que aún no tienen correo"""
+    filas = []
+    for fila in db.obtener_correos_faltantes(tipos, desde, hasta):
+        correos = motor.generar(fila['nombre'], fila['apellido'])
+        filas.append({'usuario_id': fila['id'], 'tipo': fila['tipo'], 'correo': correos[fila['tipo']]})
+    return filas
+
+
+def generar_rango(db, motor, desde, hasta, tipos_seleccionados=None, incremental=False,
+                  job=None, ids_por_lote=5000, acumular=True, cancelacion=None):
+    """Genera e inserta los correos de los usuarios con id en [desde, hasta].
+
+    Recorre el rango en sublotes de ``ids_por_lote`` ids; en modo incremental
+    solo genera los pares (usuario, tipo) que faltan. Devuelve las filas
+    insertadas (vacío si ``acumular`` es False) y su ResumenGeneracion.
+    Si el evento ``cancelacion`` se activa, lanza JobCancelado antes del
+    siguiente sublote.
+    """
+    tipos = [t for t in motor.tipos if not tipos_seleccionados or t in tipos_seleccionados]
+    todas_las_filas = []
+    resumen = ResumenGeneracion()
+    if not tipos:
+        return todas_las_filas, resumen
+
+    for inicio in range(desde, hasta + 1, ids_por_lote):
+        if job:
+            job.comprobar_cancelacion()
+        if cancelacion is not None and cancelacion.is_set():
+            raise JobCancelado(f"Generación de los ids {desde}-{hasta} cancelada")
+        fin = min(inicio + ids_por_lote - 1, hasta)
+
+        if incremental:
+            filas = _filas_faltantes(db, motor, tipos, inicio, fin)
+        else:
+            filas = motor.generar_lote(db.obtener_usuarios_rango(inicio, fin), tipos)
+
+        insertados = 0
+        if filas:
+            insertados = db.guardar_correos_lote(filas)
+            resumen.registrar(filas, insertados)
+            if acumular:
+                todas_las_filas.extend(filas)
+
+        if job:
+            job.avanzar(fin - inicio + 1, insertados)
+
+    return todas_las_filas, resumen
+
+
+def _preparar_proceso(cancelacion):
+    """Inicializador de cada proceso hijo: recibe el evento de cancelación al crearse"""
+    global _cancelacion_proceso
+    _cancelacion_proceso = cancelacion
+
+
+def generar_shard(parametros_db, desde, hasta, tipos_seleccionados=None, incremental=False, ids_por_lote=5000):
+    """Punto de entrada de cada proceso hijo: procesa un shard con su propia conexión"""
+    global _motor_proceso
+    if _motor_proceso is None:
+        _motor_proceso = MotorPlantillas()
+
+    # Un solo hilo por proceso: basta con una conexión en el pool del hijo
+    db = crear_database(**parametros_db, pool_size=1, max_overflow=0)
+    inicio = time.perf_counter()
+    _, resumen = generar_rango(
+        db, _motor_proceso, desde, hasta, tipos_seleccionados, incremental,
+        ids_por_lote=ids_por_lote, acumular=False, cancelacion=_cancelacion_proceso
+    )
+    return {
+        **resumen.to_dict(),
+        'desde': desde,
+        'hasta': hasta,
+        'tiempo': time.perf_counter() - inicio
+    }
+
+
+def generar_en_paralelo(db, tipos_seleccionados=None, incremental=False, procesos=None,
+                        job=None, ids_por_lote=5000, shards_por_proceso=4):
+    """OPTIMIZACIÓN: Reparte el espacio de ids de usuarios entre varios procesos.
+
+    Cada shard genera y escribe sus lotes en su propio proceso y con su
+    propia conexión; aquí solo se combinan los resúmenes. Se usan más shards
+    que procesos para equilibrar la carga y tener un progreso más fino.
+    Al cancelar no se espera a los shards en curso: se descartan los
+    pendientes y los que ya corren se detienen en su siguiente sublote.
+    """
+    procesos = procesos or multiprocessing.cpu_count()
+    id_minimo, id_maximo = db.obtener_rango_ids('usuarios')
+    resumen = ResumenGeneracion()
+    if id_minimo is None:
+        return {**resumen.to_dict(), 'shards': 0, 'procesos': procesos}
+
+    shards = dividir_en_shards(id_minimo, id_maximo, procesos * shards_por_proceso)
+    if job:
+        job.fijar_total(id_maximo - id_minimo + 1)
+
+    # spawn: los hijos no heredan hilos ni sockets del servidor
+    contexto = multiprocessing.get_context('spawn')
+    # El evento viaja a los hijos al crearlos: no se puede pasar en submit
+    cancelacion = contexto.Event()
+    parametros_db = db.parametros_conexion()
+    try:
+        executor = ProcessPoolExecutor(max_workers=procesos, mp_context=contexto,
+                                       initializer=_preparar_proceso, initargs=(cancelacion,))
+        try:
+            futuros = [
+                executor.submit(generar_shard, parametros_db, desde, hasta,
+                                tipos_seleccionados, incremental, ids_por_lote)
+                for desde, hasta in shards
+            ]
+            for futuro in as_completed(futuros):
+                resultado = futuro.result()
+                resumen.combinar(resultado)
+                if job:
+                    job.avanzar(resultado['hasta'] - resultado['desde'] + 1, resultado['total_correos'])
+                    job.comprobar_cancelacion()
+        except BaseException:
+            cancelacion.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+    finally:
+        # Los hijos escriben con sus propias conexiones: la caché de lecturas
+        # de este proceso no se ha enterado
+        db.marcar_escritura('correos')
+
+    return {**resumen.to_dict(), 'shards': len(shards), 'procesos': procesos}
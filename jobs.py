@@ -0,0 +1,162 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from bitacora import obtener_logger
+
+logger = obtener_logger('jobs')
+
+
+class JobCancelado(Exception):
+    """Se lanza dentro de un trabajo cuando se ha pedido su cancelación"""
+
+
+class Job:
+    """Trabajo en segundo plano con progreso observable.
+
+    La función del trabajo recibe el propio Job y va informando con
+    ``avanzar``; entre lotes debe llamar a ``comprobar_cancelacion``.
+    """
+
+    PENDIENTE = 'pendiente'
+    EJECUTANDO = 'ejecutando'
+    COMPLETADO = 'completado'
+    FALLIDO = 'fallido'
+    CANCELADO = 'cancelado'
+    FINALES = (COMPLETADO, FALLIDO, CANCELADO)
+
+    def __init__(self, tipo, total=0):
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.estado = Job.PENDIENTE
+        self.total = total
+        self.procesados = 0
+        self.filas_escritas = 0
+        self.creado = time.time()
+        self.iniciado = None
+        self.finalizado = None
+        self.error = None
+        self.resultado = None
+        self._cancelacion = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelado(self):
+        return self._cancelacion.is_set()
+
+    @property
+    def terminado(self):
+        return self.estado in Job.FINALES
+
+    def cancelar(self):
+        self._cancelacion.set()
+
+    def comprobar_cancelacion(self):
+        if self._cancelacion.is_set():
+            raise JobCancelado(f"Trabajo {self.id} cancelado")
+
+    def fijar_total(self, total):
+        with self._lock:
+            self.total = total
+
+    def avanzar(self, procesados=0, filas=0):
+        with self._lock:
+            self.procesados += procesados
+            self.filas_escritas += filas
+
+    def to_dict(self):
+        with self._lock:
+            procesados = self.procesados
+            filas = self.filas_escritas
+            total = self.total
+
+        fin = self.finalizado or time.time()
+        transcurrido = fin - self.iniciado if self.iniciado else 0.0
+        velocidad = filas / transcurrido if transcurrido > 0 else 0.0
+
+        eta = None
+        if self.estado == Job.EJECUTANDO and procesados and total > procesados:
+            eta = round(transcurrido * (total - procesados) / procesados, 2)
+
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'estado': self.estado,
+            'total': total,
+            'procesados': procesados,
+            'filas_escritas': filas,
+            'progreso': round(100.0 * procesados / total, 2) if total else (100.0 if self.terminado else 0.0),
+            'tiempo': round(transcurrido, 3),
+            'filas_por_segundo': round(velocidad, 2),
+            'eta': eta,
+            'error': self.error,
+            'resultado': self.resultado
+        }
+
+
+class JobManager:
+    """Ejecuta trabajos en un pool de hilos y los conserva un tiempo tras terminar"""
+
+    def __init__(self, max_workers=2, retencion=3600):
+        self.retencion = retencion
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='crm-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def enviar(self, tipo, funcion, *args, total=0, **kwargs):
+        """Encola ``funcion(job, *args, **kwargs)`` y devuelve el Job creado"""
+        job = Job(tipo, total)
+        with self._lock:
+            self._purgar()
+            self._jobs[job.id] = job
+        self._executor.submit(self._ejecutar, job, funcion, args, kwargs)
+        return job
+
+    def _ejecutar(self, job, funcion, args, kwargs):
+        if job.cancelado:
+            job.finalizado = time.time()
+            job.estado = Job.CANCELADO
+            return
+
+        job.iniciado = time.time()
+        job.estado = Job.EJECUTANDO
+        try:
+            job.resultado = funcion(job, *args, **kwargs)
+            estado = Job.COMPLETADO
+        except JobCancelado:
+            estado = Job.CANCELADO
+        except Exception as e:
+            job.error = str(e)
+            estado = Job.FALLIDO
+            logger.exception("Error en trabajo %s: %s", job.id, e)
+        # finalizado se fija antes que el estado final para que nunca se vea
+        # un trabajo terminado sin fecha de fin
+        job.finalizado = time.time()
+        job.estado = estado
+
+    def obtener(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def listar(self):
+        with self._lock:
+            self._purgar()
+            return list(self._jobs.values())
+
+    def cancelar(self, job_id):
+        job = self.obtener(job_id)
+        if job:
+            job.cancelar()
+        return job
+
+    def _purgar(self):
+        """Olvida los trabajos terminados hace más de ``retencion`` segundos"""
+        limite = time.time() - self.retencion
+        for job_id in [j.id for j in self._jobs.values() if j.terminado and j.finalizado < limite]:
+            del self._jobs[job_id]
+
+    def cerrar(self, esperar=True):
+        for job in self.listar():
+            job.cancelar()
+        self._executor.shutdown(wait=esperar)
@@ -0,0 +1,300 @@
+import bisect
+import functools
+import inspect
+import math
+import threading
+import time
+
+from bitacora import obtener_logger
+
+logger = obtener_logger('metricas')
+
+# Buckets de latencia en segundos (de 1 ms a 30 s)
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _formatear_etiquetas(nombres, valores, extra=()):
+    pares = list(zip(nombres, valores)) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in pares) + '}'
+
+
+def _formatear_numero(valor):
+    if valor == math.inf:
+        return '+Inf'
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _clave(self, etiquetas):
+        if set(etiquetas) != set(self.etiquetas):
+            raise ValueError(f"{self.nombre} espera las etiquetas {self.etiquetas}, recibió {tuple(etiquetas)}")
+        return tuple(etiquetas[nombre] for nombre in self.etiquetas)
+
+    def exponer(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        with self._lock:
+            valores = sorted(self._valores.items())
+        for clave, valor in valores:
+            lineas.extend(self._lineas(clave, valor))
+        return lineas
+
+
+class Contador(_Metrica):
+    """Valor que solo crece (peticiones, errores, filas)"""
+    tipo = 'counter'
+
+    def inc(self, valor=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def fijar_total(self, valor, **etiquetas):
+        """Para contadores que se llevan en otro sitio y aquí solo se publican"""
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = valor
+
+    def valor(self, **etiquetas):
+        with self._lock:
+            return self._valores.get(self._clave(etiquetas), 0)
+
+    def _lineas(self, clave, valor):
+        return [f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}"]
+
+
+class Gauge(_Metrica):
+    """Valor que sube y baja (último rendimiento, conexiones en uso)"""
+    tipo = 'gauge'
+
+    def fijar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = valor
+
+    def _lineas(self, clave, valor):
+        return [f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}"]
+
+
+class Histograma(_Metrica):
+    """Distribución de valores en buckets acumulados, con suma y cuenta"""
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._valores.get(clave)
+            if serie is None:
+                # Cuentas por bucket (el último es +Inf), suma y total
+                serie = self._valores[clave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def cuenta(self, **etiquetas):
+        with self._lock:
+            serie = self._valores.get(self._clave(etiquetas))
+            return serie[2] if serie else 0
+
+    def _lineas(self, clave, serie):
+        cuentas, suma, total = serie
+        lineas = []
+        acumulado = 0
+        for limite, cuenta in zip(self.buckets + (math.inf,), cuentas):
+            acumulado += cuenta
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave, [('le', _formatear_numero(float(limite)))])
+            lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+        etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+        lineas.append(f"{self.nombre}_sum{etiquetas} {_formatear_numero(suma)}")
+        lineas.append(f"{self.nombre}_count{etiquetas} {total}")
+        return lineas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas de un proceso, expuesto en formato de texto de Prometheus.
+
+    Además de las métricas registradas admite recolectores: funciones que se
+    llaman al exponer para refrescar gauges que se leen de otro sitio (por
+    ejemplo, las estadísticas del pool).
+    """
+
+    def __init__(self):
+        self._metricas = {}
+        self._recolectores = []
+        self._lock = threading.Lock()
+
+    def _registrar(self, clase, nombre, *args, **kwargs):
+        with self._lock:
+            metrica = self._metricas.get(nombre)
+            if metrica is None:
+                metrica = self._metricas[nombre] = clase(nombre, *args, **kwargs)
+            elif not isinstance(metrica, clase):
+                raise ValueError(f"La métrica {nombre} ya existe con otro tipo")
+            return metrica
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._registrar(Contador, nombre, ayuda, etiquetas)
+
+    def gauge(self, nombre, ayuda, etiquetas=()):
+        return self._registrar(Gauge, nombre, ayuda, etiquetas)
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        return self._registrar(Histograma, nombre, ayuda, etiquetas, buckets)
+
+    def agregar_recolector(self, funcion):
+        with self._lock:
+            self._recolectores.append(funcion)
+
+    def exponer(self):
+        with self._lock:
+            recolectores = list(self._recolectores)
+        for recolector in recolectores:
+            try:
+                recolector()
+            except Exception as e:
+                logger.error("Error en recolector de métricas: %s", e)
+        with self._lock:
+            metricas = sorted(self._metricas.items())
+        lineas = []
+        for _, metrica in metricas:
+            lineas.extend(metrica.exponer())
+        return '\n'.join(lineas) + '\n'
+
+
+REGISTRO = RegistroMetricas()
+
+HTTP_PETICIONES = REGISTRO.contador(
+    'crm_http_peticiones_total', 'Peticiones HTTP atendidas', ('metodo', 'ruta', 'estado'))
+HTTP_ERRORES = REGISTRO.contador(
+    'crm_http_errores_total', 'Peticiones HTTP terminadas en error 5xx', ('metodo', 'ruta'))
+HTTP_DURACION = REGISTRO.histograma(
+    'crm_http_duracion_segundos', 'Latencia de las peticiones HTTP', ('metodo', 'ruta'))
+
+DB_DURACION = REGISTRO.histograma(
+    'crm_db_duracion_segundos', 'Latencia de los métodos de Database', ('metodo',))
+DB_FILAS = REGISTRO.contador(
+    'crm_db_filas_total', 'Filas devueltas o escritas por los métodos de Database', ('metodo',))
+
+POOL_ESPERA = REGISTRO.histograma(
+    'crm_pool_espera_segundos', 'Tiempo hasta obtener una conexión del pool', ('pool',))
+
+GENERACION_FILAS = REGISTRO.contador(
+    'crm_generacion_filas_total', 'Correos escritos por las generaciones', ('modo',))
+GENERACION_SEGUNDOS = REGISTRO.contador(
+    'crm_generacion_segundos_total', 'Tiempo dedicado a generar correos', ('modo',))
+GENERACION_RENDIMIENTO = REGISTRO.gauge(
+    'crm_generacion_filas_por_segundo', 'Rendimiento de la última generación', ('modo',))
+
+# Estadísticas del pool publicadas en /metrics (se leen del pool al exponer)
+GAUGES_POOL = {
+    clave: REGISTRO.gauge(f'crm_pool_{clave}', ayuda, ('pool',))
+    for clave, ayuda in (
+        ('en_uso', 'Conexiones prestadas ahora mismo'),
+        ('libres', 'Conexiones abiertas disponibles en el pool'),
+        ('max_en_uso', 'Máximo de conexiones prestadas a la vez')
+    )
+}
+CONTADORES_POOL = {
+    clave: REGISTRO.contador(f'crm_pool_{clave}_total', ayuda, ('pool',))
+    for clave, ayuda in (
+        ('checkouts', 'Préstamos de conexión'),
+        ('esperas', 'Préstamos que tuvieron que esperar una conexión libre'),
+        ('agotamientos', 'Préstamos que agotaron el timeout del pool'),
+        ('conexiones_creadas', 'Conexiones abiertas contra MySQL')
+    )
+}
+
+
+def recolector_pool(estadisticas_pool):
+    """Recolector que publica las estadísticas de un pool (ConnectionPool o PoolAsync)"""
+    def recolectar():
+        estadisticas = estadisticas_pool()
+        for clave, gauge in GAUGES_POOL.items():
+            gauge.fijar(estadisticas[clave], pool=estadisticas['nombre'])
+        for clave, contador in CONTADORES_POOL.items():
+            contador.fijar_total(estadisticas[clave], pool=estadisticas['nombre'])
+    return recolectar
+
+
+def medir_db(funcion=None, *, devuelve_cuenta=False):
+    """Decorador para métodos de Database: latencia y filas devueltas o escritas.
+
+    Las filas se cuentan cuando el método devuelve una lista; con
+    ``devuelve_cuenta`` el método devuelve directamente el número de filas.
+    La latencia se registra también si el método lanza una excepción.
+    Admite también corrutinas (los métodos de DatabaseAsync).
+    """
+    if funcion is None:
+        return functools.partial(medir_db, devuelve_cuenta=devuelve_cuenta)
+
+    metodo = funcion.__name__
+
+    def registrar_duracion(inicio):
+        DB_DURACION.observe(time.perf_counter() - inicio, metodo=metodo)
+
+    def registrar_filas(resultado):
+        if devuelve_cuenta:
+            filas = resultado or 0
+        else:
+            filas = len(resultado) if isinstance(resultado, list) else 0
+        if filas:
+            DB_FILAS.inc(filas, metodo=metodo)
+
+    if inspect.iscoroutinefunction(funcion):
+        @functools.wraps(funcion)
+        async def envoltura_async(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                resultado = await funcion(*args, **kwargs)
+            finally:
+                registrar_duracion(inicio)
+            registrar_filas(resultado)
+            return resultado
+        return envoltura_async
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            resultado = funcion(*args, **kwargs)
+        finally:
+            registrar_duracion(inicio)
+        registrar_filas(resultado)
+        return resultado
+    return envoltura
+
+
+def registrar_peticion(metodo, ruta, estado, segundos):
+    """Petición HTTP atendida (app.py o app_async.py); ``ruta`` es la plantilla, no la URL"""
+    HTTP_PETICIONES.inc(metodo=metodo, ruta=ruta, estado=str(estado))
+    HTTP_DURACION.observe(segundos, metodo=metodo, ruta=ruta)
+    if estado >= 500:
+        HTTP_ERRORES.inc(metodo=metodo, ruta=ruta)
+
+
+def registrar_generacion(modo, filas, segundos):
+    GENERACION_FILAS.inc(filas, modo=modo)
+    GENERACION_SEGUNDOS.inc(segundos, modo=modo)
+    if segundos > 0:
+        GENERACION_RENDIMIENTO.fijar(round(filas / segundos, 2), modo=modo)
@@ -0,0 +1,303 @@
+import hashlib
+from datetime import datetime, timedelta
+
+from compresion import codificaciones_disponibles
+from plantillas import TIPOS_CORREO, tipos_por_dominio
+from serializacion import a_columnar, codificar
+
+# Lectura de la query string y forma de las respuestas, comunes a app.py
+# (Flask) y app_async.py (Quart): ``args`` es el ``request.args`` de cada uno
+# y ``data`` el cuerpo JSON ya leído. Cada aplicación solo hace las llamadas
+# a la base de datos (con o sin await) y el jsonify.
+
+# Paginación por cursor
+LIMITE_MAXIMO_PAGINA = 5000
+
+def leer_paginacion(args):
+    """Lee limit/after_id de la query string; limit=None significa sin paginar"""
+    limite = args.get('limit', type=int)
+    despues_de = args.get('after_id', type=int)
+    if limite is not None:
+        limite = max(1, min(limite, LIMITE_MAXIMO_PAGINA))
+    return limite, despues_de
+
+# Columnas candidatas a codificarse con diccionario en format=columnar
+COLUMNAS_DICCIONARIO = {
+    'usuarios': ('nombre', 'apellido', 'edad', 'fecha_creacion'),
+    'correos': ('tipo', 'nombre', 'apellido', 'fecha_creacion')
+}
+
+def leer_formato(args):
+    """True si se pide format=columnar; ValueError si el formato no existe"""
+    formato = args.get('format', 'filas')
+    if formato not in ('filas', 'columnar'):
+        raise ValueError(f"format desconocido: {formato}")
+    return formato == 'columnar'
+
+def respuesta_lista(clave, filas, columnar):
+    """Lista completa, como array de objetos o en formato columnar"""
+    return a_columnar(filas, COLUMNAS_DICCIONARIO[clave]) if columnar else filas
+
+def respuesta_paginada(clave, filas, limite, columnar=False):
+    """Recibe hasta limite+1 filas y construye la página con su next_cursor"""
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+    cursor = filas[-1]['id'] if hay_mas else None
+    if columnar:
+        return {**a_columnar(filas, COLUMNAS_DICCIONARIO[clave]), 'next_cursor': cursor}
+    return {
+        clave: filas,
+        'next_cursor': cursor
+    }
+
+def leer_listado(args, leer_filtros):
+    """Filtros, formato y paginación de /usuarios o /correos; ValueError si un filtro no es válido"""
+    filtros = leer_filtros(args)
+    columnar = leer_formato(args)
+    limite, despues_de = leer_paginacion(args)
+    return filtros, columnar, limite, despues_de
+
+def filas_a_consultar(limite):
+    """Filas que se piden a la base de datos: una más que la página para saber si hay otra"""
+    return None if limite is None else limite + 1
+
+def respuesta_listado(clave, filas, limite, columnar):
+    """Página con su next_cursor si se pidió limit, si no la lista completa"""
+    if limite is None:
+        return respuesta_lista(clave, filas, columnar)
+    return respuesta_paginada(clave, filas, limite, columnar)
+
+def calcular_etag(ruta, query_string, estado):
+    """ETag de una lista: la ruta y la query string con la huella de las tablas"""
+    huella = f"{ruta}?{query_string.decode()}|{estado}"
+    return hashlib.sha1(huella.encode()).hexdigest()
+
+def etag_coincidente(if_none_match, etag):
+    """Variante del ETag (sin comprimir o por codificación) que ya tiene el cliente, o None"""
+    variantes = [etag] + [f"{etag}-{c}" for c in codificaciones_disponibles()]
+    return next((v for v in variantes if if_none_match.contains(v)), None)
+
+def etag_peticion(peticion, estado):
+    """ETag de la petición para ``estado`` y la variante que ya tiene el cliente (o None)"""
+    etag = calcular_etag(peticion.path, peticion.query_string, estado)
+    # Cada codificación de la respuesta lleva su propia variante del ETag
+    return etag, etag_coincidente(peticion.if_none_match, etag)
+
+def fijar_etag(respuesta, etag):
+    """Pone el ETag a la respuesta (200 o 304) de una lista"""
+    respuesta.set_etag(etag)
+    # El navegador puede guardar la lista pero debe revalidarla siempre
+    respuesta.headers['Cache-Control'] = 'no-cache'
+    return respuesta
+
+def leer_filtros_usuarios(args):
+    """Lee los filtros de /usuarios de la query string; ValueError si alguno no es válido"""
+    filtros = {}
+    for campo in ('nombre', 'apellido', 'q'):
+        valor = args.get(campo, '').strip()
+        if valor:
+            filtros[campo] = valor
+    for campo in ('edad_min', 'edad_max'):
+        if args.get(campo):
+            filtros[campo] = int(args[campo])
+    if args.get('desde'):
+        filtros['creado_desde'] = datetime.fromisoformat(args['desde'])
+    if args.get('hasta'):
+        hasta = datetime.fromisoformat(args['hasta'])
+        # Una fecha sin hora incluye el día completo
+        if len(args['hasta']) == 10:
+            hasta += timedelta(days=1)
+        filtros['creado_hasta'] = hasta
+    return filtros
+
+def leer_tipos_correo(args):
+    """Lee ``tipo`` (uno o varios separados por comas); ValueError si alguno no existe"""
+    if not args.get('tipo'):
+        return None
+    tipos = [t.strip() for t in args['tipo'].split(',') if t.strip()]
+    desconocidos = [t for t in tipos if t not in TIPOS_CORREO]
+    if desconocidos:
+        raise ValueError(f"tipo desconocido: {', '.join(desconocidos)}")
+    return tipos
+
+def leer_filtros_correos(args):
+    """Lee los filtros de /correos de la query string; ValueError si alguno no es válido"""
+    filtros = {}
+    tipos = leer_tipos_correo(args)
+    if args.get('usuario_id'):
+        filtros['usuario_id'] = int(args['usuario_id'])
+    if args.get('prefijo', '').strip():
+        filtros['prefijo'] = args['prefijo'].strip().lower()
+
+    dominio = args.get('dominio', '').strip().lower().lstrip('@')
+    if dominio:
+        # El dominio lo fija la plantilla de cada tipo: filtrar por tipo usa
+        # idx_tipo en lugar de un LIKE por sufijo que recorre toda la tabla
+        tipos_dominio = tipos_por_dominio(dominio)
+        if tipos_dominio:
+            tipos = [t for t in tipos_dominio if tipos is None or t in tipos]
+        else:
+            filtros['dominio'] = dominio
+    if tipos is not None:
+        filtros['tipos'] = tipos
+    return filtros
+
+# Exportación de /correos por trozos
+def modo_exportacion(args, tipo_preferido):
+    """'ndjson' o 'json' si se pide la exportación por trozos (stream=...), si no None"""
+    stream = args.get('stream')
+    if stream == 'ndjson' or tipo_preferido == 'application/x-ndjson':
+        return 'ndjson'
+    return 'json' if stream == '1' else None
+
+class ExportacionPorTrozos:
+    """Trozos de la exportación: una línea por fila (NDJSON) o un array JSON abierto y cerrado"""
+
+    def __init__(self, modo):
+        self.ndjson = modo == 'ndjson'
+        self.mimetype = 'application/x-ndjson' if self.ndjson else 'application/json'
+        self._separador = b'['
+
+    def trozo(self, filas):
+        if self.ndjson:
+            return b''.join(codificar(fila) + b'\n' for fila in filas)
+        trozo = self._separador + b','.join(codificar(fila) for fila in filas)
+        self._separador = b','
+        return trozo
+
+    def cierre(self):
+        """Último trozo; vacío en NDJSON (quien lo envía debe omitirlo)"""
+        if self.ndjson:
+            return b''
+        return b'[]' if self._separador == b'[' else b']'
+
+# Altas de usuarios
+def leer_usuario_nuevo(data):
+    """(nombre, apellido, edad) del cuerpo; ValueError si falta alguno"""
+    if not data:
+        raise ValueError('No JSON data provided')
+    nombre, apellido, edad = data.get('nombre'), data.get('apellido'), data.get('edad')
+    if not nombre or not apellido or not edad:
+        raise ValueError('Todos los campos son obligatorios')
+    return nombre, apellido, edad
+
+def respuesta_usuario_agregado(usuario_id, nombre, apellido, edad):
+    return {
+        'id': usuario_id,
+        'mensaje': 'Usuario agregado correctamente',
+        'usuario': {'id': usuario_id, 'nombre': nombre, 'apellido': apellido, 'edad': edad}
+    }
+
+def respuesta_usuarios_generados(usuarios_generados, tiempo, completa):
+    """Por defecto solo el resumen; las filas completas bajo petición"""
+    respuesta = {
+        'mensaje': f'Se generaron {len(usuarios_generados)} usuarios aleatorios',
+        'total': len(usuarios_generados),
+        'rangos_ids': comprimir_rangos(u['id'] for u in usuarios_generados),
+        'tiempo': tiempo
+    }
+    if completa:
+        respuesta['usuarios'] = usuarios_generados
+    return respuesta
+
+# Trabajos en segundo plano
+def respuesta_trabajo(job, mensaje):
+    """Cuerpo del 202 de una operación encolada; el progreso se consulta en /jobs/<id>"""
+    return {
+        'mensaje': mensaje,
+        'job_id': job.id,
+        'estado': job.estado,
+        'url': f'/jobs/{job.id}'
+    }
+
+def leer_opciones_borrado(args):
+    """(ids_por_lote, truncar) del vaciado de una tabla: ``lote`` y ``truncate=1``"""
+    ids_por_lote = args.get('lote', type=int)
+    if ids_por_lote is not None:
+        ids_por_lote = max(1, ids_por_lote)
+    return ids_por_lote, args.get('truncate') == '1'
+
+# Borrado de varios usuarios en una sola petición
+MAXIMO_IDS_POR_PETICION = 50000
+
+def leer_ids_a_eliminar(data):
+    """Lee ``ids`` (lista) o ``desde``/``hasta`` (rango inclusivo) del cuerpo.
+
+    Devuelve (ids, None) o (None, (desde, hasta)); ValueError si no son válidos.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Se esperaba un objeto JSON con ids o desde/hasta")
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise ValueError("ids debe ser una lista de enteros")
+        if len(ids) > MAXIMO_IDS_POR_PETICION:
+            raise ValueError(f"Como máximo {MAXIMO_IDS_POR_PETICION} ids por petición")
+        return ids, None
+    if 'desde' in data and 'hasta' in data:
+        desde, hasta = int(data['desde']), int(data['hasta'])
+        if desde > hasta:
+            raise ValueError("desde no puede ser mayor que hasta")
+        return None, (desde, hasta)
+    raise ValueError("Indique ids o desde/hasta")
+
+# Generación de correos
+def leer_opciones_generacion(args, data, maximo_procesos):
+    """Opciones de /generar-correos de la query string y del cuerpo.
+
+    Devuelve (tipos, en_segundo_plano, incremental, procesos), con procesos
+    None si no se pide la generación en paralelo; ValueError si procesos no
+    es válido.
+    """
+    data = data or {}
+    procesos = maximo_procesos if args.get('paralelo') == '1' else None
+    if data.get('paralelo'):
+        procesos = leer_procesos(data.get('procesos'), maximo_procesos)
+    return (
+        data.get('tipos'),
+        args.get('async') == '1' or bool(data.get('async')),
+        args.get('incremental') == '1' or bool(data.get('incremental')),
+        procesos
+    )
+
+def respuesta_generacion(resumen, tiempo, correos=None):
+    """Cuerpo de /generar-correos: el resumen y, si se pidieron, las filas creadas"""
+    respuesta = {
+        'mensaje': f"Se generaron {resumen['total_correos']} correos electrónicos en {tiempo:.2f} segundos",
+        **resumen,
+        'tiempo': tiempo
+    }
+    if correos is not None:
+        respuesta['correos'] = correos
+    return respuesta
+
+def leer_procesos(valor, maximo):
+    """Procesos pedidos para la generación en paralelo, acotados a [1, maximo].
+
+    Sin valor se usan ``maximo``; ValueError si no es un entero positivo.
+    """
+    if valor is None or valor == '':
+        return maximo
+    if isinstance(valor, bool) or not isinstance(valor, (int, str)):
+        raise ValueError("procesos debe ser un entero positivo")
+    procesos = int(valor)
+    if procesos < 1:
+        raise ValueError("procesos debe ser un entero positivo")
+    return min(procesos, maximo)
+
+# Modo de respuesta de los endpoints de generación
+def respuesta_completa(args, data=None):
+    """True si el cliente pide explícitamente todas las filas creadas (respuesta=completa)"""
+    if args.get('respuesta') == 'completa':
+        return True
+    return bool(data) and data.get('respuesta') == 'completa'
+
+def comprimir_rangos(ids):
+    """Convierte una lista de ids en rangos [desde, hasta] de ids consecutivos"""
+    rangos = []
+    for usuario_id in sorted(ids):
+        if rangos and usuario_id == rangos[-1][1] + 1:
+            rangos[-1][1] = usuario_id
+        else:
+            rangos.append([usuario_id, usuario_id])
+    return rangos
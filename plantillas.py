@@ -0,0 +1,100 @@
+import re
+import string
+from functools import lru_cache
+
+# Formato de cada tipo de correo. Campos disponibles: nombre, apellido,
+# inicial_nombre e inicial_apellido (ya normalizados).
+PLANTILLAS_CORREO = {
+    'gmail': '{nombre}.{apellido}@gmail.com',
+    'outlook': '{nombre}_{apellido}@outlook.com',
+    'hotmail': '{inicial_nombre}{apellido}@hotmail.com',
+    'yahoo': '{nombre}-{apellido}@yahoo.com',
+    'empresa': '{inicial_nombre}.{apellido}@empresa.com',
+    'custom1': '{nombre}{apellido}@custom.com',
+    'custom2': '{apellido}.{nombre}@company.com',
+    'custom3': '{inicial_nombre}{inicial_apellido}@corporate.com'
+}
+
+TIPOS_CORREO = list(PLANTILLAS_CORREO)
+
+CAMPOS_PLANTILLA = ('nombre', 'apellido', 'inicial_nombre', 'inicial_apellido')
+
+_REGEX_LIMPIAR = re.compile(r'[^a-zA-Z]')
+
+
+def compilar_plantilla(plantilla):
+    """Valida una plantilla una sola vez y devuelve su formateador"""
+    for _, campo, especificacion, conversion in string.Formatter().parse(plantilla):
+        if campo is None:
+            continue
+        if campo not in CAMPOS_PLANTILLA or especificacion or conversion:
+            raise ValueError(f"Campo de plantilla no válido: {{{campo}}} en '{plantilla}'")
+    return plantilla.format_map
+
+
+def tipos_por_dominio(dominio, plantillas=None):
+    """Tipos cuya plantilla produce direcciones del dominio dado"""
+    plantillas = plantillas or PLANTILLAS_CORREO
+    sufijo = '@' + dominio.lower()
+    return [tipo for tipo, plantilla in plantillas.items() if plantilla.endswith(sufijo)]
+
+
+def normalizar_nombre(nombre, apellido):
+    """Quita todo lo que no sea una letra ASCII y pasa a minúsculas"""
+    nombre_limpio = _REGEX_LIMPIAR.sub('', nombre).lower()
+    apellido_limpio = _REGEX_LIMPIAR.sub('', apellido).lower()
+    return {
+        'nombre': nombre_limpio,
+        'apellido': apellido_limpio,
+        'inicial_nombre': nombre_limpio[0] if nombre_limpio else 'a',
+        'inicial_apellido': apellido_limpio[0] if apellido_limpio else 'b'
+    }
+
+
+class MotorPlantillas:
+    """OPTIMIZACIÓN: Genera correos con plantillas precompiladas y caché LRU.
+
+    Cada tipo se compila una vez al crear el motor, y las direcciones de cada
+    combinación (nombre, apellido) se calculan una sola vez y se guardan en
+    una caché acotada: con nombres repetidos el coste por usuario es una
+    búsqueda en un diccionario.
+    """
+
+    def __init__(self, plantillas=None, tamano_cache=4096):
+        plantillas = plantillas or PLANTILLAS_CORREO
+        self.tipos = tuple(plantillas)
+        self._formateadores = tuple(compilar_plantilla(plantillas[tipo]) for tipo in self.tipos)
+        self._correos_cacheados = lru_cache(maxsize=tamano_cache)(self._calcular_correos)
+
+    def _calcular_correos(self, nombre, apellido):
+        partes = normalizar_nombre(nombre, apellido)
+        return tuple(formatear(partes) for formatear in self._formateadores)
+
+    def generar(self, nombre, apellido):
+        """Devuelve {tipo: correo} para un usuario"""
+        return dict(zip(self.tipos, self._correos_cacheados(nombre, apellido)))
+
+    def generar_lote(self, usuarios, tipos=None):
+        """Genera las filas {usuario_id, tipo, correo} de un lote de usuarios"""
+        indices = [
+            (i, tipo) for i, tipo in enumerate(self.tipos)
+            if not tipos or tipo in tipos
+        ]
+        correos_cacheados = self._correos_cacheados
+        filas = []
+        agregar = filas.append
+        for usuario in usuarios:
+            correos = correos_cacheados(usuario['nombre'], usuario['apellido'])
+            usuario_id = usuario['id']
+            for i, tipo in indices:
+                agregar({'usuario_id': usuario_id, 'tipo': tipo, 'correo': correos[i]})
+        return filas
+
+    def estadisticas_cache(self):
+        info = self._correos_cacheados.cache_info()
+        return {
+            'aciertos': info.hits,
+            'fallos': info.misses,
+            'tamano': info.currsize,
+            'tamano_maximo': info.maxsize
+        }
@@ -0,0 +1,231 @@
+import os
+import threading
+import time
+from collections import deque
+
+from metricas import POOL_ESPERA
+
+
+class PoolExhaustedError(Exception):
+    """No se pudo obtener una conexión del pool dentro del tiempo de espera"""
+
+
+class PooledConnection:
+    """Envoltorio de una conexión prestada por el pool.
+
+    Delega todo en la conexión real; ``close()`` la devuelve al pool en
+    lugar de cerrarla, así el código existente sigue funcionando igual.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @property
+    def cerrada(self):
+        return self._raw is None
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool._devolver(raw)
+
+    def invalidar(self):
+        """Cierra la conexión real y libera su hueco sin devolverla al pool"""
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool._devolver(raw, reutilizable=False)
+
+    def __getattr__(self, nombre):
+        if self._raw is None:
+            raise AttributeError(f"Conexión ya devuelta al pool ('{nombre}')")
+        return getattr(self._raw, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """Pool de conexiones thread-safe con overflow y tiempo de espera.
+
+    Mantiene hasta ``tamano`` conexiones abiertas de forma persistente y
+    permite hasta ``max_overflow`` conexiones extra temporales cuando todas
+    están ocupadas. Si se alcanza el límite, ``checkout`` espera hasta
+    ``timeout`` segundos antes de lanzar ``PoolExhaustedError``.
+    """
+
+    def __init__(self, nombre, fabrica, tamano=10, max_overflow=5, timeout=30.0, reciclar=300.0):
+        self.nombre = nombre
+        self.tamano = tamano
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.reciclar = reciclar
+        self._fabrica = fabrica
+        self._libres = deque()
+        self._en_uso = 0
+        self._cond = threading.Condition()
+
+        # Telemetría
+        self._checkouts = 0
+        self._esperas = 0
+        self._tiempo_espera = 0.0
+        self._agotamientos = 0
+        self._creadas = 0
+        self._descartadas = 0
+        self._max_en_uso = 0
+
+    def checkout(self):
+        """Presta una conexión; crea una nueva si hay hueco en el pool"""
+        inicio = time.monotonic()
+        espero = False
+        raw = None
+        ultimo_uso = None
+
+        with self._cond:
+            while True:
+                if self._libres:
+                    raw, ultimo_uso = self._libres.pop()
+                    break
+                if self._en_uso + len(self._libres) < self.tamano + self.max_overflow:
+                    break
+                restante = self.timeout - (time.monotonic() - inicio)
+                if restante <= 0:
+                    self._agotamientos += 1
+                    raise PoolExhaustedError(
+                        f"Pool '{self.nombre}' agotado: {self._en_uso} conexiones en uso "
+                        f"(tamaño={self.tamano}, overflow={self.max_overflow})"
+                    )
+                espero = True
+                self._cond.wait(restante)
+
+            self._en_uso += 1
+            self._checkouts += 1
+            self._max_en_uso = max(self._max_en_uso, self._en_uso)
+            espera = time.monotonic() - inicio
+            if espero:
+                self._esperas += 1
+                self._tiempo_espera += espera
+        POOL_ESPERA.observe(espera, pool=self.nombre)
+
+        # La creación y validación se hacen fuera del lock
+        try:
+            if raw is None:
+                raw = self._crear()
+            elif self.reciclar and time.monotonic() - ultimo_uso > self.reciclar:
+                raw = self._validar(raw)
+        except Exception:
+            with self._cond:
+                self._en_uso -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, raw)
+
+    def _crear(self):
+        raw = self._fabrica()
+        with self._cond:
+            self._creadas += 1
+        return raw
+
+    def _validar(self, raw):
+        """Comprueba una conexión que lleva tiempo inactiva; la sustituye si está caída"""
+        try:
+            raw.ping(reconnect=False)
+            return raw
+        except Exception:
+            self._cerrar(raw)
+            return self._crear()
+
+    def _devolver(self, raw, reutilizable=True):
+        if reutilizable:
+            try:
+                if getattr(raw, 'in_transaction', False):
+                    raw.rollback()
+            except Exception:
+                reutilizable = False
+
+        descartar = None
+        with self._cond:
+            self._en_uso -= 1
+            if reutilizable and len(self._libres) < self.tamano:
+                self._libres.append((raw, time.monotonic()))
+            else:
+                descartar = raw
+            self._cond.notify()
+
+        if descartar is not None:
+            self._cerrar(descartar)
+
+    def _cerrar(self, raw):
+        with self._cond:
+            self._descartadas += 1
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def cerrar(self):
+        """Cierra todas las conexiones inactivas del pool"""
+        with self._cond:
+            libres = [raw for raw, _ in self._libres]
+            self._libres.clear()
+        for raw in libres:
+            self._cerrar(raw)
+
+    def estadisticas(self):
+        with self._cond:
+            return {
+                'nombre': self.nombre,
+                'tamano': self.tamano,
+                'max_overflow': self.max_overflow,
+                'timeout': self.timeout,
+                'en_uso': self._en_uso,
+                'libres': len(self._libres),
+                'max_en_uso': self._max_en_uso,
+                'checkouts': self._checkouts,
+                'esperas': self._esperas,
+                'tiempo_espera_total': round(self._tiempo_espera, 6),
+                'agotamientos': self._agotamientos,
+                'conexiones_creadas': self._creadas,
+                'conexiones_descartadas': self._descartadas
+            }
+
+
+# Registro de pools del proceso: un pool por nombre, compartido por todas
+# las instancias de Database que usen el mismo nombre.
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+def obtener_pool(nombre, fabrica, **opciones):
+    """Devuelve el pool registrado con ese nombre, creándolo la primera vez"""
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Proceso hijo creado con fork: las conexiones heredadas son del
+            # padre y no se pueden compartir, se empieza con pools nuevos
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(nombre)
+        if pool is None:
+            pool = ConnectionPool(nombre, fabrica, **opciones)
+            _pools[nombre] = pool
+        return pool
+
+
+def cerrar_pools():
+    """Cierra y olvida todos los pools registrados"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.cerrar()
@@ -0,0 +1,196 @@
+import asyncio
+import time
+from collections import deque
+
+from metricas import POOL_ESPERA
+from pool import PoolExhaustedError
+
+
+class PooledConnectionAsync:
+    """Conexión prestada por un PoolAsync.
+
+    Como PooledConnection, delega en la conexión real y ``close()`` la
+    devuelve al pool. Se puede usar con ``async with``.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @property
+    def cerrada(self):
+        return self._raw is None
+
+    async def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            await self._pool._devolver(raw)
+
+    async def invalidar(self):
+        """Cierra la conexión real y libera su hueco sin devolverla al pool"""
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            await self._pool._devolver(raw, reutilizable=False)
+
+    def __getattr__(self, nombre):
+        if self._raw is None:
+            raise AttributeError(f"Conexión ya devuelta al pool ('{nombre}')")
+        return getattr(self._raw, nombre)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
+
+
+class PoolAsync:
+    """OPTIMIZACIÓN: Pool de conexiones asyncio con la misma política que ConnectionPool.
+
+    Esperar una conexión libre no bloquea ningún hilo: la corrutina se
+    suspende y el bucle de eventos sigue atendiendo otras peticiones.
+    ``fabrica`` es una corrutina que abre una conexión nueva. El pool
+    pertenece al bucle de eventos en el que se usa por primera vez.
+    """
+
+    def __init__(self, nombre, fabrica, tamano=10, max_overflow=5, timeout=30.0, reciclar=300.0):
+        self.nombre = nombre
+        self.tamano = tamano
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.reciclar = reciclar
+        self._fabrica = fabrica
+        self._libres = deque()
+        self._en_uso = 0
+        self._cond = asyncio.Condition()
+
+        # Telemetría
+        self._checkouts = 0
+        self._esperas = 0
+        self._tiempo_espera = 0.0
+        self._agotamientos = 0
+        self._creadas = 0
+        self._descartadas = 0
+        self._max_en_uso = 0
+
+    async def checkout(self):
+        """Presta una conexión; crea una nueva si hay hueco en el pool"""
+        inicio = time.monotonic()
+        espero = False
+        raw = None
+        ultimo_uso = None
+
+        async with self._cond:
+            while True:
+                if self._libres:
+                    raw, ultimo_uso = self._libres.pop()
+                    break
+                if self._en_uso + len(self._libres) < self.tamano + self.max_overflow:
+                    break
+                restante = self.timeout - (time.monotonic() - inicio)
+                if restante <= 0:
+                    self._agotamientos += 1
+                    raise PoolExhaustedError(
+                        f"Pool '{self.nombre}' agotado: {self._en_uso} conexiones en uso "
+                        f"(tamaño={self.tamano}, overflow={self.max_overflow})"
+                    )
+                espero = True
+                try:
+                    await asyncio.wait_for(self._cond.wait(), restante)
+                except asyncio.TimeoutError:
+                    pass
+
+            self._en_uso += 1
+            self._checkouts += 1
+            self._max_en_uso = max(self._max_en_uso, self._en_uso)
+            espera = time.monotonic() - inicio
+            if espero:
+                self._esperas += 1
+                self._tiempo_espera += espera
+        POOL_ESPERA.observe(espera, pool=self.nombre)
+
+        # La creación y validación se hacen fuera del lock
+        try:
+            if raw is None:
+                raw = await self._crear()
+            elif self.reciclar and time.monotonic() - ultimo_uso > self.reciclar:
+                raw = await self._validar(raw)
+        except BaseException:
+            async with self._cond:
+                self._en_uso -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnectionAsync(self, raw)
+
+    async def _crear(self):
+        raw = await self._fabrica()
+        self._creadas += 1
+        return raw
+
+    async def _validar(self, raw):
+        """Comprueba una conexión que lleva tiempo inactiva; la sustituye si está caída"""
+        try:
+            await raw.ping(reconnect=False)
+            return raw
+        except Exception:
+            await self._cerrar(raw)
+            return await self._crear()
+
+    async def _devolver(self, raw, reutilizable=True):
+        if reutilizable:
+            try:
+                if getattr(raw, 'in_transaction', False):
+                    await raw.rollback()
+            except Exception:
+                reutilizable = False
+
+        descartar = None
+        async with self._cond:
+            self._en_uso -= 1
+            if reutilizable and len(self._libres) < self.tamano:
+                self._libres.append((raw, time.monotonic()))
+            else:
+                descartar = raw
+            self._cond.notify()
+
+        if descartar is not None:
+            await self._cerrar(descartar)
+
+    async def _cerrar(self, raw):
+        self._descartadas += 1
+        try:
+            await raw.close()
+        except Exception:
+            pass
+
+    async def cerrar(self):
+        """Cierra todas las conexiones inactivas del pool"""
+        async with self._cond:
+            libres = [raw for raw, _ in self._libres]
+            self._libres.clear()
+        for raw in libres:
+            await self._cerrar(raw)
+
+    def estadisticas(self):
+        # Sin lock: en un solo bucle de eventos nadie modifica los contadores a la vez
+        return {
+            'nombre': self.nombre,
+            'tamano': self.tamano,
+            'max_overflow': self.max_overflow,
+            'timeout': self.timeout,
+            'en_uso': self._en_uso,
+            'libres': len(self._libres),
+            'max_en_uso': self._max_en_uso,
+            'checkouts': self._checkouts,
+            'esperas': self._esperas,
+            'tiempo_espera_total': round(self._tiempo_espera, 6),
+            'agotamientos': self._agotamientos,
+            'conexiones_creadas': self._creadas,
+            'conexiones_descartadas': self._descartadas
+        }
@@ -0,0 +1,105 @@
+"""Servidor de producción de app.py: gunicorn con varios procesos e hilos.
+
+El proceso maestro no importa la aplicación: cada worker llama a
+create_app después del fork, así tiene sus propios pools de conexiones, su
+caché y su cola de trabajos, y un ``kill -HUP`` al maestro arranca workers
+con el código nuevo antes de parar los antiguos (recarga sin cortes).
+
+Configuración por variables de entorno, además de las CRM_* de app.py:
+
+- CRM_BIND: dirección de escucha (``0.0.0.0:$CRM_PUERTO``, 5000 por defecto).
+- CRM_WORKERS: procesos (núcleos de la máquina por defecto).
+- CRM_THREADS: hilos por proceso (4 por defecto). Si no se fija
+  CRM_POOL_SIZE, el pool de cada worker tiene una conexión por hilo.
+- CRM_TIMEOUT / CRM_GRACEFUL_TIMEOUT: segundos antes de matar un worker
+  bloqueado / de esperar a las peticiones en curso al parar o recargar.
+- CRM_MAX_REQUESTS: peticiones tras las que se recicla un worker (0, nunca).
+
+Los trabajos en segundo plano (/jobs) y las métricas (/metrics) son de cada
+worker. Ejecución: ``python servidor.py``.
+"""
+import os
+import sys
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError as e:
+    raise ImportError("servidor.py necesita gunicorn: pip install gunicorn") from e
+
+
+def opciones_entorno():
+    """Opciones de gunicorn leídas de las variables de entorno"""
+    hilos = int(os.environ.get('CRM_THREADS', 4))
+    max_requests = int(os.environ.get('CRM_MAX_REQUESTS', 0))
+    return {
+        'bind': os.environ.get('CRM_BIND', f"0.0.0.0:{os.environ.get('CRM_PUERTO', 5000)}"),
+        'workers': int(os.environ.get('CRM_WORKERS', os.cpu_count() or 1)),
+        'threads': hilos,
+        # gthread: cada worker atiende ``threads`` peticiones a la vez
+        'worker_class': 'gthread' if hilos > 1 else 'sync',
+        'timeout': int(os.environ.get('CRM_TIMEOUT', 120)),
+        'graceful_timeout': int(os.environ.get('CRM_GRACEFUL_TIMEOUT', 30)),
+        'keepalive': int(os.environ.get('CRM_KEEPALIVE', 5)),
+        'max_requests': max_requests,
+        # Reparte los reciclados para que no coincidan todos los workers
+        'max_requests_jitter': max_requests // 10,
+        'preload_app': False
+    }
+
+
+def al_arrancar(server):
+    """Hook on_starting (maestro): avisa del total de conexiones a la base de datos"""
+    workers = server.cfg.workers
+    por_worker = int(os.environ.get('CRM_POOL_SIZE', server.cfg.threads)) + \
+        int(os.environ.get('CRM_POOL_OVERFLOW', 5))
+    server.log.info("CRM: %s workers x %s hilos, hasta %s conexiones a la base de datos",
+                    workers, server.cfg.threads, workers * por_worker)
+
+
+def al_salir_worker(server, worker):
+    """Hook worker_exit: cancela los trabajos y cierra las conexiones del worker"""
+    aplicacion = getattr(worker, 'wsgi', None)
+    if aplicacion is None:
+        return
+    from bitacora import detener_logging
+    from pool import cerrar_pools
+    aplicacion.extensions['crm'].cerrar(esperar=False)
+    cerrar_pools()
+    detener_logging()
+
+
+class ServidorCRM(BaseApplication):
+    """Aplicación de gunicorn que crea la app de Flask dentro de cada worker"""
+
+    def __init__(self, opciones=None):
+        self.opciones = {**opciones_entorno(), **(opciones or {})}
+        super().__init__()
+
+    def load_config(self):
+        for clave, valor in self.opciones.items():
+            self.cfg.set(clave, valor)
+        self.cfg.set('on_starting', al_arrancar)
+        self.cfg.set('worker_exit', al_salir_worker)
+
+    def load(self):
+        # Se ejecuta en el worker, después del fork
+        from app import create_app
+
+        config = {}
+        if 'CRM_POOL_SIZE' not in os.environ:
+            config['CRM_POOL_SIZE'] = self.cfg.threads
+        aplicacion = create_app(config)
+        # CREATE TABLE IF NOT EXISTS: idempotente aunque lo hagan todos los workers
+        aplicacion.extensions['crm'].db.crear_tablas()
+        return aplicacion
+
+
+def main():
+    if os.environ.get('CRM_BACKEND') == 'memoria' and opciones_entorno()['workers'] > 1:
+        # Cada worker tendría sus propios datos
+        sys.exit("El backend en memoria necesita CRM_WORKERS=1")
+    ServidorCRM().run()
+
+
+if __name__ == '__main__':
+    main()
@@ -14,10 +14,12 @@ document.addEventListener('DOMContentLoaded', function() {
     const formUser = document.getElementById('form-user');
     const btnCancelAdd = document.getElementById('btn-cancel-add');
     const usersTableBody = document.getElementById('users-table-body');
+    const btnLoadMoreUsers = document.getElementById('btn-load-more-users');
 
     // Gestión de Correos
     const emailsTableBody = document.getElementById('emails-table-body');
     const btnRefreshEmails = document.getElementById('btn-refresh-emails');
+    const btnLoadMoreEmails = document.getElementById('btn-load-more-emails');
 
     // Acciones
     const btnGenerateUsers = document.getElementById('btn-generate-users');
@@ -64,6 +66,11 @@ document.addEventListener('DOMContentLoaded', function() {
     let allUsers = [];
     let allEmails = [];
 
+    // Paginación por cursor
+    const PAGE_SIZE = 500;
+    let usersCursor = null;
+    let emailsCursor = null;
+
     // Inicializar
     initNavigation();
     loadDashboardData();
@@ -168,19 +175,59 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
-    function loadUsers() {
+    // Reconstruye los objetos de una respuesta format=columnar
+    function decodeColumnar(data) {
+        const columns = data.columns;
+        const dictionaries = data.dictionaries || {};
+        const decoders = columns.map(column => dictionaries[column]);
+        return data.rows.map(row => {
+            const item = {};
+            columns.forEach((column, i) => {
+                item[column] = decoders[i] ? decoders[i][row[i]] : row[i];
+            });
+            return item;
+        });
+    }
+
+    // Rangos del selector de edad traducidos a los filtros del servidor
+    const AGE_RANGES = {
+        '18-25': { edad_min: 18, edad_max: 25 },
+        '26-35': { edad_min: 26, edad_max: 35 },
+        '36-50': { edad_min: 36, edad_max: 50 },
+        '51+': { edad_min: 51 }
+    };
+
+    function usersQueryParams() {
+        const params = new URLSearchParams({ limit: PAGE_SIZE, format: 'columnar' });
+        const searchTerm = searchUsers.value.trim();
+        if (searchTerm) {
+            params.set('q', searchTerm);
+        }
+        const range = AGE_RANGES[filterAge.value] || {};
+        Object.entries(range).forEach(([key, value]) => params.set(key, value));
+        return params;
+    }
+
+    function loadUsers(append = false) {
         console.log("Cargando usuarios...");
-        fetch('/usuarios')
+        const params = usersQueryParams();
+        if (append && usersCursor !== null) {
+            params.set('after_id', usersCursor);
+        }
+        fetch(`/usuarios?${params}`)
             .then(response => {
                 if (!response.ok) {
                     throw new Error('La respuesta de la red no fue correcta');
                 }
                 return response.json();
             })
-            .then(users => {
-                console.log("Usuarios cargados:", users);
-                allUsers = users; // Guardar todos los usuarios
-                filterUsersTable(); // Aplicar filtros actuales
+            .then(page => {
+                const usuarios = decodeColumnar(page);
+                console.log("Usuarios cargados:", usuarios.length);
+                allUsers = append ? allUsers.concat(usuarios) : usuarios;
+                usersCursor = page.next_cursor;
+                btnLoadMoreUsers.classList.toggle('hidden', usersCursor === null);
+                filterUsersTable(); // Aplicar ordenamiento actual
             })
             .catch(error => {
                 console.error('Error cargando usuarios:', error);
@@ -194,36 +241,12 @@ document.addEventListener('DOMContentLoaded', function() {
             });
     }
 
-    // Funciones de filtrado para Usuarios
+    // La búsqueda y la edad se filtran en el servidor; aquí solo se ordena
     function filterUsersTable() {
-        const searchTerm = searchUsers.value.toLowerCase();
-        const ageFilter = filterAge.value;
         const sortBy = filterSort.value;
         
         let filteredUsers = [...allUsers];
         
-        // Aplicar búsqueda
-        if (searchTerm) {
-            filteredUsers = filteredUsers.filter(user => 
-                user.nombre.toLowerCase().includes(searchTerm) || 
-                user.apellido.toLowerCase().includes(searchTerm)
-            );
-        }
-        
-        // Aplicar filtro de edad
-        if (ageFilter) {
-            filteredUsers = filteredUsers.filter(user => {
-                const age = user.edad;
-                switch(ageFilter) {
-                    case '18-25': return age >= 18 && age <= 25;
-                    case '26-35': return age >= 26 && age <= 35;
-                    case '36-50': return age >= 36 && age <= 50;
-                    case '51+': return age >= 51;
-                    default: return true;
-                }
-            });
-        }
-        
         // Aplicar ordenamiento
         filteredUsers.sort((a, b) => {
             switch(sortBy) {
@@ -281,22 +304,44 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    btnLoadMoreUsers.addEventListener('click', () => loadUsers(true));
+
     // Funciones de Gestión de Correos
-    btnRefreshEmails.addEventListener('click', loadEmails);
+    btnRefreshEmails.addEventListener('click', () => loadEmails());
+    btnLoadMoreEmails.addEventListener('click', () => loadEmails(true));
 
-    function loadEmails() {
+    function emailsQueryParams() {
+        const params = new URLSearchParams({ limit: PAGE_SIZE, format: 'columnar' });
+        const searchTerm = searchEmails.value.trim();
+        if (searchTerm) {
+            params.set('prefijo', searchTerm);
+        }
+        if (filterProvider.value) {
+            params.set('tipo', filterProvider.value);
+        }
+        return params;
+    }
+
+    function loadEmails(append = false) {
         console.log("Cargando correos...");
-        fetch('/correos')
+        const params = emailsQueryParams();
+        if (append && emailsCursor !== null) {
+            params.set('after_id', emailsCursor);
+        }
+        fetch(`/correos?${params}`)
             .then(response => {
                 if (!response.ok) {
                     throw new Error('La respuesta de la red no fue correcta');
                 }
                 return response.json();
             })
-            .then(emails => {
-                console.log("Correos cargados:", emails);
-                allEmails = emails; // Guardar todos los correos
-                filterEmailsTable(); // Aplicar filtros actuales
+            .then(page => {
+                const correos = decodeColumnar(page);
+                console.log("Correos cargados:", correos.length);
+                allEmails = append ? allEmails.concat(correos) : correos;
+                emailsCursor = page.next_cursor;
+                btnLoadMoreEmails.classList.toggle('hidden', emailsCursor === null);
+                filterEmailsTable(); // Aplicar ordenamiento actual
             })
             .catch(error => {
                 console.error('Error cargando correos:', error);
@@ -311,27 +356,12 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // Funciones de filtrado para Correos
+    // La búsqueda (prefijo de la dirección) y el proveedor se filtran en el servidor
     function filterEmailsTable() {
-        const searchTerm = searchEmails.value.toLowerCase();
-        const providerFilter = filterProvider.value;
         const sortBy = filterSortEmails.value;
         
         let filteredEmails = [...allEmails];
         
-        // Aplicar búsqueda
-        if (searchTerm) {
-            filteredEmails = filteredEmails.filter(email => 
-                email.correo.toLowerCase().includes(searchTerm) ||
-                email.nombre.toLowerCase().includes(searchTerm) ||
-                email.apellido.toLowerCase().includes(searchTerm)
-            );
-        }
-        
-        // Aplicar filtro de proveedor
-        if (providerFilter) {
-            filteredEmails = filteredEmails.filter(email => email.tipo === providerFilter);
-        }
-        
         // Aplicar ordenamiento
         filteredEmails.sort((a, b) => {
             switch(sortBy) {
@@ -430,16 +460,11 @@ document.addEventListener('DOMContentLoaded', function() {
         console.log("Generando correos con tipos:", selectedTypes);
         showProgress('Generando correos...', 0);
         
-        let progress = 0;
-        const interval = setInterval(() => {
-            progress += 5;
-            if (progress <= 90) {
-                updateProgress('Generando correos...', progress);
-            }
-        }, 200);
-        
-        // Preparar datos para enviar
-        const requestData = selectedTypes ? { tipos: selectedTypes } : {};
+        // Preparar datos para enviar: trabajo en segundo plano que solo genera los correos que faltan
+        const requestData = { async: true, incremental: true };
+        if (selectedTypes) {
+            requestData.tipos = selectedTypes;
+        }
         
         fetch('/generar-correos', {
             method: 'POST',
@@ -455,29 +480,58 @@ document.addEventListener('DOMContentLoaded', function() {
             return response.json();
         })
         .then(data => {
-            clearInterval(interval);
-            console.log("Respuesta de generación de correos:", data);
-            
+            console.log("Trabajo de generación encolado:", data);
             if (data.error) {
                 throw new Error(data.error);
             }
+            return pollJob(data.job_id, 'Generando correos...');
+        })
+        .then(job => {
             updateProgress('¡Completado!', 100);
             setTimeout(() => {
                 hideProgress();
                 loadEmails();
                 loadDashboardData();
                 const typeMessage = selectedTypes ? `Tipos seleccionados (${selectedTypes.length})` : 'Todos';
-                showMessage(`Generados ${data.correos ? data.correos.length : 0} direcciones de correo (${typeMessage})`, 'success');
+                showMessage(`Generados ${job.filas_escritas} direcciones de correo (${typeMessage})`, 'success');
             }, 500);
         })
         .catch(error => {
-            clearInterval(interval);
             console.error('Error generando correos:', error);
             hideProgress();
             showMessage('Error generando correos: ' + error.message, 'error');
         });
     }
 
+    // Consulta el estado de un trabajo hasta que termina, actualizando el progreso real
+    function pollJob(jobId, title, interval = 500) {
+        return new Promise((resolve, reject) => {
+            const check = () => {
+                fetch(`/jobs/${jobId}`)
+                    .then(response => response.json())
+                    .then(job => {
+                        if (job.error && !job.estado) {
+                            throw new Error(job.error);
+                        }
+                        const eta = job.eta !== null ? ` · ETA ${Math.ceil(job.eta)}s` : '';
+                        updateProgress(`${title} ${job.procesados}/${job.total}${eta}`, Math.floor(job.progreso));
+                        
+                        if (job.estado === 'completado') {
+                            resolve(job);
+                        } else if (job.estado === 'fallido') {
+                            reject(new Error(job.error || 'El trabajo falló'));
+                        } else if (job.estado === 'cancelado') {
+                            reject(new Error('Trabajo cancelado'));
+                        } else {
+                            setTimeout(check, interval);
+                        }
+                    })
+                    .catch(reject);
+            };
+            check();
+        });
+    }
+
     btnClearUsers.addEventListener('click', function() {
         if (confirm('¿Estás seguro de que quieres eliminar TODOS los usuarios? Esta acción no se puede deshacer.')) {
             fetch('/usuarios/todos', {
@@ -490,13 +544,20 @@ document.addEventListener('DOMContentLoaded', function() {
                 return response.json();
             })
             .then(data => {
+                // El borrado se hace por lotes en segundo plano
+                showProgress('Eliminando usuarios...', 0);
+                return pollJob(data.job_id, 'Eliminando usuarios...');
+            })
+            .then(job => {
+                hideProgress();
                 loadUsers();
                 loadEmails();
                 loadDashboardData();
-                showMessage('Todos los usuarios eliminados correctamente', 'success');
+                showMessage(`Eliminados ${job.filas_escritas} usuarios`, 'success');
             })
             .catch(error => {
                 console.error('Error eliminando usuarios:', error);
+                hideProgress();
                 showMessage('Error eliminando usuarios: ' + error.message, 'error');
             });
         }
@@ -514,12 +575,18 @@ document.addEventListener('DOMContentLoaded', function() {
                 return response.json();
             })
             .then(data => {
+                showProgress('Eliminando correos...', 0);
+                return pollJob(data.job_id, 'Eliminando correos...');
+            })
+            .then(job => {
+                hideProgress();
                 loadEmails();
                 loadDashboardData();
                 showMessage('Todos los correos eliminados correctamente', 'success');
             })
             .catch(error => {
                 console.error('Error eliminando correos:', error);
+                hideProgress();
                 showMessage('Error eliminando correos: ' + error.message, 'error');
             });
         }
@@ -552,7 +619,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 hideProgress();
                 loadUsers();
                 loadDashboardData();
-                showMessage(`Generados ${data.usuarios ? data.usuarios.length : 0} usuarios aleatorios`, 'success');
+                showMessage(`Generados ${data.total || 0} usuarios aleatorios`, 'success');
             }, 500);
         })
         .catch(error => {
@@ -564,34 +631,21 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Funciones del Panel Principal
     function loadDashboardData() {
-        // Cargar conteo de usuarios
-        fetch('/usuarios')
+        // Un único endpoint con los conteos agregados en el servidor
+        fetch('/stats')
             .then(response => response.json())
-            .then(users => {
-                if (Array.isArray(users)) {
-                    totalUsersCount.textContent = users.length;
-                    usersGrowth.textContent = `+${users.length}`;
+            .then(stats => {
+                if (stats.error) {
+                    throw new Error(stats.error);
                 }
+                totalUsersCount.textContent = stats.total_usuarios;
+                usersGrowth.textContent = `+${stats.total_usuarios}`;
+                totalEmailsCount.textContent = stats.total_correos;
+                emailsGrowth.textContent = `+${stats.total_correos}`;
+                providersCount.textContent = `${Object.keys(stats.correos_por_tipo).length} Tipos`;
             })
             .catch(error => {
-                console.error('Error cargando conteo de usuarios:', error);
-            });
-        
-        // Cargar conteo de correos
-        fetch('/correos')
-            .then(response => response.json())
-            .then(emails => {
-                if (Array.isArray(emails)) {
-                    totalEmailsCount.textContent = emails.length;
-                    emailsGrowth.textContent = `+${emails.length}`;
-                    
-                    // Contar proveedores únicos
-                    const uniqueProviders = new Set(emails.map(email => email.tipo));
-                    providersCount.textContent = `${uniqueProviders.size} Tipos`;
-                }
-            })
-            .catch(error => {
-                console.error('Error cargando conteo de correos:', error);
+                console.error('Error cargando estadísticas:', error);
             });
     }
 
@@ -635,11 +689,20 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // Event listeners para filtros
-    searchUsers.addEventListener('input', filterUsersTable);
-    filterAge.addEventListener('change', filterUsersTable);
+    // Esperar a que el usuario deje de escribir antes de consultar al servidor
+    let searchUsersTimer = null;
+    searchUsers.addEventListener('input', function() {
+        clearTimeout(searchUsersTimer);
+        searchUsersTimer = setTimeout(() => loadUsers(), 300);
+    });
+    filterAge.addEventListener('change', () => loadUsers());
     filterSort.addEventListener('change', filterUsersTable);
-    searchEmails.addEventListener('input', filterEmailsTable);
-    filterProvider.addEventListener('change', filterEmailsTable);
+    let searchEmailsTimer = null;
+    searchEmails.addEventListener('input', function() {
+        clearTimeout(searchEmailsTimer);
+        searchEmailsTimer = setTimeout(() => loadEmails(), 300);
+    });
+    filterProvider.addEventListener('change', () => loadEmails());
     filterSortEmails.addEventListener('change', filterEmailsTable);
 
     // Funciones globales
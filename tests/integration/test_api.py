@@ -76,7 +76,7 @@ class TestCRMAPIIntegration(unittest.TestCase):
         
         response = self.session.post(
             f"{self.BASE_URL}/usuarios/aleatorios",
-            json={"cantidad": 5},
+            json={"cantidad": 5, "respuesta": "completa"},
             headers={"Content-Type": "application/json"}
         )
         
@@ -114,7 +114,11 @@ class TestCRMAPIIntegration(unittest.TestCase):
         
         # Generar correos
         start_time = time.time()
-        response = self.session.post(f"{self.BASE_URL}/generar-correos")
+        response = self.session.post(
+            f"{self.BASE_URL}/generar-correos",
+            json={"respuesta": "completa"},
+            headers={"Content-Type": "application/json"}
+        )
         end_time = time.time()
         
         self.assertEqual(response.status_code, 200)
@@ -142,7 +146,7 @@ class TestCRMAPIIntegration(unittest.TestCase):
         # Generar múltiples usuarios
         response = self.session.post(
             f"{self.BASE_URL}/usuarios/aleatorios",
-            json={"cantidad": 10},
+            json={"cantidad": 10, "respuesta": "completa"},
             headers={"Content-Type": "application/json"}
         )
         
@@ -155,12 +159,13 @@ class TestCRMAPIIntegration(unittest.TestCase):
         
         print(f"✅ Generados {len(users_data['usuarios'])} usuarios para prueba masiva")
         
-        # Generar correos para todos
+        # Generar correos para todos (solo resumen)
         response = self.session.post(f"{self.BASE_URL}/generar-correos")
         self.assertEqual(response.status_code, 200)
         emails_data = response.json()
+        self.assertNotIn('correos', emails_data)
         
-        print(f"✅ Generados {len(emails_data['correos'])} correos en operación masiva")
+        print(f"✅ Generados {emails_data['total_correos']} correos en operación masiva")
         
         # Verificar estadísticas
         response = self.session.get(f"{self.BASE_URL}/usuarios")
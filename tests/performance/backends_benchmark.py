@@ -0,0 +1,56 @@
+import shutil
+import sys
+import os
+import tempfile
+import time
+
+# Agregar la raíz del proyecto al path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from database import crear_database
+from generacion import usuarios_aleatorios
+from plantillas import TIPOS_CORREO
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+def ejecutar(nombre, db, usuarios):
+    """Alta por lotes, correos por lotes y las lecturas de las páginas más usadas"""
+    db.crear_tablas()
+    db.eliminar_todos_usuarios()
+
+    t_usuarios, ids = medir(lambda: db.agregar_usuarios_lote(usuarios))
+    correos = [
+        {'usuario_id': usuario_id, 'tipo': tipo, 'correo': f"{usuario_id}.{tipo}@example.com"}
+        for usuario_id in ids for tipo in TIPOS_CORREO[:2]
+    ]
+    t_correos, _ = medir(lambda: db.guardar_correos_lote(correos))
+    # Sin caché: cada lectura va al backend
+    db.cache.limpiar()
+    t_pagina, _ = medir(lambda: [db.obtener_usuarios(limite=100, filtros={'nombre': 'Ma'}) for _ in range(100)])
+    t_recorrido, _ = medir(lambda: sum(len(lote) for lote in db.iterar_correos(tamano_lote=5000)))
+    t_estadisticas, _ = medir(lambda: db.obtener_estadisticas(ttl=0))
+    db.eliminar_todos_usuarios()
+
+    print(f" {nombre:<8} usuarios {t_usuarios:7.3f}s  correos {t_correos:7.3f}s  "
+          f"100 páginas {t_pagina:7.3f}s  recorrido {t_recorrido:7.3f}s  estadísticas {t_estadisticas:7.3f}s")
+
+def main(cantidad=20000):
+    usuarios = usuarios_aleatorios(cantidad)
+    directorio = tempfile.mkdtemp()
+
+    print(f"BENCHMARK DE BACKENDS ({cantidad} usuarios, {2 * cantidad} correos)")
+    print("=" * 60)
+    try:
+        ejecutar('memoria', crear_database('memoria'), usuarios)
+        ejecutar('sqlite', crear_database('sqlite', sqlite_ruta=os.path.join(directorio, 'crm.sqlite3')), usuarios)
+        # MySQL se mide con load_test.py contra el servidor: aquí se vaciarían sus tablas
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
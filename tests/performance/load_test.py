@@ -84,7 +84,7 @@ class LoadTester:
             
             if response.status_code == 200:
                 data = response.json()
-                users_created = len(data.get('usuarios', []))
+                users_created = data.get('total', 0)
                 time_per_user = batch_time / users_created if users_created > 0 else 0
                 
                 print(f"✅ Lote de {users_created} usuarios: {batch_time:.3f}s total")
@@ -116,7 +116,7 @@ class LoadTester:
             
             if response.status_code == 200:
                 data = response.json()
-                emails_generated = len(data.get('correos', []))
+                emails_generated = data.get('total_correos', 0)
                 time_per_email = generation_time / emails_generated if emails_generated > 0 else 0
                 
                 self.results['email_generation'] = {
@@ -199,10 +199,10 @@ class LoadTester:
             print(f" Tiempo máximo: {max_time:.3f}s")
             print(f" Tiempo mínimo: {min_time:.3f}s")
         
-        # Limpiar usuarios creados
-        for user_id in user_ids:
+        # Limpiar usuarios creados en una sola petición
+        if user_ids:
             try:
-                requests.delete(f"{self.base_url}/usuarios/{user_id}")
+                requests.delete(f"{self.base_url}/usuarios", json={"ids": user_ids}, timeout=30)
             except:
                 pass
         
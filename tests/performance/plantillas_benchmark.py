@@ -0,0 +1,83 @@
+import random
+import re
+import sys
+import os
+import time
+
+# Agregar la raíz del proyecto al path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from plantillas import MotorPlantillas
+
+NOMBRES = [
+    'Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Laura', 'Pedro', 'Sofía',
+    'José', 'Elena', 'Miguel', 'Isabel', 'David', 'Carmen', 'Javier', 'Rosa',
+    'Daniel', 'Patricia', 'Francisco', 'Lucía', 'Antonio', 'Teresa', 'Manuel', 'Eva',
+    'Jorge', 'Marta', 'Pablo', 'Cristina', 'Alberto', 'Silvia', 'Fernando', 'Raquel'
+]
+
+APELLIDOS = [
+    'García', 'Rodríguez', 'González', 'Fernández', 'López', 'Martínez', 'Sánchez',
+    'Pérez', 'Gómez', 'Martín', 'Jiménez', 'Ruiz', 'Hernández', 'Díaz', 'Moreno',
+    'Álvarez', 'Romero', 'Alonso', 'Gutiérrez', 'Navarro', 'Torres', 'Domínguez',
+    'Vázquez', 'Ramos', 'Gil', 'Ramírez', 'Serrano', 'Blanco', 'Molina', 'Morales'
+]
+
+def generar_correos_usuario_original(nombre, apellido):
+    """Implementación anterior: recompila la regex y arma los f-strings por usuario"""
+    regex_limpiar = re.compile(r'[^a-zA-Z]')
+    nombre_limpio = regex_limpiar.sub('', nombre).lower()
+    apellido_limpio = regex_limpiar.sub('', apellido).lower()
+    inicial_nombre = nombre_limpio[0] if nombre_limpio else 'a'
+    inicial_apellido = apellido_limpio[0] if apellido_limpio else 'b'
+    return {
+        'gmail': f"{nombre_limpio}.{apellido_limpio}@gmail.com",
+        'outlook': f"{nombre_limpio}_{apellido_limpio}@outlook.com",
+        'hotmail': f"{inicial_nombre}{apellido_limpio}@hotmail.com",
+        'yahoo': f"{nombre_limpio}-{apellido_limpio}@yahoo.com",
+        'empresa': f"{inicial_nombre}.{apellido_limpio}@empresa.com",
+        'custom1': f"{nombre_limpio}{apellido_limpio}@custom.com",
+        'custom2': f"{apellido_limpio}.{nombre_limpio}@company.com",
+        'custom3': f"{inicial_nombre}{inicial_apellido}@corporate.com"
+    }
+
+def generar_lote_original(usuarios):
+    filas = []
+    for usuario in usuarios:
+        for tipo, correo in generar_correos_usuario_original(usuario['nombre'], usuario['apellido']).items():
+            filas.append({'usuario_id': usuario['id'], 'tipo': tipo, 'correo': correo})
+    return filas
+
+def medir(funcion, usuarios, repeticiones=3):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(usuarios)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+def main(cantidad=200000):
+    random.seed(42)
+    usuarios = [
+        {'id': i, 'nombre': random.choice(NOMBRES), 'apellido': random.choice(APELLIDOS)}
+        for i in range(cantidad)
+    ]
+    motor = MotorPlantillas()
+    
+    # Ambas implementaciones deben producir exactamente las mismas filas
+    assert generar_lote_original(usuarios[:1000]) == motor.generar_lote(usuarios[:1000])
+    
+    print(f"BENCHMARK GENERACIÓN DE CORREOS ({cantidad} usuarios, 8 tipos)")
+    print("=" * 60)
+    t_original = medir(generar_lote_original, usuarios)
+    t_motor = medir(motor.generar_lote, usuarios)
+    
+    print(f" Original:        {t_original:.3f}s  ({t_original / cantidad * 1e6:.2f} µs/usuario)")
+    print(f" MotorPlantillas: {t_motor:.3f}s  ({t_motor / cantidad * 1e6:.2f} µs/usuario)")
+    print(f" Aceleración:     x{t_original / t_motor:.2f}")
+    print(f" Caché:           {motor.estadisticas_cache()}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
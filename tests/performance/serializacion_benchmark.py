@@ -0,0 +1,89 @@
+import gzip
+import random
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Agregar la raíz del proyecto al path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from compresion import brotli, comprimir
+from serializacion import MOTOR_JSON, ProveedorJSON, a_columnar, codificar, decodificar
+from plantillas import TIPOS_CORREO
+
+def crear_correos(cantidad):
+    """Filas con la misma forma que devuelve GET /correos"""
+    random.seed(42)
+    inicio = datetime(2024, 1, 1)
+    nombres = ['Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Laura', 'Pedro', 'Sofía']
+    apellidos = ['García', 'Rodríguez', 'González', 'Fernández', 'López', 'Martínez']
+    filas = []
+    for i in range(cantidad):
+        nombre, apellido = random.choice(nombres), random.choice(apellidos)
+        tipo = TIPOS_CORREO[i % len(TIPOS_CORREO)]
+        filas.append({
+            'id': cantidad - i,
+            'usuario_id': (cantidad - i) // len(TIPOS_CORREO) + 1,
+            'tipo': tipo,
+            'correo': f"{nombre.lower()}.{apellido.lower()}{i}@{tipo}.com",
+            # Cada lote de 5000 filas se inserta con el mismo CURRENT_TIMESTAMP
+            'fecha_creacion': inicio + timedelta(seconds=i // 5000),
+            'nombre': nombre,
+            'apellido': apellido
+        })
+    return filas
+
+def medir(funcion, repeticiones=3):
+    mejor = float('inf')
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+def main(cantidad=100000):
+    filas = crear_correos(cantidad)
+    app = Flask(__name__)
+    por_defecto = DefaultJSONProvider(app)
+    rapido = ProveedorJSON(app)
+    
+    with app.app_context():
+        t_defecto, cuerpo_defecto = medir(lambda: por_defecto.response(filas).get_data())
+        t_rapido, cuerpo_rapido = medir(lambda: rapido.response(filas).get_data())
+    
+    # Mismo contenido (incluido el formato de fechas) con ambos proveedores
+    assert decodificar(cuerpo_defecto) == decodificar(cuerpo_rapido)
+    
+    print(f"BENCHMARK SERIALIZACIÓN Y COMPRESIÓN ({cantidad} correos)")
+    print("=" * 60)
+    print(f" jsonify por defecto: {t_defecto:.3f}s  {len(cuerpo_defecto) / 1e6:.2f} MB")
+    print(f" ProveedorJSON ({MOTOR_JSON}): {t_rapido:.3f}s  {len(cuerpo_rapido) / 1e6:.2f} MB")
+    print(f" Aceleración:         x{t_defecto / t_rapido:.2f}")
+    print("-" * 60)
+    
+    codificaciones = [('gzip', 'gzip nivel 6', {}), ('gzip', 'gzip nivel 1', {'nivel_gzip': 1})]
+    if brotli:
+        codificaciones.append(('br', 'brotli calidad 4', {}))
+    for codificacion, etiqueta, opciones in codificaciones:
+        t_comp, comprimido = medir(lambda: comprimir(cuerpo_rapido, codificacion, **opciones))
+        print(f" {etiqueta:<17}: {t_comp:.3f}s  {len(comprimido) / 1e6:.2f} MB  "
+              f"({100.0 * len(comprimido) / len(cuerpo_rapido):.1f}% del original)")
+    assert gzip.decompress(comprimir(cuerpo_rapido, 'gzip')) == cuerpo_rapido
+    print("-" * 60)
+    
+    t_columnar, cuerpo_columnar = medir(
+        lambda: codificar(a_columnar(filas, ('tipo', 'nombre', 'apellido', 'fecha_creacion')))
+    )
+    comprimido = comprimir(cuerpo_columnar, 'gzip')
+    print(f" format=columnar    : {t_columnar:.3f}s  {len(cuerpo_columnar) / 1e6:.2f} MB  "
+          f"(gzip: {len(comprimido) / 1e6:.2f} MB)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -1,6 +1,11 @@
 import sys
 import os
+import gzip
+import json
+import time
 import unittest
+from datetime import datetime
+from unittest.mock import patch
 
 # CORRECCIÓN: Agregar path correcto
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -9,16 +14,24 @@ project_root = os.path.dirname(parent_dir)
 sys.path.insert(0, project_root)
 
 try:
-    from app import app
+    from app import app, create_app
     print("✅ App importada correctamente")
 except ImportError as e:
     print(f"❌ Error importando app: {e}")
 
+def rango_denso(minimo, maximo):
+    """Sustituto de obtener_rango_ids para una tabla con todos los ids de [minimo, maximo]"""
+    def obtener_rango_ids(tabla, desde_id=None):
+        desde = max(minimo, desde_id or minimo)
+        return (desde, maximo) if desde <= maximo else (None, None)
+    return obtener_rango_ids
+
 class TestApp(unittest.TestCase):
     
     def setUp(self):
         """Configuración antes de cada test"""
         self.app = app
+        self.db = app.extensions['crm'].db
         self.client = app.test_client()
         self.client.testing = True
         print("✅ Configuración de测试 completada")
@@ -55,6 +68,398 @@ class TestApp(unittest.TestCase):
         self.assertIn(response.status_code, [200, 400])
         print("✅ Ruta POST /usuarios funcionando")
 
+    def test_obtener_usuarios_paginado(self):
+        """Test de paginación por cursor en /usuarios"""
+        filas = [{'id': 30}, {'id': 20}, {'id': 10}]
+        with patch.object(self.db, 'obtener_usuarios', return_value=filas) as mock_obtener:
+            response = self.client.get('/usuarios?limit=2&after_id=40')
+        
+        self.assertEqual(response.status_code, 200)
+        mock_obtener.assert_called_once_with(3, 40, {}, None)
+        data = response.get_json()
+        self.assertEqual([u['id'] for u in data['usuarios']], [30, 20])
+        self.assertEqual(data['next_cursor'], 20)
+        print("✅ Paginación /usuarios funcionando")
+    
+    def test_obtener_correos_ultima_pagina(self):
+        """Test de que la última página de /correos no tiene cursor"""
+        with patch.object(self.db, 'obtener_correos', return_value=[{'id': 5}]):
+            response = self.client.get('/correos?limit=2')
+        
+        data = response.get_json()
+        self.assertEqual(len(data['correos']), 1)
+        self.assertIsNone(data['next_cursor'])
+        print("✅ Paginación /correos funcionando")
+
+    def test_obtener_correos_ndjson(self):
+        """Test de exportación NDJSON por trozos en /correos"""
+        lotes = [[{'id': 2, 'tipo': 'gmail'}, {'id': 1, 'tipo': 'yahoo'}], [{'id': 0, 'tipo': 'gmail'}]]
+        with patch.object(self.db, 'iterar_correos', return_value=iter(lotes)):
+            response = self.client.get('/correos', headers={'Accept': 'application/x-ndjson'})
+            lineas = response.get_data(as_text=True).splitlines()
+        
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual([json.loads(linea)['id'] for linea in lineas], [2, 1, 0])
+        print("✅ Exportación NDJSON /correos funcionando")
+    
+    def test_obtener_correos_stream_json(self):
+        """Test de que stream=1 produce un array JSON válido"""
+        lotes = [[{'id': 2}], [{'id': 1}]]
+        with patch.object(self.db, 'iterar_correos', return_value=iter(lotes)) as mock_iterar:
+            response = self.client.get('/correos?stream=1&prefijo=Ana&dominio=gmail.com')
+            data = json.loads(response.get_data(as_text=True))
+        
+        self.assertEqual(data, [{'id': 2}, {'id': 1}])
+        # Los filtros también se aplican a la exportación por trozos
+        self.assertEqual(mock_iterar.call_args[1]['filtros'], {'prefijo': 'ana', 'tipos': ['gmail']})
+        self.assertEqual(self.client.get('/correos?stream=ndjson&tipo=otro').status_code, 400)
+        print("✅ Exportación JSON por trozos /correos funcionando")
+
+    def test_obtener_correos_stream_cortado_por_error(self):
+        """Test de que un error a mitad de la exportación corta la respuesta en lugar de cerrarla"""
+        from mysql.connector import Error
+        def lotes():
+            yield [{'id': 2}]
+            raise Error('conexión perdida')
+        with patch.object(self.db, 'iterar_correos', return_value=lotes()):
+            response = self.client.get('/correos?stream=1')
+            with self.assertRaises(Error):
+                response.get_data()
+        print("✅ Exportación por trozos cortada por error funcionando")
+
+    def test_generar_correos_en_segundo_plano(self):
+        """Test de que /generar-correos con async encola un trabajo consultable"""
+        usuarios = [{'id': 1, 'nombre': 'Ana', 'apellido': 'Gil'}]
+        with patch.object(self.db, 'obtener_usuarios', return_value=usuarios), \
+             patch.object(self.db, 'guardar_correos_lote', side_effect=len) as mock_guardar:
+            response = self.client.post('/generar-correos', json={'async': True, 'tipos': ['gmail']})
+            self.assertEqual(response.status_code, 202)
+            job_id = response.get_json()['job_id']
+            
+            job = self.app.extensions['crm'].jobs.obtener(job_id)
+            for _ in range(200):
+                if job.terminado:
+                    break
+                time.sleep(0.01)
+        
+        data = self.client.get(f'/jobs/{job_id}').get_json()
+        self.assertEqual(data['estado'], 'completado')
+        self.assertEqual(data['procesados'], 1)
+        self.assertEqual(data['filas_escritas'], 1)
+        mock_guardar.assert_called_once()
+        print("✅ Generación en segundo plano funcionando")
+    
+    def test_borrado_masivo_en_segundo_plano(self):
+        """Test de que DELETE /usuarios/todos encola un borrado por lotes"""
+        with patch.object(self.db, 'obtener_rango_ids', side_effect=rango_denso(1, 2500)), \
+             patch.object(self.db, 'eliminar_rango', return_value=1000) as mock_eliminar:
+            response = self.client.delete('/usuarios/todos?lote=1000')
+            self.assertEqual(response.status_code, 202)
+            job_id = response.get_json()['job_id']
+
+            job = self.app.extensions['crm'].jobs.obtener(job_id)
+            for _ in range(200):
+                if job.terminado:
+                    break
+                time.sleep(0.01)
+
+        data = self.client.get(f'/jobs/{job_id}').get_json()
+        self.assertEqual(data['estado'], 'completado')
+        self.assertEqual(data['tipo'], 'eliminar-usuarios')
+        self.assertEqual(data['resultado']['lotes'], 3)
+        self.assertEqual(mock_eliminar.call_args[0], ('usuarios', 2001, 2500))
+        print("✅ Borrado masivo en segundo plano funcionando")
+
+    def test_eliminar_varios_usuarios(self):
+        """Test del borrado de una lista o un rango de usuarios en una petición"""
+        with patch.object(self.db, 'eliminar_usuarios', return_value=3) as mock_eliminar:
+            response = self.client.delete('/usuarios', json={'ids': [1, 2, 3]})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()['eliminados'], 3)
+            mock_eliminar.assert_called_once_with([1, 2, 3])
+
+        with patch.object(self.db, 'obtener_rango_ids', side_effect=rango_denso(1, 10 ** 6)), \
+             patch.object(self.db, 'eliminar_rango', return_value=10) as mock_rango:
+            response = self.client.post('/usuarios/eliminar', json={'desde': 1, 'hasta': 1500})
+            self.assertEqual(response.get_json()['eliminados'], 20)
+            self.assertEqual(mock_rango.call_args[0], ('usuarios', 1001, 1500))
+
+            # Un rango enorme se recorta a los ids existentes y, aun así, tiene un máximo
+            response = self.client.post('/usuarios/eliminar', json={'desde': 1, 'hasta': 10 ** 12})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(mock_rango.call_count, 2)
+
+        for cuerpo in ({'ids': ['a']}, {'desde': 5, 'hasta': 1}, {}, None):
+            self.assertEqual(self.client.delete('/usuarios', json=cuerpo).status_code, 400)
+        print("✅ Borrado de varios usuarios funcionando")
+
+    def test_job_inexistente(self):
+        """Test de 404 para trabajos desconocidos"""
+        response = self.client.get('/jobs/no-existe')
+        self.assertEqual(response.status_code, 404)
+        print("✅ Ruta /jobs/<id> funcionando")
+
+    def test_generar_correos_incremental(self):
+        """Test de que el modo incremental solo inserta los pares que faltan"""
+        faltantes = [
+            {'id': 7, 'nombre': 'Ana', 'apellido': 'Gil', 'tipo': 'gmail'},
+            {'id': 7, 'nombre': 'Ana', 'apellido': 'Gil', 'tipo': 'yahoo'}
+        ]
+        with patch.object(self.db, 'obtener_rango_ids', return_value=(7, 7)), \
+             patch.object(self.db, 'obtener_correos_faltantes', return_value=faltantes) as mock_faltantes, \
+             patch.object(self.db, 'guardar_correos_lote', side_effect=len) as mock_guardar:
+            response = self.client.post('/generar-correos', json={'incremental': True})
+        
+        self.assertEqual(response.status_code, 200)
+        mock_faltantes.assert_called_once()
+        guardados = mock_guardar.call_args[0][0]
+        self.assertEqual(
+            [(c['usuario_id'], c['tipo'], c['correo']) for c in guardados],
+            [(7, 'gmail', 'ana.gil@gmail.com'), (7, 'yahoo', 'ana-gil@yahoo.com')]
+        )
+        print("✅ Generación incremental funcionando")
+
+    def test_generar_usuarios_resumen_por_defecto(self):
+        """Test de que /usuarios/aleatorios devuelve solo el resumen salvo que se pida"""
+        with patch.object(self.db, 'agregar_usuarios_lote', side_effect=lambda u: list(range(10, 10 + len(u)))):
+            resumen = self.client.post('/usuarios/aleatorios', json={'cantidad': 3}).get_json()
+            completa = self.client.post('/usuarios/aleatorios', json={'cantidad': 3, 'respuesta': 'completa'}).get_json()
+        
+        self.assertNotIn('usuarios', resumen)
+        self.assertEqual(resumen['total'], 3)
+        self.assertEqual(resumen['rangos_ids'], [[10, 12]])
+        self.assertEqual(len(completa['usuarios']), 3)
+        print("✅ Resumen de /usuarios/aleatorios funcionando")
+
+    def test_generar_correos_procesos_validados(self):
+        """Test de que procesos se valida y se acota al máximo configurado"""
+        for procesos in ('x', -1, 0, [2], True):
+            response = self.client.post('/generar-correos', json={'paralelo': True, 'procesos': procesos})
+            self.assertEqual(response.status_code, 400)
+
+        with patch('app.generar_en_paralelo', return_value={'total_correos': 0}) as mock_paralelo:
+            self.client.post('/generar-correos', json={'paralelo': True, 'procesos': 10 ** 6})
+            self.client.post('/generar-correos', json={'paralelo': True, 'procesos': '1'})
+        self.assertEqual([c[0][3] for c in mock_paralelo.call_args_list], [self.app.config['CRM_GEN_PROCESOS'], 1])
+        print("✅ Validación de procesos funcionando")
+
+    def test_generar_correos_resumen_por_tipo(self):
+        """Test del resumen por tipo de /generar-correos"""
+        usuarios = [{'id': 4, 'nombre': 'Ana', 'apellido': 'Gil'}, {'id': 9, 'nombre': 'Luis', 'apellido': 'Ruiz'}]
+        with patch.object(self.db, 'obtener_usuarios', return_value=usuarios), \
+             patch.object(self.db, 'guardar_correos_lote', side_effect=len):
+            data = self.client.post('/generar-correos', json={'tipos': ['gmail', 'yahoo']}).get_json()
+        
+        self.assertNotIn('correos', data)
+        self.assertEqual(data['total_correos'], 4)
+        self.assertEqual(data['por_tipo'], {'gmail': 2, 'yahoo': 2})
+        self.assertEqual(data['rango_usuarios'], [4, 9])
+        print("✅ Resumen de /generar-correos funcionando")
+
+    def test_obtener_usuarios_filtros(self):
+        """Test de que los filtros de /usuarios se pasan a la base de datos"""
+        with patch.object(self.db, 'obtener_usuarios', return_value=[]) as mock_obtener:
+            response = self.client.get('/usuarios?limit=10&q=ma&edad_min=26&edad_max=35&hasta=2024-05-01')
+        
+        self.assertEqual(response.status_code, 200)
+        filtros = mock_obtener.call_args[0][2]
+        self.assertEqual(filtros['q'], 'ma')
+        self.assertEqual((filtros['edad_min'], filtros['edad_max']), (26, 35))
+        self.assertEqual(filtros['creado_hasta'], datetime(2024, 5, 2))
+        
+        response = self.client.get('/usuarios?edad_min=muchos')
+        self.assertEqual(response.status_code, 400)
+        print("✅ Filtros de /usuarios funcionando")
+
+    def test_obtener_correos_filtros(self):
+        """Test de que los filtros de /correos se traducen a tipos indexables"""
+        with patch.object(self.db, 'obtener_correos', return_value=[]) as mock_obtener:
+            response = self.client.get('/correos?limit=10&dominio=gmail.com&usuario_id=7&prefijo=Ana')
+        
+        self.assertEqual(response.status_code, 200)
+        filtros = mock_obtener.call_args[0][2]
+        self.assertEqual(filtros, {'usuario_id': 7, 'prefijo': 'ana', 'tipos': ['gmail']})
+        
+        response = self.client.get('/correos?tipo=inexistente')
+        self.assertEqual(response.status_code, 400)
+        print("✅ Filtros de /correos funcionando")
+
+    def test_obtener_correos_usuario(self):
+        """Test del sub-recurso /usuarios/<id>/correos"""
+        from mysql.connector import Error
+        correos = [{'id': 1, 'usuario_id': 3, 'tipo': 'gmail', 'correo': 'ana.ruiz@gmail.com'}]
+        with patch.object(self.db, 'obtener_correos_usuario', return_value=correos) as mock_obtener:
+            response = self.client.get('/usuarios/3/correos?tipo=gmail')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), correos)
+        mock_obtener.assert_called_once_with(3, ['gmail'])
+        
+        with patch.object(self.db, 'obtener_correos_usuario', return_value=None):
+            response = self.client.get('/usuarios/99/correos')
+        self.assertEqual(response.status_code, 404)
+        
+        # Un error de la base es un 500, no un usuario inexistente
+        with patch.object(self.db, 'obtener_correos_usuario', side_effect=Error('conexión perdida')):
+            response = self.client.get('/usuarios/98/correos')
+        self.assertEqual(response.status_code, 500)
+        print("✅ Correos de un usuario funcionando")
+
+    def test_estadisticas(self):
+        """Test del endpoint /stats"""
+        stats = {'total_usuarios': 2, 'total_correos': 16, 'correos_por_tipo': {'gmail': 2}}
+        with patch.object(self.db, 'obtener_estadisticas', return_value=stats):
+            response = self.client.get('/stats')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), stats)
+        
+        with patch.object(self.db, 'obtener_estadisticas', return_value=None):
+            response = self.client.get('/stats')
+        self.assertEqual(response.status_code, 500)
+        print("✅ Endpoint /stats funcionando")
+
+    def test_consultas_lentas(self):
+        """Test del endpoint de administración de consultas lentas"""
+        self.db.consultas_lentas.registrar("SELECT * FROM correos", None, 2.0, 10, [{'type': 'ALL'}])
+        response = self.client.get('/admin/consultas-lentas')
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['consultas'][0]['plan'], [{'type': 'ALL'}])
+        self.assertIn('umbral', data)
+
+        response = self.client.delete('/admin/consultas-lentas')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/admin/consultas-lentas').get_json()['consultas'], [])
+        print("✅ Endpoint /admin/consultas-lentas funcionando")
+
+    def test_etag_y_304(self):
+        """Test de GET condicional: 304 sin consultar si la tabla no ha cambiado"""
+        usuarios = [{'id': 2, 'nombre': 'Ana'}]
+        with patch.object(self.db, 'obtener_estado_tablas', return_value=((2, 1),)), \
+             patch.object(self.db, 'obtener_usuarios', return_value=usuarios) as mock_obtener:
+            response = self.client.get('/usuarios?limit=10')
+            etag = response.headers['ETag']
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+            
+            response = self.client.get('/usuarios?limit=10', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.data, b'')
+            self.assertEqual(mock_obtener.call_count, 1)
+            
+            # Otra página tiene otro ETag
+            response = self.client.get('/usuarios?limit=5', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 200)
+        
+        # Un alta cambia la huella de la tabla
+        with patch.object(self.db, 'obtener_estado_tablas', return_value=((3, 2),)), \
+             patch.object(self.db, 'obtener_usuarios', return_value=usuarios):
+            response = self.client.get('/usuarios?limit=10', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        print("✅ ETag y 304 funcionando")
+
+    def test_compresion_gzip(self):
+        """Test de compresión negociada para respuestas grandes"""
+        usuarios = [{'id': i, 'nombre': 'Ana', 'apellido': 'García'} for i in range(200)]
+        with patch.object(self.db, 'obtener_estado_tablas', return_value=((200, 200),)), \
+             patch.object(self.db, 'obtener_usuarios', return_value=usuarios):
+            response = self.client.get('/usuarios', headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', response.headers['Vary'])
+            self.assertEqual(json.loads(gzip.decompress(response.data)), usuarios)
+            etag = response.headers['ETag']
+            self.assertTrue(etag.endswith('-gzip"'))
+            
+            # El ETag de la variante comprimida también permite responder 304
+            response = self.client.get('/usuarios', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            
+            # Sin Accept-Encoding la respuesta va sin comprimir
+            response = self.client.get('/usuarios')
+            self.assertNotIn('Content-Encoding', response.headers)
+        
+        # Las respuestas pequeñas no se comprimen
+        response = self.client.get('/jobs', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        print("✅ Compresión gzip funcionando")
+
+    def test_formato_columnar(self):
+        """Test de format=columnar en /correos"""
+        correos = [
+            {'id': 9, 'usuario_id': 2, 'tipo': 'gmail', 'correo': 'a@gmail.com'},
+            {'id': 8, 'usuario_id': 2, 'tipo': 'gmail', 'correo': 'b@gmail.com'},
+            {'id': 7, 'usuario_id': 1, 'tipo': 'gmail', 'correo': 'c@gmail.com'}
+        ]
+        with patch.object(self.db, 'obtener_correos', return_value=correos):
+            response = self.client.get('/correos?limit=2&format=columnar')
+        
+        data = response.get_json()
+        self.assertEqual(data['columns'], ['id', 'usuario_id', 'tipo', 'correo'])
+        self.assertEqual(data['dictionaries'], {'tipo': ['gmail']})
+        self.assertEqual(data['rows'], [[9, 2, 0, 'a@gmail.com'], [8, 2, 0, 'b@gmail.com']])
+        self.assertEqual(data['next_cursor'], 8)
+        
+        response = self.client.get('/correos?format=xml')
+        self.assertEqual(response.status_code, 400)
+        print("✅ Formato columnar funcionando")
+
+    def test_metrics(self):
+        """Test del endpoint /metrics en formato Prometheus"""
+        with patch.object(self.db, 'obtener_estadisticas', return_value=None):
+            self.client.get('/stats')
+        
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        texto = response.get_data(as_text=True)
+        self.assertIn('crm_http_peticiones_total{metodo="GET",ruta="/stats",estado="500"}', texto)
+        self.assertIn('crm_http_errores_total{metodo="GET",ruta="/stats"}', texto)
+        self.assertIn('crm_http_duracion_segundos_bucket{metodo="GET",ruta="/stats",le="+Inf"}', texto)
+        self.assertIn('# TYPE crm_pool_en_uso gauge', texto)
+        print("✅ Endpoint /metrics funcionando")
+
+class TestCreateApp(unittest.TestCase):
+
+    def test_configuracion_y_backend(self):
+        """Test de la fábrica con configuración propia y el backend en memoria"""
+        aplicacion = create_app({'CRM_BACKEND': 'memoria', 'CRM_POOL_SIZE': 3})
+        self.assertEqual(aplicacion.config['CRM_POOL_SIZE'], 3)
+        self.assertIsNot(aplicacion, app)
+        cliente = aplicacion.test_client()
+
+        respuesta = cliente.post('/usuarios', json={'nombre': 'Ana', 'apellido': 'Gil', 'edad': 30})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([u['nombre'] for u in cliente.get('/usuarios').get_json()], ['Ana'])
+        # Los datos en memoria no se comparten con los procesos de generación
+        respuesta = cliente.post('/generar-correos', json={'paralelo': True})
+        self.assertEqual(respuesta.status_code, 400)
+        print("✅ Test create_app - PASÓ")
+
+    def test_aplicaciones_independientes(self):
+        """Test de que crear otra aplicación no cambia los servicios de la primera"""
+        primera = create_app({'CRM_BACKEND': 'memoria'})
+        servicios = primera.extensions['crm']
+        primera.test_client().post('/usuarios', json={'nombre': 'Ana', 'apellido': 'Gil', 'edad': 30})
+
+        segunda = create_app({'CRM_BACKEND': 'memoria'})
+        self.assertIs(primera.extensions['crm'], servicios)
+        self.assertIsNot(segunda.extensions['crm'], servicios)
+        self.assertEqual(len(primera.test_client().get('/usuarios').get_json()), 1)
+        self.assertEqual(segunda.test_client().get('/usuarios').get_json(), [])
+
+        # La cola de trabajos de la primera sigue aceptando trabajos
+        respuesta = primera.test_client().delete('/correos/todos')
+        self.assertEqual(respuesta.status_code, 202)
+        print("✅ Test aplicaciones independientes - PASÓ")
+
+    def test_importar_no_crea_la_app(self):
+        """Test de que importar app (como cada worker de servidor.py) no crea la aplicación"""
+        import subprocess
+        codigo = "import app; assert app._app_por_defecto is None; app.app; assert app._app_por_defecto is not None"
+        resultado = subprocess.run([sys.executable, '-c', codigo], cwd=project_root, capture_output=True, text=True)
+        self.assertEqual(resultado.returncode, 0, resultado.stderr)
+        print("✅ Test app perezosa - PASÓ")
+
 if __name__ == '__main__':
     print("🧪 INICIANDO PRUEBAS DE LA APLICACIÓN")
     print("=" * 50)
@@ -0,0 +1,134 @@
+import sys
+import os
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+# Quart es opcional: sin él estos tests se saltan
+pytest.importorskip('quart')
+
+try:
+    import app_async
+    print("✅ App asíncrona importada correctamente")
+except ImportError as e:
+    print(f"❌ Error importando app_async: {e}")
+
+def lotes_async(lotes):
+    """Sustituto de DatabaseAsync.iterar_correos que guarda los filtros recibidos"""
+    llamadas = []
+    async def iterar_correos(tamano_lote=1000, filtros=None):
+        llamadas.append(filtros)
+        for lote in lotes:
+            yield lote
+    return iterar_correos, llamadas
+
+class TestAppAsync(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.client = app_async.app.test_client()
+        self.db = app_async.app.extensions['crm'].db_async
+        # Capa síncrona: generaciones, borrados masivos y trabajos
+        self.db_sync = app_async.app.extensions['crm'].db
+
+    async def test_obtener_usuarios_con_etag(self):
+        """Test de la paginación y del GET condicional de /usuarios"""
+        usuarios = [{'id': 3, 'nombre': 'Ana'}, {'id': 2, 'nombre': 'Luis'}]
+        with patch.object(self.db, 'obtener_estado_tablas', AsyncMock(return_value=((3, 2),))), \
+             patch.object(self.db, 'obtener_usuarios', AsyncMock(return_value=usuarios)) as mock_obtener:
+            response = await self.client.get('/usuarios?limit=1')
+            data = await response.get_json()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(data, {'usuarios': usuarios[:1], 'next_cursor': 3})
+            mock_obtener.assert_awaited_once_with(2, None, {}, ((3, 2),))
+
+            etag = response.headers['ETag'].strip('"')
+            repetida = await self.client.get('/usuarios?limit=1', headers={'If-None-Match': f'"{etag}"'})
+            self.assertEqual(repetida.status_code, 304)
+            self.assertEqual(mock_obtener.await_count, 1)
+        print("✅ /usuarios asíncrono con ETag funcionando")
+
+    async def test_agregar_usuario(self):
+        """Test del alta de un usuario y de la validación del cuerpo"""
+        with patch.object(self.db, 'agregar_usuario', AsyncMock(return_value=7)):
+            response = await self.client.post('/usuarios', json={'nombre': 'Ana', 'apellido': 'Gil', 'edad': 30})
+            self.assertEqual((await response.get_json())['usuario']['id'], 7)
+        response = await self.client.post('/usuarios', json={'nombre': 'Ana'})
+        self.assertEqual(response.status_code, 400)
+        print("✅ Alta asíncrona de usuarios funcionando")
+
+    async def test_exportacion_por_trozos_con_filtros(self):
+        """Test de la exportación NDJSON y JSON de /correos con los filtros aplicados"""
+        iterar_correos, llamadas = lotes_async([[{'id': 2}, {'id': 1}], [{'id': 0}]])
+        with patch.object(self.db, 'iterar_correos', iterar_correos):
+            response = await self.client.get('/correos?stream=ndjson&tipo=gmail')
+            lineas = (await response.get_data(as_text=True)).splitlines()
+            self.assertEqual(response.mimetype, 'application/x-ndjson')
+            self.assertEqual([json.loads(linea)['id'] for linea in lineas], [2, 1, 0])
+
+            response = await self.client.get('/correos?stream=1')
+            self.assertEqual(json.loads(await response.get_data(as_text=True)), [{'id': 2}, {'id': 1}, {'id': 0}])
+        self.assertEqual(llamadas, [{'tipos': ['gmail']}, {}])
+
+        response = await self.client.get('/correos?stream=1&tipo=otro')
+        self.assertEqual(response.status_code, 400)
+        print("✅ Exportación asíncrona por trozos funcionando")
+
+    async def test_correos_de_usuario(self):
+        """Test de que un usuario inexistente es un 404 y un error de la base un 500"""
+        from mysql.connector import Error
+        estado = AsyncMock(return_value=((3, 2), (0, 0)))
+        with patch.object(self.db, 'obtener_estado_tablas', estado), \
+             patch.object(self.db, 'obtener_correos_usuario', AsyncMock(return_value=None)):
+            response = await self.client.get('/usuarios/99/correos')
+        self.assertEqual(response.status_code, 404)
+        with patch.object(self.db, 'obtener_estado_tablas', estado), \
+             patch.object(self.db, 'obtener_correos_usuario', AsyncMock(side_effect=Error('conexión perdida'))):
+            response = await self.client.get('/usuarios/98/correos')
+        self.assertEqual(response.status_code, 500)
+        print("✅ Correos de un usuario asíncronos funcionando")
+
+    async def test_peticiones_no_validas(self):
+        """Test de los 400 compartidos con app.py"""
+        response = await self.client.post('/generar-correos', json={'paralelo': True, 'procesos': 'x'})
+        self.assertEqual(response.status_code, 400)
+        for cuerpo in ({'ids': ['a']}, {'desde': 5, 'hasta': 1}, {}):
+            response = await self.client.delete('/usuarios', json=cuerpo)
+            self.assertEqual(response.status_code, 400)
+        print("✅ Validaciones asíncronas funcionando")
+
+    async def test_generar_correos_como_app(self):
+        """Test de que /generar-correos responde igual que en app.py (mismo cuerpo de ruta)"""
+        with patch.object(self.db_sync, 'obtener_usuarios', return_value=[]):
+            response = await self.client.post('/generar-correos', json={})
+            self.assertEqual(response.status_code, 400)
+
+        usuarios = [{'id': 4, 'nombre': 'Ana', 'apellido': 'Gil'}]
+        with patch.object(self.db_sync, 'obtener_usuarios', return_value=usuarios), \
+             patch.object(self.db_sync, 'guardar_correos_lote', side_effect=len):
+            response = await self.client.post('/generar-correos', json={'tipos': ['gmail'], 'respuesta': 'completa'})
+            data = await response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['correo'] for c in data['correos']], ['ana.gil@gmail.com'])
+        print("✅ /generar-correos asíncrono como app.py")
+
+    async def test_borrado_por_rango(self):
+        """Test de que el borrado por rango usa la capa síncrona, que comparte la caché de lecturas"""
+        self.assertIs(self.db.cache, self.db_sync.cache)
+        with patch.object(self.db_sync, 'obtener_rango_ids', return_value=(1, 10)), \
+             patch.object(self.db_sync, 'eliminar_rango', return_value=10) as mock_rango:
+            response = await self.client.delete('/usuarios', json={'desde': 1, 'hasta': 10})
+        self.assertEqual((await response.get_json())['eliminados'], 10)
+        mock_rango.assert_called_once_with('usuarios', 1, 10)
+        print("✅ Borrado por rango asíncrono funcionando")
+
+if __name__ == '__main__':
+    print("🧪 Ejecutando tests de la API asíncrona...")
+    unittest.main(verbosity=2)
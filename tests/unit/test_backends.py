@@ -0,0 +1,216 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+try:
+    from database import crear_database
+    from database_memoria import DatabaseMemoria
+    from database_sqlite import DatabaseSQLite
+    from pool import cerrar_pools
+    print("✅ Backends importados correctamente")
+except ImportError as e:
+    print(f"❌ Error importando los backends: {e}")
+
+class EscenarioBackend:
+    """Mismo escenario para todos los backends: deben comportarse igual que Database"""
+
+    def crear_db(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        cerrar_pools()
+        self.db = self.crear_db()
+        self.db.crear_tablas()
+        self.ids = self.db.agregar_usuarios_lote([
+            {'nombre': 'Ana', 'apellido': 'Gil', 'edad': 30},
+            {'nombre': 'Andrés', 'apellido': 'López', 'edad': 17},
+            {'nombre': 'Luis', 'apellido': 'Anaya', 'edad': 60},
+            {'nombre': 'A_b', 'apellido': 'Ruiz', 'edad': 40}
+        ])
+
+    def tearDown(self):
+        cerrar_pools()
+
+    def test_alta_y_filtros_de_usuarios(self):
+        """Test de ids consecutivos, orden descendente, prefijos y paginación"""
+        self.assertEqual(len(self.ids), 4)
+        self.assertEqual(self.ids, list(range(self.ids[0], self.ids[0] + 4)))
+        self.assertEqual(self.db.agregar_usuario('Eva', 'Sanz', 25), self.ids[-1] + 1)
+
+        usuarios = self.db.obtener_usuarios()
+        self.assertEqual([u['id'] for u in usuarios], sorted((u['id'] for u in usuarios), reverse=True))
+        self.assertEqual(set(usuarios[0]), {'id', 'nombre', 'apellido', 'edad', 'fecha_creacion'})
+
+        self.assertEqual([u['nombre'] for u in self.db.obtener_usuarios(filtros={'nombre': 'an'})],
+                         ['Andrés', 'Ana'])
+        self.assertEqual(len(self.db.obtener_usuarios(filtros={'q': 'An'})), 3)
+        # El guion bajo es literal, no un comodín de LIKE
+        self.assertEqual([u['nombre'] for u in self.db.obtener_usuarios(filtros={'nombre': 'A_'})], ['A_b'])
+        self.assertEqual(len(self.db.obtener_usuarios(filtros={'edad_min': 18, 'edad_max': 40})), 3)
+
+        pagina = self.db.obtener_usuarios(limite=2, despues_de=self.ids[2])
+        self.assertEqual([u['id'] for u in pagina], [self.ids[1], self.ids[0]])
+        print("✅ Test alta y filtros de usuarios - PASÓ")
+
+    def test_correos_y_restricciones(self):
+        """Test de correo único por tipo, usuarios inexistentes y filtros de correos"""
+        ana, andres = self.ids[0], self.ids[1]
+        correos = [
+            {'usuario_id': ana, 'tipo': 'gmail', 'correo': 'ana.gil@gmail.com'},
+            {'usuario_id': ana, 'tipo': 'corporativo', 'correo': 'ana.gil@empresa.com'},
+            {'usuario_id': andres, 'tipo': 'gmail', 'correo': 'andres@gmail.com'},
+            {'usuario_id': ana, 'tipo': 'gmail', 'correo': 'repetido@gmail.com'}
+        ]
+        self.assertEqual(self.db.guardar_correos_lote(correos[:3]), 3)
+        self.assertEqual(self.db.guardar_correos_lote(correos[3:]), 0)
+        self.assertIsNone(self.db.guardar_correo(self.ids[-1] + 100, 'gmail', 'nadie@gmail.com'))
+
+        self.assertEqual([c['tipo'] for c in self.db.obtener_correos_usuario(ana)], ['corporativo', 'gmail'])
+        self.assertEqual(self.db.obtener_correos_usuario(ana, tipos=['gmail'])[0]['correo'], 'ana.gil@gmail.com')
+        self.assertEqual(self.db.obtener_correos_usuario(self.ids[2]), [])
+        self.assertIsNone(self.db.obtener_correos_usuario(self.ids[-1] + 100))
+
+        listado = self.db.obtener_correos(filtros={'tipos': ['gmail']})
+        self.assertEqual([c['correo'] for c in listado], ['andres@gmail.com', 'ana.gil@gmail.com'])
+        self.assertEqual(listado[0]['nombre'], 'Andrés')
+        self.assertEqual(len(self.db.obtener_correos(filtros={'prefijo': 'ANA'})), 2)
+        self.assertEqual(len(self.db.obtener_correos(filtros={'dominio': 'empresa.com'})), 1)
+        self.assertEqual(self.db.obtener_correos(filtros={'tipos': []}), [])
+        print("✅ Test correos y restricciones - PASÓ")
+
+    def test_faltantes_rangos_y_estado(self):
+        """Test de pares faltantes, rangos de ids, huella de las tablas y estadísticas"""
+        ana = self.ids[0]
+        self.db.guardar_correo(ana, 'gmail', 'ana@gmail.com')
+
+        faltantes = self.db.obtener_correos_faltantes(['gmail', 'outlook'], ana, self.ids[1])
+        self.assertEqual(sorted((f['id'], f['tipo']) for f in faltantes),
+                         [(ana, 'outlook'), (self.ids[1], 'gmail'), (self.ids[1], 'outlook')])
+        self.assertEqual(self.db.obtener_correos_faltantes([], ana, self.ids[1]), [])
+        self.assertEqual([u['id'] for u in self.db.obtener_usuarios_rango(self.ids[1], self.ids[2])],
+                         self.ids[1:3])
+        self.assertEqual(self.db.obtener_rango_ids('usuarios'), (self.ids[0], self.ids[-1]))
+        self.assertEqual(self.db.obtener_rango_ids('usuarios', self.ids[0] + 1), (self.ids[1], self.ids[-1]))
+        self.assertEqual(self.db.obtener_rango_ids('usuarios', self.ids[-1] + 1), (None, None))
+        with self.assertRaises(ValueError):
+            self.db.obtener_rango_ids('otra')
+
+        self.assertEqual(self.db.obtener_estado_tablas('usuarios', 'correos'), ((self.ids[-1], 4), (1, 1)))
+        estadisticas = self.db.obtener_estadisticas(ttl=0)
+        self.assertEqual(estadisticas['total_usuarios'], 4)
+        self.assertEqual(estadisticas['correos_por_tipo'], {'gmail': 1})
+        self.assertEqual(estadisticas['usuarios_por_edad'], {'<18': 1, '26-35': 1, '36-50': 1, '51+': 1})
+        print("✅ Test faltantes, rangos y estado - PASÓ")
+
+    def test_recorrido_y_borrados(self):
+        """Test del recorrido por lotes, el borrado en cascada y el vaciado de tablas"""
+        for usuario_id in self.ids:
+            self.db.guardar_correo(usuario_id, 'gmail', f'{usuario_id}@gmail.com')
+
+        lotes = list(self.db.iterar_correos(tamano_lote=3))
+        self.assertEqual([len(lote) for lote in lotes], [3, 1])
+        self.assertEqual(lotes[0][0]['usuario_id'], self.ids[-1])
+        filtrados = list(self.db.iterar_correos(tamano_lote=1, filtros={'usuario_id': self.ids[1]}))
+        self.assertEqual([[c['usuario_id'] for c in lote] for lote in filtrados], [[self.ids[1]]])
+
+        self.db.eliminar_usuario(self.ids[0])
+        self.assertEqual(self.db.obtener_estado_tablas('usuarios', 'correos')[1][1], 3)
+        self.db.eliminar_todos_correos()
+        self.assertEqual(self.db.obtener_rango_ids('correos'), (None, None))
+        self.db.eliminar_todos_usuarios()
+        self.assertEqual(self.db.obtener_usuarios(), [])
+        self.assertEqual(self.db.estadisticas_pool()['en_uso'], 0)
+        print("✅ Test recorrido y borrados - PASÓ")
+
+    def test_borrado_por_rangos(self):
+        """Test del borrado por rango de ids, con cascada, y del vaciado de correos"""
+        for usuario_id in self.ids:
+            self.db.guardar_correo(usuario_id, 'gmail', f'{usuario_id}@gmail.com')
+
+        self.assertEqual(self.db.eliminar_rango('usuarios', self.ids[0], self.ids[1]), 2)
+        self.assertEqual(self.db.obtener_estado_tablas('usuarios', 'correos'), ((self.ids[-1], 2), (4, 2)))
+        self.assertEqual(self.db.eliminar_rango('correos', 1, 3), 1)
+        self.assertEqual(self.db.eliminar_rango('correos', 1, 3), 0)
+        with self.assertRaises(ValueError):
+            self.db.eliminar_rango('otra', 1, 2)
+
+        self.assertEqual(self.db.truncar_correos(), 1)
+        self.assertEqual(self.db.obtener_correos(), [])
+        # Los ids no se reutilizan tras vaciar la tabla
+        self.assertEqual(self.db.guardar_correo(self.ids[-1], 'outlook', 'x@outlook.com'), 5)
+        print("✅ Test borrado por rangos - PASÓ")
+
+    def test_borrado_de_varios_usuarios(self):
+        """Test del borrado de una lista de ids, con duplicados e inexistentes"""
+        self.db.guardar_correo(self.ids[0], 'gmail', 'ana@gmail.com')
+        eliminados = self.db.eliminar_usuarios([self.ids[0], self.ids[2], self.ids[0], 999], tamano_lote=1)
+        self.assertEqual(eliminados, 2)
+        self.assertEqual([u['id'] for u in self.db.obtener_usuarios()], [self.ids[3], self.ids[1]])
+        self.assertEqual(self.db.obtener_correos(), [])
+        self.assertEqual(self.db.eliminar_usuarios([]), 0)
+        print("✅ Test borrado de varios usuarios - PASÓ")
+
+class TestBackendSQLite(EscenarioBackend, unittest.TestCase):
+
+    def crear_db(self):
+        self.directorio = tempfile.mkdtemp()
+        return crear_database('sqlite', sqlite_ruta=os.path.join(self.directorio, 'crm.sqlite3'))
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def test_parametros_para_otros_procesos(self):
+        """Test de que los shards de generación abren el mismo fichero"""
+        self.assertIsInstance(self.db, DatabaseSQLite)
+        self.assertEqual(self.db.parametros_conexion(),
+                         {'backend': 'sqlite', 'sqlite_ruta': os.path.join(self.directorio, 'crm.sqlite3')})
+        print("✅ Test parámetros SQLite - PASÓ")
+
+class TestBackendMemoria(EscenarioBackend, unittest.TestCase):
+
+    def crear_db(self):
+        return crear_database('memoria', pool_size=5)
+
+    def test_sin_varios_procesos(self):
+        """Test de que el backend en memoria no se puede compartir con otros procesos"""
+        self.assertIsInstance(self.db, DatabaseMemoria)
+        self.assertFalse(self.db.multiproceso)
+        with self.assertRaises(RuntimeError):
+            self.db.parametros_conexion()
+        print("✅ Test memoria sin varios procesos - PASÓ")
+
+    def test_indice_de_correos_por_usuario(self):
+        """Test de que el índice de correos por usuario sigue a los borrados"""
+        for usuario_id in self.ids:
+            for tipo in ('gmail', 'outlook'):
+                self.db.guardar_correo(usuario_id, tipo, f'{usuario_id}@{tipo}.com')
+        self.assertEqual(self.db.eliminar_rango('correos', 1, 1), 1)
+        self.assertEqual([c['tipo'] for c in self.db.obtener_correos_usuario(self.ids[0])], ['outlook'])
+        # Tras borrar un correo se puede volver a dar de alta ese tipo
+        self.assertIsNotNone(self.db.guardar_correo(self.ids[0], 'gmail', 'otro@gmail.com'))
+        self.assertEqual(self.db.eliminar_usuarios([self.ids[1], self.ids[3]]), 2)
+        self.assertIsNone(self.db.obtener_correos_usuario(self.ids[1]))
+        self.assertEqual(sorted({c['usuario_id'] for c in self.db.obtener_correos()}), [self.ids[0], self.ids[2]])
+        self.assertEqual(len(self.db.obtener_correos()), 4)
+        print("✅ Test índice de correos por usuario - PASÓ")
+
+class TestCrearDatabase(unittest.TestCase):
+
+    def test_backend_desconocido(self):
+        """Test de que un backend desconocido se rechaza con ValueError"""
+        with self.assertRaises(ValueError):
+            crear_database('oracle')
+        print("✅ Test backend desconocido - PASÓ")
+
+if __name__ == '__main__':
+    print("🧪 Ejecutando tests de los backends...")
+    unittest.main(verbosity=2)
@@ -0,0 +1,70 @@
+import sys
+import os
+import io
+import json
+import unittest
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+try:
+    from bitacora import configurar_logging, detener_logging, obtener_logger
+    print("✅ Bitácora importada correctamente")
+except ImportError as e:
+    print(f"❌ Error importando bitácora: {e}")
+
+class TestBitacora(unittest.TestCase):
+    
+    def setUp(self):
+        self.salida = io.StringIO()
+        configurar_logging('INFO', 'json', destino=self.salida)
+        self.logger = obtener_logger('pruebas')
+    
+    def tearDown(self):
+        # Deja la configuración por defecto para el resto de tests
+        configurar_logging('INFO', 'texto')
+    
+    def lineas(self):
+        detener_logging()
+        return [json.loads(linea) for linea in self.salida.getvalue().splitlines()]
+    
+    def test_salida_json_con_extra(self):
+        """Test de una línea JSON por mensaje con los campos de extra"""
+        self.logger.info("Insertados %s correos", 500, extra={'tabla': 'correos'})
+        try:
+            raise ValueError("fallo")
+        except ValueError:
+            self.logger.exception("Error de prueba")
+        
+        info, error = self.lineas()
+        self.assertEqual(info['mensaje'], 'Insertados 500 correos')
+        self.assertEqual(info['nivel'], 'INFO')
+        self.assertEqual(info['logger'], 'crm.pruebas')
+        self.assertEqual(info['tabla'], 'correos')
+        self.assertIn('ValueError: fallo', error['excepcion'])
+        print("✅ Test salida JSON - PASÓ")
+    
+    def test_nivel(self):
+        """Test de que los mensajes por debajo del nivel se descartan"""
+        configurar_logging('WARNING', 'json', destino=self.salida)
+        self.logger.info("no se escribe")
+        self.logger.warning("sí se escribe")
+        self.assertEqual([l['mensaje'] for l in self.lineas()], ['sí se escribe'])
+        print("✅ Test nivel - PASÓ")
+    
+    def test_muestreo(self):
+        """Test de que los eventos frecuentes se muestrean 1 de cada N"""
+        for i in range(10):
+            self.logger.info("Lote %s insertado", i, extra={'muestreo': 4})
+        
+        lineas = self.lineas()
+        self.assertEqual([l['mensaje'] for l in lineas], ['Lote 0 insertado', 'Lote 4 insertado', 'Lote 8 insertado'])
+        self.assertEqual([l['omitidos'] for l in lineas], [0, 3, 3])
+        print("✅ Test muestreo - PASÓ")
+
+if __name__ == '__main__':
+    print("🧪 Ejecutando tests de la bitácora...")
+    unittest.main(verbosity=2)
@@ -0,0 +1,135 @@
+import sys
+import os
+import unittest
+from unittest.mock import Mock
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+try:
+    from borrado import eliminar_por_lotes, eliminar_rango_acotado
+    from database_memoria import DatabaseMemoria
+    from jobs import Job, JobCancelado
+    print("✅ Borrado importado correctamente")
+except ImportError as e:
+    print(f"❌ Error importando borrado: {e}")
+
+def crear_db(rango=(1, 10), eliminadas=5, truncadas=None, ids=None):
+    """Database simulada con los ``ids`` dados (todos los de ``rango`` si no se indican)"""
+    if ids is None:
+        ids = range(rango[0], rango[1] + 1) if rango[0] is not None else []
+    ids = sorted(ids)
+    def obtener_rango_ids(tabla, desde_id=None):
+        quedan = [i for i in ids if desde_id is None or i >= desde_id]
+        return (quedan[0], quedan[-1]) if quedan else (None, None)
+    db = Mock()
+    db.obtener_rango_ids.side_effect = obtener_rango_ids
+    db.obtener_estado_tablas.return_value = ((ids[-1] if ids else None, len(ids)),)
+    db.eliminar_rango.return_value = eliminadas
+    db.truncar_correos.return_value = truncadas
+    return db
+
+class TestBorrado(unittest.TestCase):
+
+    def test_lotes_por_rango_de_ids(self):
+        """Test de que el rango existente se borra en lotes con progreso"""
+        db = crear_db(rango=(1, 10), eliminadas=3)
+        job = Job('eliminar-correos')
+
+        resumen = eliminar_por_lotes(db, 'correos', job=job, ids_por_lote=4)
+        self.assertEqual([c[0] for c in db.eliminar_rango.call_args_list],
+                         [('correos', 1, 4), ('correos', 5, 8), ('correos', 9, 10)])
+        self.assertEqual(resumen['lotes'], 3)
+        self.assertEqual(resumen['filas_eliminadas'], 9)
+        self.assertFalse(resumen['truncada'])
+        # Progreso en filas: el total es el COUNT(*) de la tabla
+        self.assertEqual((job.total, job.procesados, job.filas_escritas), (10, 9, 9))
+        db.truncar_correos.assert_not_called()
+        print("✅ Test borrado por lotes - PASÓ")
+
+    def test_seek_sobre_ids_dispersos(self):
+        """Test de que los huecos entre ids no generan lotes vacíos"""
+        db = crear_db(ids=[1, 2, 5000, 5001, 10 ** 6], eliminadas=2)
+        resumen = eliminar_por_lotes(db, 'correos', ids_por_lote=100)
+        self.assertEqual([c[0] for c in db.eliminar_rango.call_args_list],
+                         [('correos', 1, 100), ('correos', 5000, 5099), ('correos', 10 ** 6, 10 ** 6)])
+        self.assertEqual(resumen['lotes'], 3)
+
+        db = DatabaseMemoria()
+        ids = db.agregar_usuarios_lote([{'nombre': f'U{i}', 'apellido': 'X', 'edad': 20} for i in range(30)])
+        db.eliminar_usuarios(ids[1:29])
+        resumen = eliminar_por_lotes(db, 'usuarios', ids_por_lote=2)
+        self.assertEqual((resumen['filas_eliminadas'], resumen['lotes']), (2, 2))
+        print("✅ Test seek sobre ids dispersos - PASÓ")
+
+    def test_truncate_de_correos(self):
+        """Test de que un TRUNCATE correcto evita el borrado por lotes"""
+        db = crear_db(truncadas=7)
+        resumen = eliminar_por_lotes(db, 'correos', truncar=True)
+        self.assertTrue(resumen['truncada'])
+        self.assertEqual(resumen['filas_eliminadas'], 7)
+        db.eliminar_rango.assert_not_called()
+
+        # Si no se puede truncar se borra por lotes
+        db = crear_db(rango=(1, 3), truncadas=None)
+        self.assertEqual(eliminar_por_lotes(db, 'correos', truncar=True)['lotes'], 1)
+
+        # Una tabla vacía también se trunca
+        self.assertTrue(eliminar_por_lotes(crear_db(truncadas=0), 'correos', truncar=True)['truncada'])
+
+        # Con usuarios no se trunca nada: se borran por lotes con sus correos en cascada
+        db = crear_db(rango=(1, 3), truncadas=5)
+        resumen = eliminar_por_lotes(db, 'usuarios', truncar=True)
+        db.truncar_correos.assert_not_called()
+        db.eliminar_rango.assert_called_once_with('usuarios', 1, 3)
+        self.assertFalse(resumen['truncada'])
+        print("✅ Test truncate de correos - PASÓ")
+
+    def test_cancelacion_y_errores(self):
+        """Test de cancelación entre lotes, errores de la base de datos y tablas vacías"""
+        job = Job('eliminar-usuarios')
+        job.cancelar()
+        db = crear_db()
+        with self.assertRaises(JobCancelado):
+            eliminar_por_lotes(db, 'usuarios', job=job)
+        db.eliminar_rango.assert_not_called()
+
+        with self.assertRaises(RuntimeError):
+            eliminar_por_lotes(crear_db(eliminadas=None), 'usuarios')
+
+        self.assertEqual(eliminar_por_lotes(crear_db(rango=(None, None)), 'correos')['lotes'], 0)
+        with self.assertRaises(ValueError):
+            eliminar_por_lotes(crear_db(), 'otra')
+        print("✅ Test cancelación y errores - PASÓ")
+
+    def test_con_backend_en_memoria(self):
+        """Test de extremo a extremo: usuarios y sus correos borrados por lotes"""
+        db = DatabaseMemoria()
+        ids = db.agregar_usuarios_lote([{'nombre': f'U{i}', 'apellido': 'X', 'edad': 20} for i in range(25)])
+        db.guardar_correos_lote([{'usuario_id': i, 'tipo': 'gmail', 'correo': f'{i}@gmail.com'} for i in ids])
+
+        resumen = eliminar_por_lotes(db, 'usuarios', ids_por_lote=10)
+        self.assertEqual((resumen['filas_eliminadas'], resumen['lotes']), (25, 3))
+        self.assertEqual(db.obtener_estado_tablas('usuarios', 'correos'), ((None, 0), (None, 0)))
+        print("✅ Test borrado en memoria - PASÓ")
+
+    def test_rango_acotado_a_los_ids_existentes(self):
+        """Test de que un rango se recorta a los ids de la tabla y tiene un máximo"""
+        db = crear_db(rango=(100, 1500), eliminadas=2)
+        self.assertEqual(eliminar_rango_acotado(db, 'usuarios', 1, 10 ** 12, 2000), 4)
+        self.assertEqual(db.eliminar_rango.call_args_list[0][0], ('usuarios', 100, 1099))
+        self.assertEqual(db.eliminar_rango.call_args_list[-1][0], ('usuarios', 1100, 1500))
+
+        self.assertEqual(eliminar_rango_acotado(db, 'usuarios', 2000, 3000, 2000), 0)
+        self.assertEqual(eliminar_rango_acotado(crear_db(rango=(None, None)), 'usuarios', 1, 5, 2000), 0)
+        with self.assertRaises(ValueError):
+            eliminar_rango_acotado(db, 'usuarios', 1, 10 ** 12, 1000)
+        self.assertEqual(db.eliminar_rango.call_count, 2)
+        print("✅ Test rango acotado - PASÓ")
+
+if __name__ == '__main__':
+    print("🧪 Ejecutando tests del borrado por lotes...")
+    unittest.main(verbosity=2)
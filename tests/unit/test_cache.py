@@ -0,0 +1,78 @@
+import sys
+import os
+import time
+import unittest
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+try:
+    from cache import CacheLecturas
+    print("✅ Caché importada correctamente")
+except ImportError as e:
+    print(f"❌ Error importando caché: {e}")
+
+class TestCacheLecturas(unittest.TestCase):
+    
+    def test_acierto_y_fallo(self):
+        """Test de aciertos y fallos con las mismas versiones"""
+        cache = CacheLecturas(tamano_maximo=4, ttl=60)
+        self.assertEqual(cache.obtener('a', (1,)), (False, None))
+        cache.guardar('a', (1,), [1, 2])
+        self.assertEqual(cache.obtener('a', (1,)), (True, [1, 2]))
+        
+        estadisticas = cache.estadisticas()
+        self.assertEqual((estadisticas['aciertos'], estadisticas['fallos']), (1, 1))
+        print("✅ Test acierto y fallo - PASÓ")
+    
+    def test_invalidacion_por_version(self):
+        """Test de que una versión distinta descarta la entrada"""
+        cache = CacheLecturas(tamano_maximo=4, ttl=60)
+        cache.guardar('a', (1, 0), 'viejo')
+        self.assertEqual(cache.obtener('a', (2, 0)), (False, None))
+        self.assertEqual(cache.estadisticas()['invalidadas'], 1)
+        self.assertEqual(cache.estadisticas()['tamano'], 0)
+        print("✅ Test invalidación por versión - PASÓ")
+    
+    def test_expiracion_ttl(self):
+        """Test de que las entradas caducan pasado el TTL"""
+        cache = CacheLecturas(tamano_maximo=4, ttl=0.05)
+        cache.guardar('a', (1,), 'valor')
+        time.sleep(0.06)
+        self.assertEqual(cache.obtener('a', (1,)), (False, None))
+        self.assertEqual(cache.estadisticas()['expiradas'], 1)
+        print("✅ Test expiración TTL - PASÓ")
+    
+    def test_desalojo_lru(self):
+        """Test de que se desaloja la entrada menos usada al superar el tamaño"""
+        cache = CacheLecturas(tamano_maximo=2, ttl=60)
+        cache.guardar('a', (1,), 1)
+        cache.guardar('b', (1,), 2)
+        cache.obtener('a', (1,))
+        cache.guardar('c', (1,), 3)
+        
+        self.assertTrue(cache.obtener('a', (1,))[0])
+        self.assertFalse(cache.obtener('b', (1,))[0])
+        self.assertEqual(cache.estadisticas()['desalojadas'], 1)
+        print("✅ Test desalojo LRU - PASÓ")
+
+    def test_guardar_purga_expiradas(self):
+        """Test de que guardar descarta las entradas caducadas que nadie vuelve a leer"""
+        cache = CacheLecturas(tamano_maximo=8, ttl=0.05)
+        cache.guardar('a', (1,), 1)
+        cache.guardar('b', (1,), 2)
+        time.sleep(0.06)
+        cache.guardar('c', (1,), 3, ttl=60)
+        
+        estadisticas = cache.estadisticas()
+        self.assertEqual(estadisticas['tamano'], 1)
+        self.assertEqual(estadisticas['expiradas'], 2)
+        self.assertEqual(estadisticas['desalojadas'], 0)
+        print("✅ Test purga de expiradas al guardar - PASÓ")
+
+if __name__ == '__main__':
+    print("🧪 Ejecutando tests de la caché de lecturas...")
+    unittest.main(verbosity=2)
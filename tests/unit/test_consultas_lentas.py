@@ -0,0 +1,98 @@
+import sys
+import os
+import unittest
+from unittest.mock import Mock
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+try:
+    from consultas_lentas import CursorMedido, RegistroConsultasLentas, normalizar_sql, forma_parametros
+    print("✅ Registro de consultas lentas importado correctamente")
+except ImportError as e:
+    print(f"❌ Error importando consultas lentas: {e}")
+
+def crear_conexion(with_rows, plan=None):
+    """Conexión simulada: el primer cursor es el de la consulta, el segundo el del EXPLAIN"""
+    cursor = Mock(with_rows=with_rows, rowcount=3)
+    cursor.fetchall.return_value = [(1,), (2,), (3,)]
+    cursor_explain = Mock()
+    cursor_explain.fetchall.return_value = plan or []
+    connection = Mock()
+    connection.cursor.side_effect = [cursor, cursor_explain]
+    return connection, cursor, cursor_explain
+
+class TestConsultasLentas(unittest.TestCase):
+
+    def test_select_lento_con_explain(self):
+        """Test de que un SELECT lento se registra al cerrar el cursor, con su plan"""
+        registro = RegistroConsultasLentas(umbral=0)
+        plan = [{'table': 'correos', 'type': 'ALL', 'rows': 100000}]
+        connection, cursor, cursor_explain = crear_conexion(True, plan)
+
+        medido = CursorMedido(connection.cursor(), connection, registro)
+        medido.execute("SELECT * FROM correos WHERE tipo = %s", ('gmail',))
+        self.assertEqual(len(medido.fetchall()), 3)
+        self.assertEqual(registro.listar(), [])
+        medido.close()
+
+        cursor_explain.execute.assert_called_once_with(
+            "EXPLAIN SELECT * FROM correos WHERE tipo = %s", ('gmail',))
+        entrada = registro.listar()[0]
+        self.assertEqual(entrada['operacion'], 'SELECT')
+        self.assertEqual(entrada['plan'], plan)
+        self.assertEqual(entrada['parametros'], {'cantidad': 1, 'tipos': {'str': 1}})
+        cursor.close.assert_called_once()
+        print("✅ Test SELECT lento con EXPLAIN - PASÓ")
+
+    def test_insert_lento_sin_explain(self):
+        """Test de que un INSERT se evalúa al ejecutarse y no lanza EXPLAIN"""
+        registro = RegistroConsultasLentas(umbral=0)
+        connection, cursor, cursor_explain = crear_conexion(False)
+
+        medido = CursorMedido(connection.cursor(), connection, registro)
+        medido.execute("INSERT INTO correos (usuario_id, tipo, correo) VALUES (%s, %s, %s)", (1, 'gmail', 'a@gmail.com'))
+
+        self.assertEqual(len(registro.listar()), 1)
+        self.assertIsNone(registro.listar()[0]['plan'])
+        self.assertEqual(registro.estadisticas()['lentas'], 1)
+        cursor_explain.execute.assert_not_called()
+        print("✅ Test INSERT lento sin EXPLAIN - PASÓ")
+
+    def test_umbral_no_superado(self):
+        """Test de que las sentencias rápidas solo se cuentan"""
+        registro = RegistroConsultasLentas(umbral=60)
+        connection, cursor, _ = crear_conexion(False)
+
+        medido = CursorMedido(connection.cursor(), connection, registro)
+        medido.execute("DELETE FROM correos")
+
+        cursor.execute.assert_called_once_with("DELETE FROM correos")
+        self.assertEqual(registro.listar(), [])
+        self.assertEqual((registro.estadisticas()['sentencias'], registro.estadisticas()['lentas']), (1, 0))
+        print("✅ Test umbral no superado - PASÓ")
+
+    def test_capacidad_y_orden(self):
+        """Test de que se guardan las últimas entradas, de la más reciente a la más antigua"""
+        registro = RegistroConsultasLentas(umbral=0, capacidad=2)
+        for i in range(3):
+            registro.registrar(f"SELECT {i}", None, 1.0, 0, None)
+
+        self.assertEqual([e['sql'] for e in registro.listar()], ['SELECT 2', 'SELECT 1'])
+        registro.limpiar()
+        self.assertEqual(registro.estadisticas()['guardadas'], 0)
+        print("✅ Test capacidad y orden - PASÓ")
+
+    def test_normalizar_sql(self):
+        """Test de que el SQL se compacta y los INSERT multi-fila se resumen"""
+        sql = "INSERT INTO correos (a, b)\n    VALUES " + ", ".join(["(%s, %s)"] * 500)
+        self.assertEqual(normalizar_sql(sql), "INSERT INTO correos (a, b) VALUES (%s, %s) x500")
+        self.assertEqual(forma_parametros(None), {'cantidad': 0, 'tipos': {}})
+        print("✅ Test normalizar SQL - PASÓ")
+
+if __name__ == '__main__':
+    print("🧪 Ejecutando tests del registro de consultas lentas...")
+    unittest.main(verbosity=2)
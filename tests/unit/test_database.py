@@ -1,7 +1,7 @@
 import sys
 import os
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, PropertyMock, patch
 
 # CORRECCIÓN: Agregar path correcto
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,13 +10,18 @@ project_root = os.path.dirname(parent_dir)
 sys.path.insert(0, project_root)
 
 try:
-    from database import Database
+    from database import FILAS_MAXIMAS_CACHEABLES, Database
+    from pool import cerrar_pools
     print("✅ Database importado correctamente")
 except ImportError as e:
     print(f"❌ Error importando database: {e}")
 
 class TestDatabase(unittest.TestCase):
     
+    def setUp(self):
+        """Cada test empieza con el registro de pools vacío"""
+        cerrar_pools()
+    
     @patch('database.mysql.connector.connect')
     def test_get_connection_success(self, mock_connect):
         """Test de conexión exitosa a la base de datos"""
@@ -29,9 +34,25 @@ class TestDatabase(unittest.TestCase):
         
         # Verificar que se llamó a connect
         mock_connect.assert_called_once()
-        self.assertEqual(connection, mock_connection)
+        self.assertIs(connection.raw, mock_connection)
         print("✅ Test conexión BD - PASÓ")
     
+    @patch('database.mysql.connector.connect')
+    def test_pool_compartido_reutiliza_conexiones(self, mock_connect):
+        """Test de que varias instancias comparten el pool y no reconectan"""
+        mock_connect.return_value = Mock(in_transaction=False)
+        
+        with Database().conexion() as connection:
+            self.assertIsNotNone(connection)
+        with Database().conexion() as connection:
+            self.assertIsNotNone(connection)
+        
+        mock_connect.assert_called_once()
+        stats = Database().estadisticas_pool()
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['conexiones_creadas'], 1)
+        print("✅ Test pool compartido - PASÓ")
+    
     def test_database_initialization(self):
         """Test de inicialización de la base de datos"""
         db = Database()
@@ -40,6 +61,351 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(db.user, 'root')
         print("✅ Test inicialización BD - PASÓ")
 
+    @patch('database.mysql.connector.connect')
+    def test_agregar_usuarios_lote(self, mock_connect):
+        """Test de inserción multi-fila de usuarios y recuperación de ids"""
+        mock_cursor = Mock()
+        mock_cursor.fetchone.return_value = (1,)
+        type(mock_cursor).lastrowid = PropertyMock(side_effect=[100, 102])
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        
+        usuarios = [{'nombre': f'N{i}', 'apellido': 'A', 'edad': 30} for i in range(3)]
+        ids = Database().agregar_usuarios_lote(usuarios, tamano_lote=2)
+        
+        self.assertEqual(ids, [100, 101, 102])
+        # Una consulta de configuración + dos INSERT multi-fila y un único commit
+        self.assertEqual(mock_cursor.execute.call_count, 3)
+        self.assertIn("(%s, %s, %s), (%s, %s, %s)", mock_cursor.execute.call_args_list[1][0][0])
+        mock_connect.return_value.commit.assert_called_once()
+        print("✅ Test inserción de usuarios en lote - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_iterar_correos_por_lotes(self, mock_connect):
+        """Test de lectura por lotes con fetchmany y devolución al pool"""
+        mock_cursor = Mock()
+        mock_cursor.fetchmany.side_effect = [[{'id': 2}, {'id': 1}], [{'id': 0}], []]
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        mock_connect.return_value.in_transaction = False
+        
+        db = Database()
+        lotes = list(db.iterar_correos(tamano_lote=2))
+        
+        self.assertEqual(lotes, [[{'id': 2}, {'id': 1}], [{'id': 0}]])
+        mock_connect.return_value.cursor.assert_called_once_with(dictionary=True, buffered=False)
+        self.assertEqual(db.estadisticas_pool()['libres'], 1)
+        print("✅ Test lectura de correos por lotes - PASÓ")
+    
+    @patch('database.mysql.connector.connect')
+    def test_iterar_correos_interrumpido_invalida_conexion(self, mock_connect):
+        """Test de que una iteración abandonada no devuelve la conexión al pool"""
+        mock_cursor = Mock()
+        mock_cursor.fetchmany.side_effect = [[{'id': 2}], [{'id': 1}], []]
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        
+        db = Database()
+        lotes = db.iterar_correos(tamano_lote=1)
+        next(lotes)
+        lotes.close()
+        
+        mock_connect.return_value.close.assert_called_once()
+        self.assertEqual(db.estadisticas_pool()['libres'], 0)
+        print("✅ Test iteración interrumpida - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_iterar_correos_error_a_mitad_se_propaga(self, mock_connect):
+        """Test de que un error a mitad del recorrido llega al llamador y no devuelve la conexión"""
+        from mysql.connector import Error
+        mock_cursor = Mock()
+        mock_cursor.fetchmany.side_effect = [[{'id': 2}], Error('conexión perdida')]
+        mock_connect.return_value.cursor.return_value = mock_cursor
+
+        db = Database()
+        lotes = db.iterar_correos(tamano_lote=1)
+        self.assertEqual(next(lotes), [{'id': 2}])
+        with self.assertRaises(Error):
+            next(lotes)
+
+        mock_connect.return_value.close.assert_called_once()
+        self.assertEqual(db.estadisticas_pool()['libres'], 0)
+        print("✅ Test error a mitad del recorrido - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_obtener_correos_usuario_error_se_propaga(self, mock_connect):
+        """Test de que un error de la base no se confunde con un usuario inexistente"""
+        from mysql.connector import Error
+        mock_cursor = Mock()
+        mock_cursor.fetchone.return_value = None
+        mock_connect.return_value.cursor.return_value = mock_cursor
+
+        db = Database()
+        self.assertIsNone(db.obtener_correos_usuario(99))
+        mock_cursor.execute.side_effect = Error('conexión perdida')
+        with self.assertRaises(Error):
+            db.obtener_correos_usuario(99)
+        self.assertEqual(mock_cursor.close.call_count, 2)
+        print("✅ Test error en correos de un usuario - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_guardar_correos_lote_por_chunks(self, mock_connect):
+        """Test de que el lote se parte por filas y se hace commit cada N chunks"""
+        mock_cursor = Mock()
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        correos = [{'usuario_id': i, 'tipo': 'gmail', 'correo': f'u{i}@gmail.com'} for i in range(5)]
+        
+        insertados = Database().guardar_correos_lote(correos, filas_por_chunk=2, chunks_por_commit=2)
+        
+        self.assertEqual(insertados, 5)
+        self.assertEqual(mock_cursor.execute.call_count, 3)
+        self.assertEqual(len(mock_cursor.execute.call_args_list[0][0][1]), 6)
+        self.assertEqual(mock_connect.return_value.commit.call_count, 2)
+        print("✅ Test inserción de correos por chunks - PASÓ")
+    
+    def test_chunks_acotados_por_bytes(self):
+        """Test de que ningún chunk supera el tamaño máximo en bytes"""
+        from database import _dividir_en_chunks
+        correos = [{'usuario_id': i, 'tipo': 'gmail', 'correo': 'x' * 70} for i in range(10)]
+        
+        chunks = list(_dividir_en_chunks(correos, 1000, 300))
+        
+        self.assertEqual([len(c) for c in chunks], [3, 3, 3, 1])
+        print("✅ Test chunks por bytes - PASÓ")
+    
+    @patch('database.Database._guardar_correos_individualmente')
+    @patch('database.mysql.connector.connect')
+    def test_guardar_correos_lote_fallback_solo_grupo_fallido(self, mock_connect, mock_individual):
+        """Test de que un error solo manda al fallback el grupo sin commit"""
+        from mysql.connector import Error
+        mock_cursor = Mock()
+        mock_cursor.execute.side_effect = [None, Error('duplicado'), None]
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        mock_individual.return_value = 1
+        correos = [{'usuario_id': i, 'tipo': 'gmail', 'correo': f'u{i}@gmail.com'} for i in range(6)]
+        
+        insertados = Database().guardar_correos_lote(correos, filas_por_chunk=2)
+        
+        fallidos = mock_individual.call_args[0][2]
+        self.assertEqual([c['usuario_id'] for c in fallidos], [2, 3])
+        self.assertEqual(insertados, 5)
+        print("✅ Test fallback por grupo - PASÓ")
+    
+    @patch('database.mysql.connector.connect')
+    def test_fallback_usa_la_conexion_del_lote(self, mock_connect):
+        """Test de que el fallback no pide otra conexión y solo cuenta las filas insertadas"""
+        from mysql.connector import Error, IntegrityError
+        mock_cursor = Mock()
+        mock_cursor.execute.side_effect = [Error('duplicado'), None, IntegrityError('duplicado'), None]
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        correos = [{'usuario_id': i, 'tipo': 'gmail', 'correo': f'u{i}@gmail.com'} for i in range(3)]
+        
+        db = Database(pool_size=1, max_overflow=0)
+        insertados = db.guardar_correos_lote(correos)
+        
+        self.assertEqual(insertados, 2)
+        self.assertEqual(db.estadisticas_pool()['checkouts'], 1)
+        self.assertEqual(db.estadisticas_pool()['en_uso'], 0)
+        print("✅ Test fallback con la conexión del lote - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_obtener_usuarios_filtros_en_sql(self, mock_connect):
+        """Test de que los filtros de usuarios se traducen a condiciones indexables"""
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = []
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        
+        Database().obtener_usuarios(50, 900, {'nombre': 'Jo_', 'edad_min': 18, 'edad_max': 25})
+        
+        query, params = mock_cursor.execute.call_args[0]
+        self.assertIn("nombre LIKE %s AND edad >= %s AND edad <= %s AND id < %s", query)
+        self.assertEqual(params, ['Jo\\_%', 18, 25, 900, 50])
+        print("✅ Test filtros de usuarios en SQL - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_obtener_correos_filtros_en_sql(self, mock_connect):
+        """Test de que los filtros de correos se traducen a condiciones indexables"""
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = []
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        
+        Database().obtener_correos(20, None, {'usuario_id': 4, 'tipos': ['gmail', 'yahoo'], 'prefijo': 'ana'})
+        
+        query, params = mock_cursor.execute.call_args[0]
+        self.assertIn("c.usuario_id = %s AND c.tipo IN (%s, %s) AND c.correo LIKE %s", query)
+        self.assertEqual(params, [4, 'gmail', 'yahoo', 'ana%', 20])
+        print("✅ Test filtros de correos en SQL - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_estadisticas_cacheadas_e_invalidadas(self, mock_connect):
+        """Test de que /stats se calcula una vez y se invalida con las escrituras"""
+        mock_cursor = Mock()
+        mock_cursor.fetchone.side_effect = lambda: (3, None)
+        mock_cursor.fetchall.side_effect = [
+            [('18-25', 3)], [('gmail', 3), ('yahoo', 2)],
+            [('18-25', 2)], [('gmail', 2)]
+        ]
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        db = Database()
+        
+        primera = db.obtener_estadisticas()
+        self.assertEqual(primera['total_correos'], 5)
+        self.assertEqual(primera['correos_por_tipo'], {'gmail': 3, 'yahoo': 2})
+        llamadas = mock_cursor.execute.call_count
+        
+        # Sin escrituras se sirve de la caché
+        self.assertIs(db.obtener_estadisticas(), primera)
+        self.assertEqual(mock_cursor.execute.call_count, llamadas)
+        
+        # Borrar un usuario invalida la caché
+        db.eliminar_usuario(1)
+        segunda = db.obtener_estadisticas()
+        self.assertEqual(segunda['total_correos'], 2)
+        print("✅ Test caché de estadísticas - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_lecturas_cacheadas_hasta_escritura(self, mock_connect):
+        """Test de que obtener_usuarios usa la caché y una escritura la invalida"""
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = [{'id': 1, 'nombre': 'Ana'}]
+        mock_cursor.lastrowid = 2
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        db = Database()
+        
+        db.obtener_usuarios(10)
+        db.obtener_usuarios(10)
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+        
+        # Otra página es otra clave
+        db.obtener_usuarios(10, 50)
+        self.assertEqual(mock_cursor.execute.call_count, 2)
+        
+        db.agregar_usuario('Luis', 'Pérez', 30)
+        db.obtener_usuarios(10)
+        self.assertEqual(mock_cursor.execute.call_count, 4)
+        
+        estadisticas = db.estadisticas_cache()
+        self.assertEqual(estadisticas['aciertos'], 1)
+        self.assertEqual(estadisticas['invalidadas'], 1)
+        print("✅ Test caché de lecturas - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_lecturas_cacheadas_por_huella(self, mock_connect):
+        """Test de que una huella distinta (escritura de otro proceso) invalida la caché"""
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = [{'id': 1, 'nombre': 'Ana'}]
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        db = Database()
+
+        db.obtener_usuarios(10, huella=((1, 1),))
+        db.obtener_usuarios(10, huella=((1, 1),))
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+
+        db.obtener_usuarios(10, huella=((2, 2),))
+        self.assertEqual(mock_cursor.execute.call_count, 2)
+        print("✅ Test caché de lecturas por huella - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_lecturas_sin_limite_no_cacheadas(self, mock_connect):
+        """Test de que las lecturas sin límite o demasiado grandes no se guardan en la caché"""
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = [{'id': 1, 'nombre': 'Ana'}]
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        db = Database()
+
+        db.obtener_usuarios()
+        db.obtener_usuarios()
+        db.obtener_correos()
+        db.obtener_usuarios(FILAS_MAXIMAS_CACHEABLES + 1)
+        db.obtener_usuarios(FILAS_MAXIMAS_CACHEABLES + 1)
+        self.assertEqual(mock_cursor.execute.call_count, 5)
+        self.assertEqual(db.estadisticas_cache()['tamano'], 0)
+        print("✅ Test lecturas sin límite fuera de la caché - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_estado_tablas(self, mock_connect):
+        """Test de la huella (MAX(id), COUNT(*)) de las tablas en una sola consulta"""
+        mock_cursor = Mock()
+        mock_cursor.fetchone.return_value = (40, 12, 320, 96)
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        db = Database()
+        
+        self.assertEqual(db.obtener_estado_tablas('usuarios', 'correos'), ((40, 12), (320, 96)))
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+        self.assertIn("(SELECT COUNT(*) FROM correos)", mock_cursor.execute.call_args[0][0])
+        
+        with self.assertRaises(ValueError):
+            db.obtener_estado_tablas('usuarios; DROP TABLE usuarios')
+        print("✅ Test estado de tablas - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_eliminar_rango(self, mock_connect):
+        """Test del borrado por rango de la clave primaria con su propio commit"""
+        mock_cursor = Mock(rowcount=250)
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        db = Database()
+        
+        self.assertEqual(db.eliminar_rango('usuarios', 1, 1000), 250)
+        sql, params = mock_cursor.execute.call_args[0]
+        self.assertEqual(sql, "DELETE FROM usuarios WHERE id BETWEEN %s AND %s")
+        self.assertEqual(params, (1, 1000))
+        mock_connect.return_value.commit.assert_called_once()
+        
+        from mysql.connector import Error
+        mock_cursor.execute.side_effect = Error('bloqueo')
+        self.assertIsNone(db.eliminar_rango('correos', 1, 10))
+        mock_connect.return_value.rollback.assert_called()
+        print("✅ Test eliminar rango - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_truncar_correos_restaura_sesion(self, mock_connect):
+        """Test de TRUNCATE con AUTO_INCREMENT conservado y lock_wait_timeout restaurado"""
+        mock_cursor = Mock()
+        mock_cursor.fetchone.return_value = (42,)
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        db = Database()
+        
+        # Devuelve el COUNT(*) de antes de truncar
+        self.assertEqual(db.truncar_correos(espera_bloqueo=2), 42)
+        sentencias = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        self.assertEqual(sentencias[0], "SET SESSION lock_wait_timeout = %s")
+        self.assertEqual(sentencias[1], "SELECT COUNT(*) FROM correos")
+        self.assertIn("information_schema.tables", sentencias[3])
+        self.assertEqual(sentencias[5:], [
+            "TRUNCATE TABLE correos",
+            "ALTER TABLE correos AUTO_INCREMENT = 42",
+            "SET SESSION lock_wait_timeout = DEFAULT"
+        ])
+        
+        # Sin el bloqueo de metadatos a tiempo: no se trunca y la sesión se restaura
+        from mysql.connector import Error
+        mock_cursor.execute.reset_mock()
+        mock_cursor.execute.side_effect = [None, None, None, None, None, Error('Lock wait timeout exceeded'), None]
+        self.assertIsNone(db.truncar_correos())
+        self.assertEqual(mock_cursor.execute.call_args[0][0], "SET SESSION lock_wait_timeout = DEFAULT")
+        
+        # Truncada aunque falle el ALTER: no hace falta borrar por lotes
+        mock_cursor.execute.reset_mock()
+        mock_cursor.execute.side_effect = [None, None, None, None, None, None, Error('ALTER fallido'), None]
+        self.assertEqual(db.truncar_correos(), 42)
+        self.assertEqual(mock_cursor.execute.call_args[0][0], "SET SESSION lock_wait_timeout = DEFAULT")
+        print("✅ Test truncar correos - PASÓ")
+
+    @patch('database.mysql.connector.connect')
+    def test_eliminar_usuarios_por_lotes(self, mock_connect):
+        """Test de DELETE ... IN por lotes de ids ordenados con una sola conexión"""
+        mock_cursor = Mock(rowcount=2)
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        db = Database()
+        
+        self.assertEqual(db.eliminar_usuarios([5, 3, 1, 3, 4], tamano_lote=3), 4)
+        llamadas = [c[0] for c in mock_cursor.execute.call_args_list]
+        self.assertEqual(llamadas, [
+            ("DELETE FROM usuarios WHERE id IN (%s, %s, %s)", [1, 3, 4]),
+            ("DELETE FROM usuarios WHERE id IN (%s)", [5])
+        ])
+        self.assertEqual(mock_connect.return_value.commit.call_count, 2)
+        mock_connect.assert_called_once()
+        self.assertEqual(db.eliminar_usuarios([]), 0)
+        print("✅ Test eliminar usuarios por lotes - PASÓ")
+
 if __name__ == '__main__':
     print("🧪 INICIANDO PRUEBAS DE BASE DE DATOS")
     print("=" * 50)
@@ -0,0 +1,180 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest.mock import AsyncMock
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+try:
+    from database_async import DatabaseAsync
+    from pool import PoolExhaustedError
+    from pool_async import PoolAsync
+    print("✅ Capa asíncrona importada correctamente")
+except ImportError as e:
+    print(f"❌ Error importando la capa asíncrona: {e}")
+
+def crear_conexion(cursor=None):
+    """Conexión asyncio simulada que siempre entrega el mismo cursor"""
+    connection = AsyncMock(in_transaction=False)
+    connection.cursor.return_value = cursor or crear_cursor()
+    return connection
+
+def crear_cursor(fetchone=None, fetchall=None, fetchmany=None, lastrowid=None):
+    cursor = AsyncMock(with_rows=True, rowcount=0, lastrowid=lastrowid)
+    cursor.fetchone.return_value = fetchone
+    cursor.fetchall.return_value = fetchall or []
+    if fetchmany is not None:
+        cursor.fetchmany.side_effect = fetchmany
+    return cursor
+
+class TestPoolAsync(unittest.IsolatedAsyncioTestCase):
+
+    def _pool(self, **opciones):
+        return PoolAsync('test_async', AsyncMock(side_effect=lambda: crear_conexion()), **opciones)
+
+    async def test_close_devuelve_conexion(self):
+        """Test de que close() devuelve la conexión al pool en vez de cerrarla"""
+        pool = self._pool(tamano=2, max_overflow=0)
+        connection = await pool.checkout()
+        raw = connection.raw
+        await connection.close()
+
+        raw.close.assert_not_called()
+        self.assertIs((await pool.checkout()).raw, raw)
+        print("✅ Test devolución al pool asíncrono - PASÓ")
+
+    async def test_agotamiento_con_timeout(self):
+        """Test de que el pool lanza PoolExhaustedError al agotar el timeout"""
+        pool = self._pool(tamano=1, max_overflow=0, timeout=0.05)
+        await pool.checkout()
+
+        with self.assertRaises(PoolExhaustedError):
+            await pool.checkout()
+        self.assertEqual(pool.estadisticas()['agotamientos'], 1)
+        print("✅ Test agotamiento asíncrono - PASÓ")
+
+    async def test_espera_sin_bloquear(self):
+        """Test de que una corrutina espera la conexión mientras otra la devuelve"""
+        pool = self._pool(tamano=1, max_overflow=0, timeout=2)
+        connection = await pool.checkout()
+
+        async def devolver():
+            await asyncio.sleep(0.05)
+            await connection.close()
+
+        _, segunda = await asyncio.gather(devolver(), pool.checkout())
+        self.assertFalse(segunda.cerrada)
+        stats = pool.estadisticas()
+        self.assertEqual(stats['esperas'], 1)
+        self.assertEqual(stats['conexiones_creadas'], 1)
+        print("✅ Test espera en pool asíncrono - PASÓ")
+
+class TestDatabaseAsync(unittest.IsolatedAsyncioTestCase):
+
+    def _db(self, connection):
+        db = DatabaseAsync()
+        db._crear_conexion = AsyncMock(return_value=connection)
+        return db
+
+    async def test_lecturas_cacheadas_hasta_escritura(self):
+        """Test de que las listas se cachean hasta la siguiente escritura"""
+        cursor = crear_cursor(fetchall=[{'id': 1}], lastrowid=2)
+        db = self._db(crear_conexion(cursor))
+
+        self.assertEqual(await db.obtener_usuarios(10, None, {'nombre': 'An'}), [{'id': 1}])
+        self.assertEqual(await db.obtener_usuarios(10, None, {'nombre': 'An'}), [{'id': 1}])
+        self.assertEqual(cursor.fetchall.await_count, 1)
+        sql, params = cursor.execute.call_args[0]
+        self.assertIn("nombre LIKE %s", sql)
+        self.assertEqual(params, ['An%', 10])
+
+        self.assertEqual(await db.agregar_usuario('Ana', 'Gil', 30), 2)
+        await db.obtener_usuarios(10, None, {'nombre': 'An'})
+        self.assertEqual(cursor.fetchall.await_count, 2)
+        print("✅ Test caché de lecturas asíncrona - PASÓ")
+
+    async def test_lecturas_compartidas_con_database(self):
+        """Test de que una escritura de la Database síncrona invalida la caché de DatabaseAsync"""
+        from database_memoria import DatabaseMemoria
+        cursor = crear_cursor(fetchall=[{'id': 1}])
+        db = self._db(crear_conexion(cursor))
+        db_sync = DatabaseMemoria()
+        db.compartir_lecturas(db_sync)
+
+        await db.obtener_usuarios(10)
+        db_sync.agregar_usuario('Ana', 'Gil', 30)
+        await db.obtener_usuarios(10)
+        self.assertEqual(cursor.fetchall.await_count, 2)
+        self.assertEqual(db.estadisticas_cache(), db_sync.estadisticas_cache())
+        print("✅ Test caché compartida con la capa síncrona - PASÓ")
+
+    async def test_agregar_usuarios_lote(self):
+        """Test de ids consecutivos a partir de lastrowid en el alta por lotes"""
+        cursor = crear_cursor(fetchone=(1,), lastrowid=50)
+        connection = crear_conexion(cursor)
+        db = self._db(connection)
+
+        ids = await db.agregar_usuarios_lote([{'nombre': 'A', 'apellido': 'B', 'edad': 20}] * 3)
+        self.assertEqual(ids, [50, 51, 52])
+        connection.commit.assert_awaited_once()
+        self.assertEqual(db.estadisticas_pool()['en_uso'], 0)
+        print("✅ Test alta por lotes asíncrona - PASÓ")
+
+    async def test_iterar_correos_por_lotes(self):
+        """Test del recorrido por lotes con un cursor sin buffer"""
+        cursor = crear_cursor(fetchmany=[[{'id': 3}, {'id': 2}], [{'id': 1}], []])
+        connection = crear_conexion(cursor)
+        db = self._db(connection)
+
+        lotes = [filas async for filas in db.iterar_correos(tamano_lote=2)]
+        self.assertEqual(lotes, [[{'id': 3}, {'id': 2}], [{'id': 1}]])
+        self.assertEqual(connection.cursor.call_args.kwargs['buffered'], False)
+        self.assertEqual(db.estadisticas_pool()['libres'], 1)
+        print("✅ Test recorrido por lotes asíncrono - PASÓ")
+
+    async def test_eliminar_usuarios_por_lotes(self):
+        """Test del borrado de varios usuarios con un commit por lote"""
+        cursor = crear_cursor()
+        cursor.rowcount = 2
+        connection = crear_conexion(cursor)
+        db = self._db(connection)
+
+        self.assertEqual(await db.eliminar_usuarios([4, 2, 3], tamano_lote=2), 4)
+        self.assertEqual(cursor.execute.await_args_list[0].args[1], [2, 3])
+        self.assertEqual(connection.commit.await_count, 2)
+        print("✅ Test borrado de varios usuarios asíncrono - PASÓ")
+
+    async def test_correos_de_usuario_inexistente(self):
+        """Test de que un usuario inexistente devuelve None"""
+        db = self._db(crear_conexion(crear_cursor(fetchone=None)))
+        self.assertIsNone(await db.obtener_correos_usuario(99))
+        print("✅ Test usuario inexistente asíncrono - PASÓ")
+
+    async def test_correos_de_usuario_con_error(self):
+        """Test de que un error de la base se propaga en lugar de parecer un usuario inexistente"""
+        from mysql.connector import Error
+        cursor = crear_cursor()
+        cursor.execute.side_effect = Error('conexión perdida')
+        db = self._db(crear_conexion(cursor))
+        with self.assertRaises(Error):
+            await db.obtener_correos_usuario(99)
+        cursor.close.assert_awaited_once()
+        print("✅ Test error en correos de un usuario asíncrono - PASÓ")
+
+    async def test_sin_conexion(self):
+        """Test de que un pool agotado se traduce en listas vacías, como en Database"""
+        db = DatabaseAsync(pool_size=1, max_overflow=0, pool_timeout=0.01)
+        db._crear_conexion = AsyncMock(return_value=crear_conexion())
+        await db.pool.checkout()
+        self.assertEqual(await db.obtener_correos(), [])
+        self.assertIsNone(await db.obtener_estado_tablas('usuarios'))
+        print("✅ Test pool agotado asíncrono - PASÓ")
+
+if __name__ == '__main__':
+    print("🧪 Ejecutando tests de la capa asíncrona...")
+    unittest.main(verbosity=2)
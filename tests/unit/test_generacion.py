@@ -0,0 +1,144 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+try:
+    from database import crear_database
+    from generacion import dividir_en_shards, generar_rango, generar_en_paralelo, generar_shard
+    from jobs import JobCancelado
+    from plantillas import MotorPlantillas
+    from pool import cerrar_pools
+    print("✅ Generación importada correctamente")
+except ImportError as e:
+    print(f"❌ Error importando generacion: {e}")
+
+def usuarios_en_rango(desde, hasta):
+    return [{'id': i, 'nombre': 'Ana', 'apellido': 'Gil'} for i in range(desde, hasta + 1)]
+
+class EjecutorEnHilos(ThreadPoolExecutor):
+    """ProcessPoolExecutor sustituido por hilos que recuerda cómo se cerró"""
+    creados = []
+
+    def __init__(self, max_workers, mp_context, initializer=None, initargs=()):
+        super().__init__(max_workers, initializer=initializer, initargs=initargs)
+        self.initargs = initargs
+        self.cierres = []
+        EjecutorEnHilos.creados.append(self)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.cierres.append((wait, cancel_futures))
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+
+class TestGeneracion(unittest.TestCase):
+    
+    def test_dividir_en_shards(self):
+        """Test de reparto del rango de ids en shards contiguos"""
+        self.assertEqual(dividir_en_shards(1, 10, 3), [(1, 4), (5, 7), (8, 10)])
+        self.assertEqual(dividir_en_shards(5, 6, 8), [(5, 5), (6, 6)])
+        print("✅ Test división en shards - PASÓ")
+    
+    def test_generar_rango_por_sublotes(self):
+        """Test de que cada sublote de ids se lee e inserta por separado"""
+        db = Mock()
+        db.obtener_usuarios_rango.side_effect = usuarios_en_rango
+        db.guardar_correos_lote.side_effect = len
+        
+        filas, resumen = generar_rango(db, MotorPlantillas(), 1, 5, ['gmail'], ids_por_lote=2)
+        
+        self.assertEqual(db.guardar_correos_lote.call_count, 3)
+        self.assertEqual([f['usuario_id'] for f in filas], [1, 2, 3, 4, 5])
+        self.assertEqual(resumen.to_dict()['por_tipo'], {'gmail': 5})
+        self.assertEqual(resumen.to_dict()['rango_usuarios'], [1, 5])
+        print("✅ Test generación por rango - PASÓ")
+    
+    @patch('generacion.crear_database')
+    def test_generar_en_paralelo_combina_resumenes(self, mock_database):
+        """Test de que los resúmenes de todos los shards se combinan"""
+        mock_database.return_value.obtener_usuarios_rango.side_effect = usuarios_en_rango
+        mock_database.return_value.guardar_correos_lote.side_effect = len
+        db = Mock()
+        db.obtener_rango_ids.return_value = (1, 10)
+        db.parametros_conexion.return_value = {'backend': 'mysql', 'host': 'localhost'}
+        
+        with patch('generacion.ProcessPoolExecutor', EjecutorEnHilos):
+            resumen = generar_en_paralelo(db, ['gmail', 'yahoo'], procesos=2)
+        
+        self.assertEqual(resumen['shards'], 8)
+        self.assertEqual(resumen['total_correos'], 20)
+        self.assertEqual(resumen['por_tipo'], {'gmail': 10, 'yahoo': 10})
+        self.assertEqual(resumen['rango_usuarios'], [1, 10])
+        mock_database.assert_called_with(backend='mysql', host='localhost', pool_size=1, max_overflow=0)
+        print("✅ Test generación en paralelo - PASÓ")
+    
+    def test_generar_rango_se_detiene_al_cancelar(self):
+        """Test de que el evento de cancelación se comprueba entre sublotes"""
+        cancelacion = threading.Event()
+        db = Mock()
+        db.obtener_usuarios_rango.side_effect = usuarios_en_rango
+        db.guardar_correos_lote.side_effect = lambda filas: cancelacion.set() or len(filas)
+        
+        with self.assertRaises(JobCancelado):
+            generar_rango(db, MotorPlantillas(), 1, 6, ['gmail'], ids_por_lote=2, cancelacion=cancelacion)
+        self.assertEqual(db.guardar_correos_lote.call_count, 1)
+        print("✅ Test cancelación entre sublotes - PASÓ")
+    
+    @patch('generacion.crear_database')
+    def test_cancelar_en_paralelo_no_espera_a_los_shards(self, mock_database):
+        """Test de que al cancelar se avisa a los shards y se cierra el pool sin esperar"""
+        mock_database.return_value.obtener_usuarios_rango.side_effect = usuarios_en_rango
+        mock_database.return_value.guardar_correos_lote.side_effect = len
+        db = Mock()
+        db.obtener_rango_ids.return_value = (1, 10)
+        db.parametros_conexion.return_value = {'backend': 'mysql', 'host': 'localhost'}
+        job = Mock()
+        job.comprobar_cancelacion.side_effect = JobCancelado('cancelado')
+        
+        EjecutorEnHilos.creados.clear()
+        with patch('generacion.ProcessPoolExecutor', EjecutorEnHilos):
+            with self.assertRaises(JobCancelado):
+                generar_en_paralelo(db, ['gmail'], procesos=1, job=job)
+        
+        executor = EjecutorEnHilos.creados[0]
+        self.assertEqual(executor.cierres, [(False, True)])
+        self.assertTrue(executor.initargs[0].is_set())
+        db.marcar_escritura.assert_called_once_with('correos')
+        print("✅ Test cancelación en paralelo - PASÓ")
+    
+    def test_generar_shard_con_insercion_masiva_fallida(self):
+        """Test de que un shard con un pool de una conexión sobrevive al fallback fila a fila"""
+        directorio = tempfile.mkdtemp()
+        parametros = {'backend': 'sqlite', 'sqlite_ruta': os.path.join(directorio, 'crm.sqlite3')}
+        try:
+            cerrar_pools()
+            db = crear_database(**parametros)
+            db.crear_tablas()
+            ids = db.agregar_usuarios_lote([{'nombre': 'Ana', 'apellido': 'Gil', 'edad': 30}] * 5)
+            # Un correo ya existente hace fallar el INSERT multi-fila del shard
+            db.guardar_correo(ids[2], 'gmail', 'previo@gmail.com')
+            cerrar_pools()
+            
+            resultado = generar_shard(parametros, ids[0], ids[-1], ['gmail'])
+            
+            self.assertEqual(resultado['total_correos'], 4)
+            self.assertEqual(resultado['correos_descartados'], 1)
+            self.assertEqual(db.obtener_estado_tablas('correos')[0][1], 5)
+        finally:
+            cerrar_pools()
+            shutil.rmtree(directorio, ignore_errors=True)
+        print("✅ Test shard con fallback - PASÓ")
+
+if __name__ == '__main__':
+    print("🧪 INICIANDO PRUEBAS DE GENERACIÓN PARALELA")
+    print("=" * 50)
+    unittest.main(verbosity=2)
@@ -0,0 +1,87 @@
+import sys
+import os
+import threading
+import unittest
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+try:
+    from jobs import Job, JobManager
+    print("✅ Jobs importado correctamente")
+except ImportError as e:
+    print(f"❌ Error importando jobs: {e}")
+
+class TestJobManager(unittest.TestCase):
+    
+    def setUp(self):
+        self.manager = JobManager(max_workers=1)
+    
+    def tearDown(self):
+        self.manager.cerrar()
+    
+    def _esperar(self, job, timeout=2):
+        import time
+        limite = time.time() + timeout
+        while not job.terminado and time.time() < limite:
+            time.sleep(0.01)
+    
+    def test_job_completado_con_progreso(self):
+        """Test de un trabajo que informa progreso y devuelve resultado"""
+        def trabajo(job, lotes):
+            job.fijar_total(lotes * 10)
+            for _ in range(lotes):
+                job.avanzar(10, 80)
+            return {'ok': True}
+        
+        job = self.manager.enviar('prueba', trabajo, 3)
+        self._esperar(job)
+        
+        data = job.to_dict()
+        self.assertEqual(data['estado'], Job.COMPLETADO)
+        self.assertEqual(data['procesados'], 30)
+        self.assertEqual(data['filas_escritas'], 240)
+        self.assertEqual(data['progreso'], 100.0)
+        self.assertEqual(data['resultado'], {'ok': True})
+        print("✅ Test trabajo completado - PASÓ")
+    
+    def test_job_cancelado(self):
+        """Test de cancelación entre lotes"""
+        iniciado = threading.Event()
+        continuar = threading.Event()
+        
+        def trabajo(job):
+            iniciado.set()
+            continuar.wait(2)
+            job.comprobar_cancelacion()
+            return 'no debería llegar'
+        
+        job = self.manager.enviar('prueba', trabajo)
+        iniciado.wait(2)
+        self.manager.cancelar(job.id)
+        continuar.set()
+        self._esperar(job)
+        
+        self.assertEqual(job.estado, Job.CANCELADO)
+        self.assertIsNone(job.resultado)
+        print("✅ Test trabajo cancelado - PASÓ")
+    
+    def test_job_fallido(self):
+        """Test de que una excepción deja el trabajo como fallido"""
+        def trabajo(job):
+            raise ValueError('boom')
+        
+        job = self.manager.enviar('prueba', trabajo)
+        self._esperar(job)
+        
+        self.assertEqual(job.estado, Job.FALLIDO)
+        self.assertEqual(job.error, 'boom')
+        print("✅ Test trabajo fallido - PASÓ")
+
+if __name__ == '__main__':
+    print("🧪 INICIANDO PRUEBAS DE TRABAJOS EN SEGUNDO PLANO")
+    print("=" * 50)
+    unittest.main(verbosity=2)
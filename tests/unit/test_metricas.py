@@ -0,0 +1,99 @@
+import sys
+import os
+import unittest
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+try:
+    from metricas import RegistroMetricas, DB_DURACION, DB_FILAS, medir_db
+    print("✅ Métricas importadas correctamente")
+except ImportError as e:
+    print(f"❌ Error importando métricas: {e}")
+
+class TestMetricas(unittest.TestCase):
+    
+    def test_contador_formato_prometheus(self):
+        """Test del formato de texto de un contador con etiquetas"""
+        registro = RegistroMetricas()
+        contador = registro.contador('prueba_total', 'Contador de prueba', ('ruta',))
+        contador.inc(ruta='/usuarios')
+        contador.inc(2, ruta='/usuarios')
+        contador.inc(ruta='/a"b')
+        
+        texto = registro.exponer()
+        self.assertIn('# TYPE prueba_total counter', texto)
+        self.assertIn('prueba_total{ruta="/usuarios"} 3', texto)
+        self.assertIn('prueba_total{ruta="/a\\"b"} 1', texto)
+        
+        with self.assertRaises(ValueError):
+            contador.inc(metodo='GET')
+        print("✅ Test contador - PASÓ")
+    
+    def test_histograma_buckets_acumulados(self):
+        """Test de buckets acumulados, suma y cuenta de un histograma"""
+        registro = RegistroMetricas()
+        histograma = registro.histograma('latencia_segundos', 'Latencia', buckets=(0.1, 1.0))
+        for valor in (0.05, 0.1, 0.5, 3.0):
+            histograma.observe(valor)
+        
+        texto = registro.exponer()
+        self.assertIn('latencia_segundos_bucket{le="0.1"} 2', texto)
+        self.assertIn('latencia_segundos_bucket{le="1"} 3', texto)
+        self.assertIn('latencia_segundos_bucket{le="+Inf"} 4', texto)
+        self.assertIn('latencia_segundos_sum 3.65', texto)
+        self.assertIn('latencia_segundos_count 4', texto)
+        print("✅ Test histograma - PASÓ")
+    
+    def test_recolector(self):
+        """Test de que los recolectores se ejecutan al exponer"""
+        registro = RegistroMetricas()
+        gauge = registro.gauge('conexiones', 'Conexiones en uso')
+        registro.agregar_recolector(lambda: gauge.fijar(7))
+        self.assertIn('conexiones 7', registro.exponer())
+        print("✅ Test recolector - PASÓ")
+    
+    def test_medir_db(self):
+        """Test del decorador de métodos de Database"""
+        @medir_db
+        def listar_prueba():
+            return [1, 2, 3]
+        
+        @medir_db(devuelve_cuenta=True)
+        def guardar_prueba():
+            return 5
+        
+        listar_prueba()
+        guardar_prueba()
+        self.assertEqual(DB_DURACION.cuenta(metodo='listar_prueba'), 1)
+        self.assertEqual(DB_FILAS.valor(metodo='listar_prueba'), 3)
+        self.assertEqual(DB_FILAS.valor(metodo='guardar_prueba'), 5)
+        print("✅ Test medir_db - PASÓ")
+
+    def test_medir_db_con_excepcion(self):
+        """Test de que la latencia se registra aunque el método falle, también en corrutinas"""
+        import asyncio
+
+        @medir_db
+        def fallar_prueba():
+            raise RuntimeError('pool agotado')
+
+        @medir_db
+        async def fallar_prueba_async():
+            raise RuntimeError('pool agotado')
+
+        with self.assertRaises(RuntimeError):
+            fallar_prueba()
+        with self.assertRaises(RuntimeError):
+            asyncio.run(fallar_prueba_async())
+        self.assertEqual(DB_DURACION.cuenta(metodo='fallar_prueba'), 1)
+        self.assertEqual(DB_DURACION.cuenta(metodo='fallar_prueba_async'), 1)
+        self.assertEqual(DB_FILAS.valor(metodo='fallar_prueba'), 0)
+        print("✅ Test medir_db con excepción - PASÓ")
+
+if __name__ == '__main__':
+    print("🧪 Ejecutando tests de métricas...")
+    unittest.main(verbosity=2)
@@ -0,0 +1,72 @@
+import sys
+import os
+import unittest
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+try:
+    from plantillas import MotorPlantillas, compilar_plantilla, tipos_por_dominio, TIPOS_CORREO
+    print("✅ Plantillas importadas correctamente")
+except ImportError as e:
+    print(f"❌ Error importando plantillas: {e}")
+
+class TestMotorPlantillas(unittest.TestCase):
+    
+    def test_generar_formatos(self):
+        """Test de los ocho formatos de correo de un usuario"""
+        correos = MotorPlantillas().generar('María', 'Gómez')
+        
+        self.assertEqual(list(correos), TIPOS_CORREO)
+        self.assertEqual(correos['gmail'], 'mara.gmez@gmail.com')
+        self.assertEqual(correos['hotmail'], 'mgmez@hotmail.com')
+        self.assertEqual(correos['custom2'], 'gmez.mara@company.com')
+        self.assertEqual(correos['custom3'], 'mg@corporate.com')
+        print("✅ Test formatos de correo - PASÓ")
+    
+    def test_iniciales_por_defecto(self):
+        """Test de iniciales cuando el nombre queda vacío tras normalizar"""
+        correos = MotorPlantillas().generar('Ñ', 'Ü')
+        self.assertEqual(correos['custom3'], 'ab@corporate.com')
+        print("✅ Test iniciales por defecto - PASÓ")
+    
+    def test_generar_lote_con_tipos_y_cache(self):
+        """Test de generación por lotes filtrando tipos y reutilizando la caché"""
+        motor = MotorPlantillas()
+        usuarios = [
+            {'id': 1, 'nombre': 'Ana', 'apellido': 'Gil'},
+            {'id': 2, 'nombre': 'Ana', 'apellido': 'Gil'}
+        ]
+        filas = motor.generar_lote(usuarios, ['yahoo', 'gmail'])
+        
+        self.assertEqual(filas, [
+            {'usuario_id': 1, 'tipo': 'gmail', 'correo': 'ana.gil@gmail.com'},
+            {'usuario_id': 1, 'tipo': 'yahoo', 'correo': 'ana-gil@yahoo.com'},
+            {'usuario_id': 2, 'tipo': 'gmail', 'correo': 'ana.gil@gmail.com'},
+            {'usuario_id': 2, 'tipo': 'yahoo', 'correo': 'ana-gil@yahoo.com'}
+        ])
+        stats = motor.estadisticas_cache()
+        self.assertEqual(stats['fallos'], 1)
+        self.assertEqual(stats['aciertos'], 1)
+        print("✅ Test generación por lotes - PASÓ")
+    
+    def test_plantilla_invalida(self):
+        """Test de que una plantilla con campos desconocidos se rechaza al compilar"""
+        with self.assertRaises(ValueError):
+            compilar_plantilla('{segundo_nombre}@gmail.com')
+        print("✅ Test plantilla inválida - PASÓ")
+
+    def test_tipos_por_dominio(self):
+        """Test de la traducción de dominio a tipos de correo"""
+        self.assertEqual(tipos_por_dominio('gmail.com'), ['gmail'])
+        self.assertEqual(tipos_por_dominio('Outlook.com'), ['outlook'])
+        self.assertEqual(tipos_por_dominio('desconocido.org'), [])
+        print("✅ Test tipos por dominio - PASÓ")
+
+if __name__ == '__main__':
+    print("🧪 INICIANDO PRUEBAS DEL MOTOR DE PLANTILLAS")
+    print("=" * 50)
+    unittest.main(verbosity=2)
@@ -0,0 +1,87 @@
+import sys
+import os
+import threading
+import unittest
+from unittest.mock import Mock
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+try:
+    from pool import ConnectionPool, PoolExhaustedError
+    print("✅ Pool importado correctamente")
+except ImportError as e:
+    print(f"❌ Error importando pool: {e}")
+
+class TestConnectionPool(unittest.TestCase):
+    
+    def _fabrica(self):
+        return Mock(in_transaction=False)
+    
+    def test_close_devuelve_conexion(self):
+        """Test de que close() devuelve la conexión al pool en vez de cerrarla"""
+        pool = ConnectionPool('test', self._fabrica, tamano=2, max_overflow=0)
+        connection = pool.checkout()
+        raw = connection.raw
+        connection.close()
+        
+        raw.close.assert_not_called()
+        self.assertIs(pool.checkout().raw, raw)
+        print("✅ Test devolución al pool - PASÓ")
+    
+    def test_overflow_se_cierra_al_devolver(self):
+        """Test de que las conexiones de overflow no se quedan en el pool"""
+        pool = ConnectionPool('test', self._fabrica, tamano=1, max_overflow=1)
+        c1 = pool.checkout()
+        c2 = pool.checkout()
+        raw2 = c2.raw
+        c1.close()
+        c2.close()
+        
+        raw2.close.assert_called_once()
+        stats = pool.estadisticas()
+        self.assertEqual(stats['libres'], 1)
+        self.assertEqual(stats['en_uso'], 0)
+        print("✅ Test overflow - PASÓ")
+    
+    def test_agotamiento_con_timeout(self):
+        """Test de que el pool lanza PoolExhaustedError al agotar el timeout"""
+        pool = ConnectionPool('test', self._fabrica, tamano=1, max_overflow=0, timeout=0.05)
+        pool.checkout()
+        
+        with self.assertRaises(PoolExhaustedError):
+            pool.checkout()
+        self.assertEqual(pool.estadisticas()['agotamientos'], 1)
+        print("✅ Test agotamiento - PASÓ")
+    
+    def test_espera_hasta_devolucion(self):
+        """Test de que un checkout espera a que otro hilo devuelva la conexión"""
+        pool = ConnectionPool('test', self._fabrica, tamano=1, max_overflow=0, timeout=2)
+        connection = pool.checkout()
+        threading.Timer(0.05, connection.close).start()
+        
+        segunda = pool.checkout()
+        self.assertFalse(segunda.cerrada)
+        stats = pool.estadisticas()
+        self.assertEqual(stats['esperas'], 1)
+        self.assertEqual(stats['conexiones_creadas'], 1)
+        print("✅ Test espera en pool - PASÓ")
+    
+    def test_rollback_de_transaccion_pendiente(self):
+        """Test de que se descartan transacciones abiertas al devolver"""
+        pool = ConnectionPool('test', self._fabrica, tamano=1, max_overflow=0)
+        connection = pool.checkout()
+        connection.raw.in_transaction = True
+        raw = connection.raw
+        connection.close()
+        
+        raw.rollback.assert_called_once()
+        print("✅ Test rollback al devolver - PASÓ")
+
+if __name__ == '__main__':
+    print("🧪 INICIANDO PRUEBAS DEL POOL DE CONEXIONES")
+    print("=" * 50)
+    unittest.main(verbosity=2)
@@ -0,0 +1,69 @@
+import sys
+import os
+import unittest
+from datetime import date, datetime, timezone, timedelta
+from decimal import Decimal
+
+# CORRECCIÓN: Agregar path correcto
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(parent_dir)
+sys.path.insert(0, project_root)
+
+try:
+    from werkzeug.http import http_date
+    from serializacion import a_columnar, codificar, decodificar
+    print("✅ Serialización importada correctamente")
+except ImportError as e:
+    print(f"❌ Error importando serialización: {e}")
+
+class TestSerializacion(unittest.TestCase):
+    
+    def test_fechas_como_flask(self):
+        """Test de que las fechas mantienen el formato HTTP del jsonify de Flask"""
+        fechas = [
+            datetime(2024, 2, 29, 23, 59, 7),
+            datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone(timedelta(hours=2))),
+            date(2023, 12, 31)
+        ]
+        self.assertEqual(decodificar(codificar(fechas)), [http_date(f) for f in fechas])
+        print("✅ Test formato de fechas - PASÓ")
+    
+    def test_tipos_especiales(self):
+        """Test de Decimal, unicode y claves no textuales"""
+        datos = {'total': Decimal('12.50'), 'nombre': 'Sofía', 1: 'uno'}
+        cuerpo = codificar(datos)
+        self.assertIsInstance(cuerpo, bytes)
+        self.assertEqual(decodificar(cuerpo), {'total': '12.50', 'nombre': 'Sofía', '1': 'uno'})
+        
+        with self.assertRaises(TypeError):
+            codificar({'objeto': object()})
+        print("✅ Test tipos especiales - PASÓ")
+
+    def test_columnar_con_diccionario(self):
+        """Test de la representación columnar y la codificación por diccionario"""
+        filas = [
+            {'id': 4, 'tipo': 'gmail', 'correo': 'a@gmail.com'},
+            {'id': 3, 'tipo': 'yahoo', 'correo': 'b@yahoo.com'},
+            {'id': 2, 'tipo': 'gmail', 'correo': 'c@gmail.com'},
+            {'id': 1, 'tipo': 'gmail', 'correo': 'd@gmail.com'}
+        ]
+        columnar = a_columnar(filas, ('tipo', 'correo'))
+        
+        self.assertEqual(columnar['columns'], ['id', 'tipo', 'correo'])
+        # correo no se repite: no compensa codificarlo con diccionario
+        self.assertEqual(columnar['dictionaries'], {'tipo': ['gmail', 'yahoo']})
+        self.assertEqual(list(columnar['rows'][1]), [3, 1, 'b@yahoo.com'])
+        
+        reconstruidas = [
+            {c: (columnar['dictionaries'][c][v] if c in columnar['dictionaries'] else v)
+             for c, v in zip(columnar['columns'], fila)}
+            for fila in columnar['rows']
+        ]
+        self.assertEqual(reconstruidas, filas)
+        self.assertEqual(a_columnar([]), {'columns': [], 'dictionaries': {}, 'rows': []})
+        print("✅ Test formato columnar - PASÓ")
+
+if __name__ == '__main__':
+    print("🧪 Ejecutando tests de serialización...")
+    unittest.main(verbosity=2)